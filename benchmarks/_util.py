@@ -0,0 +1,16 @@
+"""Helpers shared by the benchmarks, importable since scripts run from this folder."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+
+def best(fn: Callable[[], Any], repeat: int = 3) -> float:
+    """The best time of `repeat` calls of `fn`, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
@@ -0,0 +1,68 @@
+"""Compares the size and round-trip throughput of small discriminated events encoded
+with the binary codec against JSON and pickle.
+
+Run with `python benchmarks/bench_codec.py`.
+"""
+
+from __future__ import annotations
+
+import pickle
+import timeit
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.codec import Codec
+
+
+class Shape(DiscriminatedBaseModel):
+    x: float
+    y: float
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+class Rectangle(Shape, discriminator="rectangle"):
+    width: float
+    height: float
+
+
+def main(n: int = 1000, number: int = 10) -> None:
+    events = [
+        (
+            Circle(x=i, y=i, radius=1.5)
+            if i % 2
+            else Rectangle(x=i, y=-i, width=2.0, height=0.25)
+        )
+        for i in range(n)
+    ]
+    codec = Codec(Shape)
+    if hasattr(Shape, "model_validate"):
+        validate_json, dump_json = Shape.model_validate_json, Shape.model_dump_json
+    else:
+        validate_json, dump_json = Shape.parse_raw, Shape.json
+
+    cases = [
+        ("json", lambda x: dump_json(x).encode(), validate_json),
+        ("pickle", pickle.dumps, pickle.loads),
+        ("codec", codec.encode, codec.decode),
+        (
+            "codec (trusted)",
+            codec.encode,
+            lambda x: codec.decode(x, validate=False),
+        ),
+    ]
+    for name, encode, decode in cases:
+        size = sum(len(encode(x)) for x in events) / n
+        best = min(
+            timeit.repeat(
+                lambda: [decode(encode(x)) for x in events], number=number, repeat=5
+            )
+        )
+        print(
+            f"{name:>16} {size:>8.1f} bytes/event {n * number / best:>12,.0f} events/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
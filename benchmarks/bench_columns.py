@@ -0,0 +1,82 @@
+"""Compares exporting a list of discriminated models to columns with `to_columns`
+against dumping every model and pivoting the dumped dicts, and building them back with
+`from_columns` against exploding the columns into rows and validating them.
+
+Run with `python benchmarks/bench_columns.py [n]`, n defaults to 10^5.
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from typing import Any
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.columns import from_columns, np, to_columns
+
+
+class Reading(DiscriminatedBaseModel):
+    sensor: str
+    timestamp: float
+
+
+class Temperature(Reading, discriminator="temperature"):
+    celsius: float
+
+
+class Position(Reading, discriminator="position"):
+    lat: float
+    lon: float
+    alt: float
+
+
+def dump_and_pivot(models: list[Any]) -> dict[str, dict[str, list[Any]]]:
+    tables: dict[str, dict[str, list[Any]]] = {}
+    for model in models:
+        data = model.model_dump() if hasattr(model, "model_dump") else model.dict()
+        table = tables.setdefault(data.pop("type"), {})
+        for key, value in data.items():
+            table.setdefault(key, []).append(value)
+    return tables
+
+
+def explode_and_validate(tables: dict[str, dict[str, Any]]) -> list[Any]:
+    validate = getattr(Reading, "model_validate", None) or Reading.parse_obj
+    models = []
+    for discriminator, table in tables.items():
+        keys = ["type", *table]
+        for row in zip(
+            [discriminator] * len(next(iter(table.values()))), *table.values()
+        ):
+            models.append(validate(dict(zip(keys, row))))
+    return models
+
+
+def main(n: int) -> None:
+    models = [
+        (
+            Temperature(sensor="t", timestamp=i, celsius=20.5)
+            if i % 3
+            else Position(sensor="p", timestamp=i, lat=45.0, lon=9.0, alt=120.0)
+        )
+        for i in range(n)
+    ]
+    cases = {
+        "dump + pivot": lambda: dump_and_pivot(models),
+        "to_columns (lists)": lambda: to_columns(models, numpy=False),
+    }
+    if np is not None:
+        cases["to_columns (numpy)"] = lambda: to_columns(models)
+    tables = to_columns(models, numpy=False).tables
+    cases["explode + validate"] = lambda: explode_and_validate(tables)
+    cases["from_columns"] = lambda: from_columns(Reading, tables)
+    cases["from_columns (trusted)"] = lambda: from_columns(
+        Reading, tables, validate=False
+    )
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=3))
+        print(f"{name:>24} {n / best:>14,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,64 @@
+"""Compares `construct_polymorphic` against validation on deep trusted payloads.
+
+Run with `python benchmarks/bench_construct.py`.
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Shape(DiscriminatedBaseModel):
+    x: float
+    y: float
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+class Rectangle(Shape, discriminator="rectangle"):
+    width: float
+    height: float
+
+
+class Group(Shape, discriminator="group"):
+    shapes: list[Shape]
+
+
+class Container(BaseModel):
+    shapes: list[Shape]
+
+
+def _payload(n: int, depth: int) -> dict:
+    shapes = [
+        (
+            {"type": "circle", "x": i, "y": i, "radius": 1.0}
+            if i % 2
+            else {"type": "rectangle", "x": i, "y": i, "width": 1.0, "height": 1.0}
+        )
+        for i in range(n)
+    ]
+    for _ in range(depth):
+        shapes = [{"type": "group", "x": 0.0, "y": 0.0, "shapes": shapes}]
+    return {"type": "group", "x": 0.0, "y": 0.0, "shapes": shapes}
+
+
+def main(n: int = 1000, number: int = 20) -> None:
+    validate = getattr(Shape, "model_validate", None) or Shape.parse_obj
+    for depth in (0, 5):
+        data = _payload(n, depth)
+        for name, fn in [
+            ("validate", lambda: validate(data)),
+            ("construct_polymorphic", lambda: Shape.construct_polymorphic(data)),
+        ]:
+            best = min(timeit.repeat(fn, number=number, repeat=5))
+            print(f"depth {depth} {name:<24} {n * number / best:>14,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compares validating a large document of discriminated models eagerly against
+deferring it and then reading only a few of its models, or all of them.
+
+Run with `python benchmarks/bench_deferred_validation.py [n]`, n defaults to 10^5.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+from _util import best
+
+
+def define(**kwargs: Any) -> type:
+    root = type("Node", (DiscriminatedBaseModel,), {}, **kwargs)
+    fields = {"name": str, "x": float, "y": float, "tags": list[str]}
+    for kind in ("point", "label", "marker"):
+        type(kind, (root,), {"__annotations__": dict(fields)}, discriminator=kind)
+    return type("Document", (BaseModel,), {"__annotations__": {"nodes": list[root]}})
+
+
+def main(n: int) -> None:
+    kinds = ("point", "label", "marker")
+    data = {
+        "nodes": [
+            {"type": kinds[i % 3], "name": f"n{i}", "x": i, "y": -i, "tags": ["a"]}
+            for i in range(n)
+        ]
+    }
+    for name, kwargs in (("eager", {}), ("deferred", {"deferred": True})):
+        document = define(**kwargs)
+        validate = getattr(document, "model_validate", None) or document.parse_obj
+
+        def read(k: int) -> None:
+            nodes = validate(data).nodes
+            for node in nodes[:k]:
+                node.name
+
+        for label, k in (("no access", 0), ("100 read", 100), ("all read", n)):
+            rate = n / best(lambda: read(k))
+            print(f"{name:>8} {label:>10} {rate:>12,.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
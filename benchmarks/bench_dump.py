@@ -0,0 +1,103 @@
+"""Compares `model_dump` throughput of discriminated models against stock pydantic.
+
+Run with `python benchmarks/bench_dump.py`. With pydantic 1, the equivalent `dict` and
+`json` are measured instead.
+"""
+
+from __future__ import annotations
+
+import timeit
+from typing import Literal, Union
+
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class PlainPoint(BaseModel):
+    x: float
+    y: float
+
+
+class PlainContainer(BaseModel):
+    points: list[PlainPoint]
+
+
+class UnionCircle(BaseModel):
+    type: Literal["circle"] = "circle"
+    x: float
+    y: float
+    radius: float
+
+
+class UnionRectangle(BaseModel):
+    type: Literal["rectangle"] = "rectangle"
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class UnionContainer(BaseModel):
+    shapes: list[
+        Annotated[Union[UnionCircle, UnionRectangle], Field(discriminator="type")]
+    ]
+
+
+class Shape(DiscriminatedBaseModel):
+    x: float
+    y: float
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+class Rectangle(Shape, discriminator="rectangle"):
+    width: float
+    height: float
+
+
+class Container(BaseModel):
+    shapes: list[Shape]
+
+
+def main(n: int = 1000, number: int = 50) -> None:
+    plain = PlainContainer(points=[PlainPoint(x=i, y=i) for i in range(n)])
+    union = UnionContainer(
+        shapes=[
+            (
+                UnionCircle(x=i, y=i, radius=1)
+                if i % 2
+                else UnionRectangle(x=i, y=i, width=1, height=1)
+            )
+            for i in range(n)
+        ]
+    )
+    discriminated = Container(
+        shapes=[
+            (
+                Circle(x=i, y=i, radius=1)
+                if i % 2
+                else Rectangle(x=i, y=i, width=1, height=1)
+            )
+            for i in range(n)
+        ]
+    )
+    for name, model in [
+        ("plain", plain),
+        ("pydantic union", union),
+        ("discriminated", discriminated),
+    ]:
+        for dump in (
+            getattr(model, "model_dump", None) or model.dict,
+            getattr(model, "model_dump_json", None) or model.json,
+        ):
+            method = dump.__name__
+            best = min(timeit.repeat(dump, number=number, repeat=5)) / number
+            print(f"{name:>16} {method:<16} {n / best:>14,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
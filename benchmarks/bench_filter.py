@@ -0,0 +1,53 @@
+"""Compares reading a stream of 300 event types in full against reading only 2 of
+them with `include`, both from NDJSON and with `validate_many`.
+
+Run with `python benchmarks/bench_filter.py [n]`, n defaults to 10^5.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import sys
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.stream import read_models
+
+from _util import best
+
+
+class Event(DiscriminatedBaseModel):
+    id: int
+    source: str
+
+
+N_TYPES = 300
+for i in range(N_TYPES):
+    ns = {"__annotations__": {"value": float, "tags": list[str]}}
+    type(f"Event{i}", (Event,), ns, discriminator=f"event_{i}")
+
+
+def main(n: int) -> None:
+    records = [
+        {
+            "type": f"event_{i % N_TYPES}",
+            "id": i,
+            "source": "bench",
+            "value": i / 2,
+            "tags": ["a", "b"],
+        }
+        for i in range(n)
+    ]
+    text = "\n".join(map(json.dumps, records))
+    include = {"event_1", "event_2"}
+    for name, kwargs in (("all types", {}), ("2 types", {"include": include})):
+        stream = n / best(lambda: list(read_models(Event, io.StringIO(text), **kwargs)))
+        batch = n / best(lambda: Event.validate_many(records, **kwargs))
+        print(
+            f"{name:>10} {stream:>12,.0f} NDJSON records/s "
+            f"{batch:>12,.0f} validate_many records/s"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
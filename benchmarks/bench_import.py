@@ -0,0 +1,81 @@
+"""Compares cold start time of importing every plugin module upfront against lazily
+registering them by import path.
+
+Run with `python benchmarks/bench_import.py`.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = """
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Plugin(DiscriminatedBaseModel):
+    name: str
+"""
+
+PLUGIN = """
+from plugins.root import Plugin
+
+
+class Plugin{i}(Plugin, discriminator="plugin{i}"):
+    value{i}: int = 0
+    weight{i}: float = 0.0
+    tags{i}: list[str] = []
+"""
+
+EAGER = """
+from plugins.root import Plugin
+{imports}
+Plugin(type="plugin0", name="x")
+"""
+
+LAZY = """
+from plugins.root import Plugin
+{registrations}
+Plugin(type="plugin0", name="x")
+"""
+
+
+def _run(script: str, cwd: str, repeat: int) -> float:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([cwd, os.getcwd()])}
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env, check=True)
+        timings.append(time.perf_counter() - t)
+    return min(timings)
+
+
+def main(n: int = 300, repeat: int = 5) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        package = Path(tmp) / "plugins"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        (package / "root.py").write_text(ROOT)
+        for i in range(n):
+            (package / f"plugin{i}.py").write_text(PLUGIN.format(i=i))
+
+        imports = "\n".join(f"import plugins.plugin{i}" for i in range(n))
+        registrations = "\n".join(
+            f'Plugin.register_lazy("plugin{i}", "plugins.plugin{i}:Plugin{i}")'
+            for i in range(n)
+        )
+        baseline = _run("import plugins.root", tmp, repeat)
+        eager = _run(EAGER.format(imports=imports), tmp, repeat)
+        lazy = _run(LAZY.format(registrations=registrations), tmp, repeat)
+
+    print(f"{'import root only':>20} {baseline * 1000:>10.1f} ms")
+    print(f"{'eager, ' + str(n) + ' plugins':>20} {eager * 1000:>10.1f} ms")
+    print(f"{'lazy, ' + str(n) + ' plugins':>20} {lazy * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Compares generating the JSON schema of a root with many subclasses against reading
+it back from the cache, which is dropped whenever a subclass registers.
+
+Run with `python benchmarks/bench_json_schema.py [n]`, n defaults to 300 subclasses.
+"""
+
+from __future__ import annotations
+
+import sys
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+from _util import best
+
+
+def main(n: int) -> None:
+    root = type("Event", (DiscriminatedBaseModel,), {"__annotations__": {"id": int}})
+    for i in range(n):
+        ns = {"__annotations__": {"value": float, "tags": list[str]}}
+        type(f"Event{i}", (root,), ns, discriminator=f"event_{i}")
+    json_schema = getattr(root, "model_json_schema", None) or root.schema
+
+    added = iter(range(n, 2 * n))
+
+    def cold() -> None:
+        i = next(added)
+        type(f"Event{i}", (root,), {}, discriminator=f"event_{i}")
+        json_schema()
+
+    cold_time = best(cold, repeat=5)
+    json_schema()
+    warm_time = best(json_schema, repeat=5)
+    print(f"{'cold':>6} {cold_time * 1000:>10.2f} ms")
+    print(f"{'cached':>6} {warm_time * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,50 @@
+"""Measures the overhead of the metrics hook, both disabled and enabled.
+
+Run with `python benchmarks/bench_metrics.py`.
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from pydantic_discriminator import DiscriminatedBaseModel, metrics
+
+
+class Shape(DiscriminatedBaseModel):
+    x: float
+    y: float
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+def main(number: int = 20000) -> None:
+    record = {"type": "circle", "x": 0, "y": 0, "radius": 1}
+    validate = getattr(Shape, "model_validate", None) or Shape.parse_obj
+    circle = Circle(x=0, y=0, radius=1)
+    dump = "model_dump" if hasattr(circle, "model_dump") else "dict"
+    cases = [
+        ("construct", lambda: Shape(**record)),
+        ("validate", lambda: validate(dict(record))),
+        ("dump", lambda: getattr(circle, dump)()),
+    ]
+
+    check = min(
+        timeit.repeat("metrics.active is not None", globals=globals(), repeat=5)
+    )
+    print(f"{'disabled check':>16} {check * 1e3:>10.1f} ns/call")
+    for name, fn in cases:
+        metrics.disable()
+        disabled = min(timeit.repeat(fn, number=number, repeat=5))
+        metrics.enable()
+        enabled = min(timeit.repeat(fn, number=number, repeat=5))
+        metrics.disable()
+        print(
+            f"{name:>16} {disabled / number * 1e9:>10.1f} ns/call disabled"
+            f" {enabled / number * 1e9:>10.1f} ns/call enabled"
+        )
+
+
+if __name__ == "__main__":
+    main()
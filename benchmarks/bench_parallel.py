@@ -0,0 +1,56 @@
+"""Compares serial `validate_many` against `validate_parallel` over a process pool.
+
+Run with `python benchmarks/bench_parallel.py`.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.parallel import validate_parallel
+
+
+class Shape(DiscriminatedBaseModel):
+    x: float
+    y: float
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+class Rectangle(Shape, discriminator="rectangle"):
+    width: float
+    height: float
+
+
+def main(n: int = 200_000, chunk_size: int = 10_000) -> None:
+    records = [
+        (
+            {"type": "circle", "x": i, "y": i, "radius": 1}
+            if i % 2
+            else {"type": "rectangle", "x": i, "y": i, "width": 1, "height": 1}
+        )
+        for i in range(n)
+    ]
+    t = time.perf_counter()
+    Shape.validate_many(records)
+    print(f"{'serial':>24} {n / (time.perf_counter() - t):>14,.0f} objects/s")
+
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        with ProcessPoolExecutor(workers) as pool:
+            pool.submit(int).result()  # start the pool outside of the timing
+            for dump in (False, True):
+                t = time.perf_counter()
+                validate_parallel(
+                    Shape, records, chunk_size=chunk_size, dump=dump, executor=pool
+                )
+                name = f"{workers} workers{', dump' if dump else ''}"
+                print(f"{name:>24} {n / (time.perf_counter() - t):>14,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compares pickle size and round-trip time of discriminated models against pydantic's
+default pickling and against dumping and revalidating.
+
+Run with `python benchmarks/bench_pickle.py`.
+"""
+
+from __future__ import annotations
+
+import pickle
+import timeit
+
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Animal(DiscriminatedBaseModel):
+    name: str
+    age: int
+
+
+class Mammal(Animal, discriminator="mammal"):
+    color: str
+
+
+class Cat(Mammal, discriminator="cat"):
+    meow_pitch: float
+    purrosity: float
+
+
+class Reptile(Animal, discriminator="reptile"):
+    length: float
+
+
+class Snake(Reptile, discriminator="snake"):
+    killcount: int
+
+
+class Zoo(BaseModel):
+    animals: list[Animal]
+
+
+def _default_reduce(self: BaseModel) -> object:
+    return object.__new__, (type(self),), self.__getstate__()
+
+
+def main(n: int = 1000, number: int = 20) -> None:
+    zoo = Zoo(
+        animals=[
+            (
+                Cat(name="Tom", age=i, color="grey", meow_pitch=1.0, purrosity=0.5)
+                if i % 2
+                else Snake(name="Kaa", age=i, length=5.0, killcount=i)
+            )
+            for i in range(n)
+        ]
+    )
+    validate = getattr(Zoo, "model_validate", None) or Zoo.parse_obj
+    dump = getattr(zoo, "model_dump", None) or zoo.dict
+
+    cases = [
+        ("compact", lambda: pickle.loads(pickle.dumps(zoo)), lambda: pickle.dumps(zoo)),
+        (
+            "dump + validate",
+            lambda: validate(pickle.loads(pickle.dumps(dump()))),
+            lambda: pickle.dumps(dump()),
+        ),
+    ]
+    for name, roundtrip, dumps in cases:
+        size = len(dumps())
+        best = min(timeit.repeat(roundtrip, number=number, repeat=5))
+        print(f"{name:>16} {size:>10,} bytes {n * number / best:>14,.0f} objects/s")
+
+    # pydantic's own pickling, as it was before __reduce__ was overridden.
+    reduce = DiscriminatedBaseModel.__reduce__
+    DiscriminatedBaseModel.__reduce__ = _default_reduce  # type: ignore
+    try:
+        size = len(pickle.dumps(zoo))
+        best = min(
+            timeit.repeat(
+                lambda: pickle.loads(pickle.dumps(zoo)), number=number, repeat=5
+            )
+        )
+        print(
+            f"{'default':>16} {size:>10,} bytes {n * number / best:>14,.0f} objects/s"
+        )
+    finally:
+        DiscriminatedBaseModel.__reduce__ = reduce  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
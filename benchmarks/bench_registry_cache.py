@@ -0,0 +1,80 @@
+"""Compares the start time of a worker importing every plugin module of a hierarchy,
+saving the registry cache on a cold start, and loading it on a warm start.
+
+Run with `python benchmarks/bench_registry_cache.py [n]`, n defaults to 800.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = """
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Plugin(DiscriminatedBaseModel):
+    name: str
+"""
+
+PLUGIN = """
+from plugins.root import Plugin
+
+
+class Plugin{i}(Plugin, discriminator="plugin{i}"):
+    value{i}: int = 0
+    weight{i}: float = 0.0
+    tags{i}: list[str] = []
+"""
+
+START = """
+from pydantic_discriminator.cache import load_registry, save_registry
+from plugins.root import Plugin
+
+if {use_cache} and load_registry(Plugin, "cache") is None:
+    {imports}
+    save_registry(Plugin, "cache")
+elif not {use_cache}:
+    {imports}
+Plugin(type="plugin0", name="x")
+"""
+
+
+def _run(script: str, cwd: str, repeat: int, setup: str = "") -> float:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([cwd, os.getcwd()])}
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            subprocess.run(setup, shell=True, cwd=cwd, check=True)
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env, check=True)
+        timings.append(time.perf_counter() - t)
+    return min(timings)
+
+
+def main(n: int, repeat: int = 3) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        package = Path(tmp) / "plugins"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        (package / "root.py").write_text(ROOT)
+        for i in range(n):
+            (package / f"plugin{i}.py").write_text(PLUGIN.format(i=i))
+
+        imports = "; ".join(f"import plugins.plugin{i}" for i in range(n))
+        no_cache = _run(START.format(use_cache=False, imports=imports), tmp, repeat)
+        script = START.format(use_cache=True, imports=imports)
+        cold = _run(script, tmp, repeat, setup="rm -rf cache")
+        warm = _run(script, tmp, repeat)
+
+    print(f"{'no cache':>12} {no_cache * 1000:>10.1f} ms")
+    print(f"{'cold cache':>12} {cold * 1000:>10.1f} ms")
+    print(f"{'warm cache':>12} {warm * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 800)
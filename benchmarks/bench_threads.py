@@ -0,0 +1,58 @@
+"""Measures validation and dump throughput of discriminated models across threads.
+
+Run with `python benchmarks/bench_threads.py`. Scaling is only expected on
+free-threaded CPython builds, with the GIL throughput should stay flat.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Shape(DiscriminatedBaseModel):
+    x: float
+    y: float
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+class Rectangle(Shape, discriminator="rectangle"):
+    width: float
+    height: float
+
+
+def _work(records: list[dict]) -> None:
+    validate = getattr(Shape, "model_validate", None) or Shape.parse_obj
+    for record in records:
+        obj = validate(dict(record))
+        (getattr(obj, "model_dump", None) or obj.dict)()
+
+
+def main(n: int = 20000) -> None:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    records = [
+        (
+            {"type": "circle", "x": i, "y": i, "radius": 1}
+            if i % 2
+            else {"type": "rectangle", "x": i, "y": i, "width": 1, "height": 1}
+        )
+        for i in range(n)
+    ]
+    for n_threads in (1, 2, 4, 8):
+        chunks = [records[i::n_threads] for i in range(n_threads)]
+        with ThreadPoolExecutor(n_threads) as pool:
+            t = time.perf_counter()
+            list(pool.map(_work, chunks))
+            elapsed = time.perf_counter() - t
+        print(f"{n_threads:>3} threads {n / elapsed:>14,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
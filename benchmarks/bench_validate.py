@@ -0,0 +1,132 @@
+"""Compares validation throughput of discriminated models against stock pydantic.
+
+Run with `python benchmarks/bench_validate.py`. Tagged unions need pydantic 2, with
+pydantic 1 the equivalent `parse_obj` and `parse_raw` are measured instead.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import timeit
+from typing import Literal, Union
+
+import pydantic as pyd
+from packaging.version import parse
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+PYDANTIC_V2 = parse(pyd.__version__).major >= 2
+
+
+class UnionCircle(BaseModel):
+    type: Literal["circle"] = "circle"
+    x: float
+    y: float
+    radius: float
+
+
+class UnionRectangle(BaseModel):
+    type: Literal["rectangle"] = "rectangle"
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class UnionContainer(BaseModel):
+    shapes: list[
+        Annotated[Union[UnionCircle, UnionRectangle], Field(discriminator="type")]
+    ]
+
+
+class Shape(DiscriminatedBaseModel):
+    x: float
+    y: float
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+class Rectangle(Shape, discriminator="rectangle"):
+    width: float
+    height: float
+
+
+class Container(BaseModel):
+    shapes: list[Shape]
+
+
+class TaggedShape(DiscriminatedBaseModel, tagged_union=True):
+    x: float
+    y: float
+
+
+class TaggedCircle(TaggedShape, discriminator="circle"):
+    radius: float
+
+
+class TaggedRectangle(TaggedShape, discriminator="rectangle"):
+    width: float
+    height: float
+
+
+class TaggedContainer(BaseModel):
+    shapes: list[TaggedShape]
+
+
+def main(n: int = 1000, number: int = 20) -> None:
+    data = {
+        "shapes": [
+            (
+                {"type": "circle", "x": i, "y": i, "radius": 1}
+                if i % 2
+                else {"type": "rectangle", "x": i, "y": i, "width": 1, "height": 1}
+            )
+            for i in range(n)
+        ]
+    }
+    raw = json.dumps(data).encode()
+    records = data["shapes"]
+    roots = [("discriminated", Shape)]
+    models = [("pydantic union", UnionContainer), ("discriminated", Container)]
+    if PYDANTIC_V2:
+        roots.append(("tagged union", TaggedShape))
+        models.append(("tagged union", TaggedContainer))
+    else:
+        print("tagged unions need pydantic 2, skipped")
+
+    for name, root in roots:
+        validate = getattr(root, "model_validate", None) or root.parse_obj
+        label = validate.__name__
+        for method, fn in [
+            (
+                f"deepcopy + {label}",
+                lambda: [validate(copy.deepcopy(r)) for r in records],
+            ),
+            (f"{label} per record", lambda: [validate(r) for r in records]),
+            ("validate_many", lambda: root.validate_many(records)),
+        ]:
+            best = min(timeit.repeat(fn, number=number, repeat=5))
+            print(f"{name:>16} {method:<28} {n * number / best:>14,.0f} objects/s")
+
+    for name, model in models:
+        validate = getattr(model, "model_validate", None) or model.parse_obj
+        validate_json = getattr(model, "model_validate_json", None) or model.parse_raw
+        for method, fn in [
+            (validate.__name__, lambda: validate(data)),
+            (
+                f"json.loads + {validate.__name__}",
+                lambda: validate(json.loads(raw)),
+            ),
+            (validate_json.__name__, lambda: validate_json(raw)),
+        ]:
+            best = min(timeit.repeat(fn, number=number, repeat=5))
+            print(f"{name:>16} {method:<28} {n * number / best:>14,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
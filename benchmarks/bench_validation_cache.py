@@ -0,0 +1,61 @@
+"""Compares validating a list of records that repeat a few distinct payloads with and
+without a validation cache, in throughput and memory kept by the instances.
+
+Run with `python benchmarks/bench_validation_cache.py [n]`, n defaults to 10^5.
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from typing import Any
+
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+from _util import best
+
+
+def define(**kwargs: Any) -> type:
+    root = type("Shape", (DiscriminatedBaseModel,), {}, frozen=True, **kwargs)
+    fields = {"x": float, "y": float, "width": float, "height": float, "label": str}
+    type("Rectangle", (root,), {"__annotations__": fields}, discriminator="rectangle")
+    return type("Scene", (BaseModel,), {"__annotations__": {"shapes": list[root]}})
+
+
+def main(n: int) -> None:
+    for distinct in (10, 1000, n):
+        records = [
+            {
+                "type": "rectangle",
+                "x": i % distinct,
+                "y": 0.0,
+                "width": 2.0,
+                "height": 1.0,
+                "label": "box",
+            }
+            for i in range(n)
+        ]
+        for name, kwargs in (("no cache", {}), ("cache", {"cache_size": 4096})):
+            scene = define(**kwargs)
+            validate = getattr(scene, "model_validate", None) or scene.parse_obj
+
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            kept = validate({"shapes": records})
+            kept_bytes = (tracemalloc.get_traced_memory()[0] - before) / n
+            tracemalloc.stop()
+            del kept
+
+            rate = n / best(lambda: validate({"shapes": records}))
+            print(
+                f"{distinct:>6} distinct {name:>9} {rate:>12,.0f} records/s "
+                f"{kept_bytes:>8.0f} B/record"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,218 @@
+"""Benchmark suite comparing discriminated models against pydantic discriminated unions.
+
+For every hierarchy shape (depth of the inheritance chain x number of leaves) and every
+implementation, measures class definition time, validation, construction, dump and JSON
+round-trip throughput and memory per instance. Works with both pydantic 1 and 2.
+
+Run with `python benchmarks/suite.py [--output results.json]`, results are printed as a
+table and optionally written as JSON so that they can be compared across versions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from typing import Any, Literal, Union
+
+import pydantic as pyd
+from packaging.version import parse
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+PYDANTIC_V2 = parse(pyd.__version__).major >= 2
+
+if PYDANTIC_V2:
+
+    def validate(model: type[BaseModel], data: Any) -> Any:
+        return model.model_validate(data)
+
+    def validate_json(model: type[BaseModel], data: str) -> Any:
+        return model.model_validate_json(data)
+
+    def dump(obj: BaseModel) -> Any:
+        return obj.model_dump()
+
+    def dump_json(obj: BaseModel) -> str:
+        return obj.model_dump_json()
+
+else:
+
+    def validate(model: type[BaseModel], data: Any) -> Any:
+        return model.parse_obj(data)
+
+    def validate_json(model: type[BaseModel], data: str) -> Any:
+        return model.parse_raw(data)
+
+    def dump(obj: BaseModel) -> Any:
+        return obj.dict()
+
+    def dump_json(obj: BaseModel) -> str:
+        return obj.json()
+
+
+class Hierarchy:
+    def __init__(self, container: type[BaseModel], leaves: list[type[BaseModel]]):
+        self.container = container
+        self.leaves = leaves
+
+
+def _fields(level: int) -> dict[str, Any]:
+    return {"__annotations__": {f"d{level}": int}, "__module__": __name__}
+
+
+def define_union(depth: int, width: int) -> Hierarchy:
+    base: type = BaseModel
+    ns = {"__annotations__": {"x": float, "y": float}, "__module__": __name__}
+    for level in range(depth):
+        base = type(f"UnionLevel{level}", (base,), ns)
+        ns = _fields(level + 1)
+    leaves = []
+    for i in range(width):
+        name = f"leaf{i}"
+        leaf_ns = {**ns, "type": name}
+        leaf_ns["__annotations__"] = {
+            **ns["__annotations__"],
+            "type": Literal[name],  # type: ignore
+            "value": float,
+        }
+        leaves.append(type(f"UnionLeaf{i}", (base,), leaf_ns))
+    item = Union[tuple(leaves)] if width > 1 else leaves[0]
+    item = Annotated[item, Field(discriminator="type")] if width > 1 else item
+    container = type(
+        "UnionContainer",
+        (BaseModel,),
+        {"__annotations__": {"items": list[item]}, "__module__": __name__},
+    )
+    return Hierarchy(container, leaves)
+
+
+def define_discriminated(depth: int, width: int, **kwargs: Any) -> Hierarchy:
+    ns = {"__annotations__": {"x": float, "y": float}, "__module__": __name__}
+    root = base = type("Root", (DiscriminatedBaseModel,), ns, **kwargs)
+    for level in range(1, depth):
+        base = type(f"Level{level}", (base,), _fields(level), discriminator=f"l{level}")
+    leaves = []
+    for i in range(width):
+        # Each class gets its own namespace, which it may keep and change.
+        ns = _fields(depth)
+        ns["__annotations__"]["value"] = float
+        leaves.append(type(f"Leaf{i}", (base,), ns, discriminator=f"leaf{i}"))
+    container = type(
+        "Container",
+        (BaseModel,),
+        {"__annotations__": {"items": list[root]}, "__module__": __name__},
+    )
+    return Hierarchy(container, leaves)
+
+
+IMPLEMENTATIONS: dict[str, Callable[[int, int], Hierarchy]] = {
+    "pydantic union": define_union,
+    "discriminated": define_discriminated,
+}
+if PYDANTIC_V2:
+    IMPLEMENTATIONS["tagged union"] = lambda depth, width: define_discriminated(
+        depth, width, tagged_union=True
+    )
+
+
+def _records(depth: int, width: int, n: int) -> list[dict[str, Any]]:
+    records = []
+    for i in range(n):
+        record: dict[str, Any] = {"type": f"leaf{i % width}", "x": i, "y": i}
+        record.update({f"d{level}": level for level in range(1, depth + 1)})
+        record["value"] = i
+        records.append(record)
+    return records
+
+
+def _throughput(fn: Callable[[], Any], n: int, number: int) -> float:
+    return n * number / min(timeit.repeat(fn, number=number, repeat=3))
+
+
+def bench(name: str, depth: int, width: int, n: int, number: int) -> dict[str, Any]:
+    gc.collect()
+    t = time.perf_counter()
+    hierarchy = IMPLEMENTATIONS[name](depth, width)
+    define_s = time.perf_counter() - t
+
+    container = hierarchy.container
+    data = {"items": _records(depth, width, n)}
+    obj = validate(container, data)
+    raw = dump_json(obj)
+    kwargs = [
+        (hierarchy.leaves[i % width], {k: v for k, v in r.items() if k != "type"})
+        for i, r in enumerate(data["items"])
+    ]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = validate(container, data)
+    bytes_per_instance = (tracemalloc.get_traced_memory()[0] - before) / n
+    tracemalloc.stop()
+    del kept
+
+    return {
+        "implementation": name,
+        "depth": depth,
+        "width": width,
+        "define_s": define_s,
+        "validate_per_s": _throughput(lambda: validate(container, data), n, number),
+        "construct_per_s": _throughput(
+            lambda: [cls(**kw) for cls, kw in kwargs], n, number
+        ),
+        "dump_per_s": _throughput(lambda: dump(obj), n, number),
+        "json_roundtrip_per_s": _throughput(
+            lambda: validate_json(container, dump_json(obj)), n, number
+        ),
+        "bytes_per_instance": bytes_per_instance,
+        "json_bytes": len(raw),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--width", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("-n", type=int, default=1000, help="records per container")
+    parser.add_argument("--number", type=int, default=5, help="runs per repeat")
+    parser.add_argument("--output", help="path of the JSON results file")
+    args = parser.parse_args()
+
+    results = []
+    header = f"{'implementation':>16} {'depth':>5} {'width':>5} {'define':>9}"
+    header += "".join(f"{x:>12}" for x in ("validate", "construct", "dump", "json"))
+    print(header + f"{'B/instance':>12}")
+    for depth in args.depth:
+        for width in args.width:
+            for name in IMPLEMENTATIONS:
+                r = bench(name, depth, width, args.n, args.number)
+                results.append(r)
+                line = f"{name:>16} {depth:>5} {width:>5} {r['define_s']:>8.3f}s"
+                for key in ("validate", "construct", "dump", "json_roundtrip"):
+                    line += f"{r[key + '_per_s']:>12,.0f}"
+                print(line + f"{r['bytes_per_instance']:>12,.0f}", flush=True)
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "pydantic": pyd.__version__,
+            "platform": platform.platform(),
+            "argv": sys.argv[1:],
+            "results": results,
+        }
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,123 @@
 from __future__ import annotations
 
-from typing import Any, TypeVar
+from collections.abc import Callable, Mapping
+from functools import partial
+from operator import attrgetter
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
 
-from pydantic import BaseModel, Field, root_validator
+from pydantic import (
+    BaseModel,
+    Extra,
+    Field,
+    ValidationError,
+    create_model,
+    root_validator,
+    validate_model,
+)
 from pydantic.main import ModelMetaclass
+from pydantic.schema import (
+    default_ref_template,
+    get_flat_models_from_models,
+    get_model_name_map,
+    schema,
+)
 
-from pydantic_discriminator.common import DiscriminatedBase, Naming
+from pydantic_discriminator import metrics
+from pydantic_discriminator.common import (
+    DiscriminatedBase,
+    Naming,
+    check_type_field,
+    default_getter,
+    install_deferred,
+    polymorphic_json_schema,
+    pop_class_discriminator,
+    pop_deferred,
+    pop_validation_cache,
+    register,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pydantic.typing import TupleGenerator
+
+# Methods and attributes of deferred models that read the fields of the instance,
+# dict(), json() and copy() all go through _iter.
+_DEFERRED_METHODS = (
+    "__eq__",
+    "__hash__",
+    "__fields_set__",
+    "__iter__",
+    "__repr_args__",
+    "__setattr__",
+    "__getstate__",
+    "__reduce__",
+    "_iter",
+)
 
 
 class DiscriminatedMeta(ModelMetaclass):
     def __new__(cls, name, bases, namespace, **kwargs):
         discriminator = kwargs.pop(Naming.DISCRIMINATOR_KWARG, name.lower())
+        # Without pydantic-core there is nothing to compile, dispatch stays in __new__.
+        kwargs.pop(Naming.TAGGED_UNION_KWARG, None)
+        class_discriminator = pop_class_discriminator(bases, kwargs)
+        replace = kwargs.pop(Naming.REPLACE_KWARG, False)
+        deferred = pop_deferred(bases, kwargs)
+        cache = pop_validation_cache(bases, kwargs)
+        # The namespace and its annotations may be shared with other classes, e.g. by
+        # type(), so the type field is added to copies.
+        namespace = {
+            **namespace,
+            "__annotations__": dict(namespace.get("__annotations__", {})),
+        }
+        check_type_field(name, bases, namespace)
+        if class_discriminator:
+            namespace["__annotations__"][Naming.TYPE_FIELD_NAME] = ClassVar[str]
         new_cls = super().__new__(cls, name, bases, namespace, **kwargs)
-        setattr(new_cls, Naming.REGISTRY, {})
-        setattr(new_cls, Naming.DISCRIMINATOR, discriminator)
-        for base in bases:
-            if hasattr(base, Naming.REGISTRY):
-                getattr(base, Naming.REGISTRY)[discriminator] = new_cls
+        setattr(new_cls, Naming.CLASS_DISCRIMINATOR, class_discriminator)
+        setattr(new_cls, Naming.DEFERRED_VALIDATION, deferred)
+        setattr(new_cls, Naming.VALIDATION_CACHE, cache)
+        config = new_cls.__config__
+        if cache is not None and config.allow_mutation and not config.frozen:
+            raise TypeError(f"{name} shares cached instances, so it must be frozen")
+        if deferred:
+            install_deferred(new_cls, _DEFERRED_METHODS)
+        if class_discriminator:
+            #! Fields are inherited regardless of the ClassVar annotation, the type is
+            #! then a class constant, added by _iter and ignored on input.
+            new_cls.__fields__.pop(Naming.TYPE_FIELD_NAME, None)
+            setattr(new_cls, Naming.TYPE_FIELD_NAME, discriminator)
+            if new_cls.__config__.extra is not Extra.ignore:
+                raise TypeError(
+                    f"{name} has a class discriminator, so it must ignore extra keys"
+                )
+        register(new_cls, bases, discriminator, replace)
         return new_cls
 
 
 _T = TypeVar("_T", bound="DiscriminatedBaseModel")
+_object_setattr = object.__setattr__
+
+
+def _deferred(cls: type[_T], data: Mapping[str, Any]) -> _T:
+    # Only the subclass is resolved, the data is validated when first needed.
+    type_ = data.get(
+        Naming.TYPE_FIELD_ALIAS, data.get(Naming.TYPE_FIELD_NAME, cls.discriminator())
+    )
+    other_cls = cls if cls.discriminator() == type_ else cls.get_subclass(type_)
+    if other_cls is None:
+        if metrics.active is not None:
+            metrics.active.count("unknown", type_)
+        raise ValueError(f"Unknown discriminator {type_} for {cls}")
+    if not getattr(other_cls, Naming.DEFERRED_VALIDATION):
+        return other_cls(**data)
+    values: dict[str, Any] = {Naming.RAW_DATA: data}
+    if not getattr(other_cls, Naming.CLASS_DISCRIMINATOR):
+        values[Naming.TYPE_FIELD_NAME] = other_cls.discriminator()
+    instance = object.__new__(other_cls)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__fields_set__", set())
+    return instance
 
 
 class DiscriminatedBaseModel(
@@ -29,40 +126,275 @@ class DiscriminatedBaseModel(
     type_: str = Field(alias=Naming.TYPE_FIELD_ALIAS, description="The type of model.")
 
     def __new__(cls: type[_T], *args, **kwargs) -> _T:
-        if Naming.TYPE_FIELD_ALIAS not in kwargs:
-            kwargs[Naming.TYPE_FIELD_ALIAS] = cls.discriminator()
-        type_ = kwargs[Naming.TYPE_FIELD_ALIAS]
+        m = metrics.active
+        start = perf_counter() if m is not None else 0.0
+        type_ = kwargs.get(
+            Naming.TYPE_FIELD_ALIAS,
+            kwargs.get(Naming.TYPE_FIELD_NAME, cls.discriminator()),
+        )
         if cls.discriminator() == type_:
+            if m is not None:
+                m.observe("dispatch", type_, perf_counter() - start)
             return super().__new__(cls)  # type: ignore
-        registry = cls.get_registry_recur()
-        if kwargs[Naming.TYPE_FIELD_ALIAS] not in registry:
-            raise ValueError(
-                f"Unknown discriminator {kwargs[Naming.TYPE_FIELD_ALIAS]} for {cls}"
-            )
-        other_cls = registry[kwargs[Naming.TYPE_FIELD_ALIAS]]
+        other_cls = cls.get_subclass(type_)
+        if other_cls is None:
+            if m is not None:
+                m.count("unknown", type_)
+            raise ValueError(f"Unknown discriminator {type_} for {cls}")
+        # The flat index already resolved the final class, so unless it redefines
+        # __new__ there is no need to dispatch again.
+        if other_cls.__new__ is DiscriminatedBaseModel.__new__:
+            if m is not None:
+                m.observe("dispatch", type_, perf_counter() - start)
+            return super().__new__(other_cls)  # type: ignore
         return other_cls.__new__(other_cls, *args, **kwargs)  # type: ignore
 
-    def dict(self, *args, **kwargs) -> dict:
-        super_dict = super().dict(*args, **kwargs)
-        super_dict[Naming.TYPE_FIELD_ALIAS] = super_dict.pop(Naming.TYPE_FIELD_NAME)
-        return super_dict
+    # dict() and json() both go through _iter(to_dict=True), copy() does not. The type
+    # is emitted first, and include and exclude name it by its key.
+    def _iter(self, to_dict: bool = False, *args, **kwargs) -> TupleGenerator:
+        include, exclude = kwargs.get("include"), kwargs.get("exclude")
+        if (
+            to_dict
+            and (include is None or Naming.TYPE_FIELD_ALIAS in include)
+            and not (exclude and Naming.TYPE_FIELD_ALIAS in exclude)
+        ):
+            yield Naming.TYPE_FIELD_ALIAS, self.type_
+        for key, value in super()._iter(to_dict, *args, **kwargs):
+            if not (to_dict and key == Naming.TYPE_FIELD_NAME):
+                yield key, value
+
+    # The discriminator under the key it is dumped with, as with pydantic 2.
+    type = property(attrgetter(Naming.TYPE_FIELD_NAME))
+
+    def __reduce__(self) -> Any:
+        # Pickled as the class and the field values, which skips both dispatch and
+        # validation when unpickling. Anything unusual uses pydantic's own state.
+        cls, values = type(self), self.__dict__
+        fields_set = self.__fields_set__
+        type_set = Naming.TYPE_FIELD_NAME in fields_set or (
+            Naming.TYPE_FIELD_NAME not in values
+        )
+        if self.__private_attributes__ or len(fields_set) + (not type_set) != len(
+            values
+        ):
+            return object.__new__, (cls,), self.__getstate__()
+        if type_set:
+            return _unpickle, (cls, values)
+        return _unpickle, (cls, values, False)
 
     @root_validator(pre=True)
     def _validate_type_field(cls, v):
+        if getattr(cls, Naming.CLASS_DISCRIMINATOR):
+            return v
+        m = metrics.active
+        start = perf_counter() if m is not None else 0.0
         if Naming.TYPE_FIELD_NAME in v:
             v[Naming.TYPE_FIELD_ALIAS] = v.pop(Naming.TYPE_FIELD_NAME)
         if Naming.TYPE_FIELD_ALIAS not in v:
             v[Naming.TYPE_FIELD_ALIAS] = cls.discriminator()
+        if m is not None:
+            m.observe("type_field", v[Naming.TYPE_FIELD_ALIAS], perf_counter() - start)
         return v
 
     @classmethod
     def parse_obj(cls: type[_T], obj: Any) -> _T:
-        obj = cls._enforce_dict_if_root(obj)
-        if not isinstance(obj, dict):
-            try:
-                obj = dict(obj)
-            except (TypeError, ValueError) as e:
-                pass
-        if isinstance(obj, dict) and Naming.TYPE_FIELD_NAME in obj:
-            obj[Naming.TYPE_FIELD_ALIAS] = obj.pop(Naming.TYPE_FIELD_NAME)
-        return super().parse_obj(obj)
+        # type_ is handled by __new__ and _validate_type_field on the kwargs of
+        # cls(**obj), so the caller's mapping is never touched.
+        m = metrics.active
+        deferred = getattr(cls, Naming.DEFERRED_VALIDATION) and isinstance(obj, Mapping)
+        validate = partial(_deferred, cls) if deferred else super().parse_obj
+        cache = getattr(cls, Naming.VALIDATION_CACHE)
+        if m is None:
+            return (
+                validate(obj) if cache is None else cache.validate(cls, obj, validate)
+            )
+        start = perf_counter()
+        result = validate(obj) if cache is None else cache.validate(cls, obj, validate)
+        m.observe("validate", result.type_, perf_counter() - start)
+        return result
+
+    @classmethod
+    def _validate_one(cls: type[_T], data: Any) -> _T:
+        return cls.parse_obj(data)
+
+    @classmethod
+    def validate(cls: type[_T], value: Any) -> _T:
+        # Validator of the fields annotated with the class.
+        deferred = getattr(cls, Naming.DEFERRED_VALIDATION) and isinstance(
+            value, Mapping
+        )
+        validate = partial(_deferred, cls) if deferred else super().validate
+        cache = getattr(cls, Naming.VALIDATION_CACHE)
+        return (
+            validate(value) if cache is None else cache.validate(cls, value, validate)
+        )
+
+    @classmethod
+    def _validate_list(cls: type[_T], records: list[Any]) -> list[_T]:
+        # Same as parse_obj_as, whose global cache would keep the class alive.
+        model = vars(cls).get(Naming.LIST_VALIDATOR)
+        if metrics.active is not None:
+            hit = model is not None
+            metrics.active.count("cache_hit" if hit else "cache_miss", "list_validator")
+        if model is None:
+            model = create_model(
+                f"{cls.__name__}List", __root__=(list[cls], ...)  # type: ignore
+            )
+            setattr(cls, Naming.LIST_VALIDATOR, model)
+        return model(__root__=records).__root__
+
+    @classmethod
+    def _model_fields(cls, model: Any) -> list[tuple[str, str, Any, Any]] | None:
+        if not (isinstance(model, type) and issubclass(model, BaseModel)):
+            return None
+        return [
+            (
+                k,
+                v.alias,
+                v.outer_type_,
+                (
+                    None
+                    if v.required
+                    else default_getter(v.get_default, v.default, v.default_factory)
+                ),
+            )
+            for k, v in model.__fields__.items()
+        ]
+
+    @classmethod
+    def _model_slots(
+        cls, model: type[BaseModel]
+    ) -> tuple[str, tuple[tuple[str, Any], ...]] | None:
+        # Instances are built from their __dict__ and fields set, unless they have
+        # private attributes to initialize.
+        if model.__private_attributes__:
+            return None
+        return "__fields_set__", ()
+
+    @classmethod
+    def _model_constructor(
+        cls, model: type[BaseModel]
+    ) -> Callable[[dict[str, Any], set[str]], Any]:
+        # Same as construct, minus parsing aliases and computing defaults.
+        def construct(values: dict[str, Any], fields_set: set[str]) -> Any:
+            instance = object.__new__(model)
+            _object_setattr(instance, "__dict__", values)
+            _object_setattr(instance, "__fields_set__", fields_set)
+            instance._init_private_attributes()
+            return instance
+
+        return construct
+
+    @classmethod
+    def _column_validator(
+        cls, model: type[BaseModel]
+    ) -> Callable[[dict[str, list[Any]]], dict[str, list[Any]]] | None:
+        # Fields are validated one column at a time by a model of list fields, unless
+        # validators of the model need whole rows.
+        if Naming.COLUMN_VALIDATOR in vars(model):
+            return vars(model)[Naming.COLUMN_VALIDATOR]
+        type_validator = DiscriminatedBaseModel._validate_type_field
+        if (
+            model.__validators__
+            or model.__post_root_validators__
+            or any(
+                v is not getattr(type_validator, "__func__", type_validator)
+                for v in model.__pre_root_validators__
+            )
+            or model.__config__.extra is Extra.allow
+        ):
+            validate = None
+        else:
+            config = type(
+                "Config",
+                (model.__config__,),
+                {"alias_generator": None, "extra": Extra.ignore, "fields": {}},
+            )
+            columns_model = create_model(  # type: ignore
+                f"{model.__name__}Columns",
+                __config__=config,
+                **{
+                    k: (list[v.annotation], None)  # type: ignore
+                    for k, v in model.__fields__.items()
+                    if k != Naming.TYPE_FIELD_NAME
+                },
+            )
+
+            def validate(columns: dict[str, list[Any]]) -> dict[str, list[Any]]:
+                validated = columns_model.parse_obj(columns)
+                return {k: getattr(validated, k) for k in columns}
+
+        setattr(model, Naming.COLUMN_VALIDATOR, validate)
+        return validate
+
+    @classmethod
+    def _validate_into(cls, instance: Any, data: Mapping[str, Any]) -> None:
+        # Pre root validators edit the input in place, like the kwargs of __init__.
+        values, fields_set, error = validate_model(cls, dict(data))
+        if error:
+            raise error
+        _object_setattr(instance, "__dict__", values)
+        _object_setattr(instance, "__fields_set__", fields_set)
+        instance._init_private_attributes()
+
+    @classmethod
+    def _json_schema_defs(
+        cls, models: list[Any], ref_template: str, **kwargs: Any
+    ) -> tuple[str, dict[str, Any], list[str]]:
+        names = get_model_name_map(get_flat_models_from_models(models))
+        definitions = schema(models, ref_template=ref_template, **kwargs)["definitions"]
+        return "definitions", definitions, [names[m] for m in models]
+
+    @classmethod
+    def schema(
+        cls, by_alias: bool = True, ref_template: str = default_ref_template
+    ) -> dict[str, Any]:
+        if not cls.get_registry_recur() and not getattr(cls, Naming.LAZY_INDEX):
+            return super().schema(by_alias, ref_template)
+        return polymorphic_json_schema(cls, ref_template, by_alias=by_alias)
+
+    @classmethod
+    def _split_list_errors(cls, error: ValueError) -> dict[int, list[dict[str, Any]]]:
+        errors: dict[int, list[dict[str, Any]]] = {}
+        if isinstance(error, ValidationError):
+            for e in error.errors():
+                _, position, *loc = e["loc"]  # ("__root__", position, ...)
+                errors.setdefault(position, []).append({**e, "loc": tuple(loc)})
+        return errors
+
+
+def _unpickle(
+    cls: type[DiscriminatedBaseModel], values: dict[str, Any], type_set: bool = True
+) -> DiscriminatedBaseModel:
+    fields_set = set(values)
+    if not type_set:
+        fields_set.discard(Naming.TYPE_FIELD_NAME)
+    instance = object.__new__(cls)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__fields_set__", fields_set)
+    return instance
+
+
+def _timed(method: str) -> Any:
+    base = getattr(BaseModel, method)
+
+    def timed(self: DiscriminatedBaseModel, **kwargs: Any) -> Any:
+        start = perf_counter()
+        result = base(self, **kwargs)
+        if metrics.active is not None:
+            metrics.active.observe("serialize", self.type_, perf_counter() - start)
+        return result
+
+    return timed
+
+
+def _instrument_serialization(enabled: bool) -> None:
+    # Timed methods are only installed while metrics are enabled.
+    for method in ("dict", "json"):
+        if enabled:
+            setattr(DiscriminatedBaseModel, method, _timed(method))
+        elif method in vars(DiscriminatedBaseModel):
+            delattr(DiscriminatedBaseModel, method)
+
+
+metrics.on_toggle(_instrument_serialization)
@@ -1,79 +1,576 @@
 from __future__ import annotations
 
-import warnings
-from collections.abc import MutableMapping
-from typing import Any, TypeVar
+import threading
+from collections.abc import Callable, Iterable, Mapping
+from functools import partial
+from operator import attrgetter
+from time import perf_counter
+from typing import Annotated, Any, ClassVar, TypeVar, get_args
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    Field,
+    GetCoreSchemaHandler,
+    TypeAdapter,
+    ValidationError,
+    create_model,
+)
 from pydantic._internal._model_construction import ModelMetaclass
-from pydantic_core import SchemaSerializer
+from pydantic.json_schema import (
+    DEFAULT_REF_TEMPLATE,
+    GenerateJsonSchema,
+    JsonSchemaMode,
+    models_json_schema,
+)
+from pydantic_core import SchemaValidator, core_schema
 
-from pydantic_discriminator.common import DiscriminatedBase, Naming
+from pydantic_discriminator import metrics
+from pydantic_discriminator.common import (
+    BatchResult,
+    DiscriminatedBase,
+    Discriminators,
+    Naming,
+    check_type_field,
+    const_type,
+    default_getter,
+    install_deferred,
+    polymorphic_json_schema,
+    pop_class_discriminator,
+    pop_deferred,
+    pop_validation_cache,
+    record_type,
+    register,
+    selected,
+)
 
+try:
+    from pydantic_core import from_json
+except ImportError:  # pragma: no cover
+    # pydantic < 2.5, only deferred models parse JSON without validating it.
+    from json import loads as from_json
+
+# Older pydantic-core versions cannot infer the serializer natively, so fall back to
+# the same wrap serializer used by pydantic's own `SerializeAsAny`, which keeps the
+# include and exclude filters of nested fields.
+if "any" in get_args(core_schema.ExpectedSerializationTypes):  # pragma: no cover
+    _POLYMORPHIC_SER_SCHEMA = core_schema.simple_ser_schema("any")
+else:  # pragma: no cover
+    _POLYMORPHIC_SER_SCHEMA = core_schema.wrap_serializer_function_ser_schema(
+        lambda v, handler: handler(v), schema=core_schema.any_schema()
+    )
+
+
+# Methods and attributes of deferred models that read the fields of the instance.
+_DEFERRED_METHODS = (
+    "__eq__",
+    "__hash__",
+    "__iter__",
+    "__repr_args__",
+    "__setattr__",
+    "__copy__",
+    "__deepcopy__",
+    "__getstate__",
+    "__reduce__",
+    "model_dump",
+    "model_dump_json",
+    "model_fields_set",
+)
+
+
+# Named general_wrap_validator_function by older pydantic-core versions.
+_wrap_validator_function = getattr(
+    core_schema,
+    "with_info_wrap_validator_function",
+    getattr(core_schema, "general_wrap_validator_function", None),
+)
+
+_NON_SCHEMA_KEYS = frozenset({"cls", "config", "default", "metadata", "serialization"})
+
+# The serializers of the schemas of discriminated models, by ref, for the schemas of
+# other models nesting them.
+_REFS: dict[str, Any] = {}
+
+
+def _ser_schema(cls: type[BaseModel]) -> Any:
+    # Deferred instances are validated before being serialized.
+    if getattr(cls, Naming.DEFERRED_VALIDATION):
+        return core_schema.wrap_serializer_function_ser_schema(
+            _dump_deferred, schema=core_schema.any_schema()
+        )
+    return _POLYMORPHIC_SER_SCHEMA
+
+
+def _polymorphic(schema: Any, ser_schema: Any) -> Any:
+    # Fields annotated with a discriminated model serialize the actual subclass, with
+    # the serializer of the instance. pydantic 2.0 reuses the definition of a model for
+    # later fields annotated with it, so the definition itself is polymorphic unless
+    # the model refers to itself.
+    if schema["type"] == "definitions":
+        inner, definitions = schema["schema"], list(schema["definitions"])
+        if inner["type"] == "definition-ref" and "serialization" not in inner:
+            ref = inner["schema_ref"]
+            i = next((i for i, d in enumerate(definitions) if d["ref"] == ref), None)
+            if i is not None and not _references(definitions, ref):
+                inner = definitions.pop(i)
+        inner = _polymorphic(inner, ser_schema)
+        return (
+            core_schema.definitions_schema(inner, definitions) if definitions else inner
+        )
+    if "serialization" in schema:
+        return schema
+    return {**schema, "serialization": ser_schema}
 
-class DiscriminatedMeta(ModelMetaclass):
-    def __new__(cls, name, bases, namespace, **kwargs):
-        discriminator = kwargs.pop(Naming.DISCRIMINATOR_KWARG, name.lower())
-        new_cls = super().__new__(cls, name, bases, namespace, **kwargs)
-        setattr(new_cls, Naming.REGISTRY, {})
-        setattr(new_cls, Naming.DISCRIMINATOR, discriminator)
-        for base in bases:
-            if hasattr(base, Naming.REGISTRY):
-                getattr(base, Naming.REGISTRY)[discriminator] = new_cls
-        return new_cls
+
+def _nest_polymorphic(schema: Any, ref: str | None) -> Any:
+    # Discriminated models nested in the schema of a model, apart from the model itself,
+    # are polymorphic even if they were not complete when the schema was generated.
+    if isinstance(schema, list):
+        return [_nest_polymorphic(item, ref) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    schema = {
+        k: v if k in _NON_SCHEMA_KEYS else _nest_polymorphic(v, ref)
+        for k, v in schema.items()
+    }
+    if schema.get("type") == "model":
+        if isinstance(schema["cls"], DiscriminatedMeta) and schema.get("ref") != ref:
+            return _polymorphic(schema, _ser_schema(schema["cls"]))
+    elif schema.get("type") == "definition-ref" and schema["schema_ref"] in _REFS:
+        return _polymorphic(schema, _REFS[schema["schema_ref"]])
+    return schema
+
+
+def _with_type_field(schema: Any) -> Any:
+    #! The type_ field is dumped by a computed type field, so its key does not depend
+    #! on by_alias. Model validators and root validators wrap the fields schema.
+    if schema["type"] != "model-fields":
+        return {**schema, "schema": _with_type_field(schema["schema"])}
+    fields = dict(schema["fields"])
+    if Naming.TYPE_FIELD_NAME in fields:
+        fields[Naming.TYPE_FIELD_NAME] = {
+            **fields[Naming.TYPE_FIELD_NAME],
+            "serialization_exclude": True,
+        }
+    computed_fields = [
+        core_schema.computed_field(Naming.TYPE_FIELD_ALIAS, core_schema.str_schema()),
+        *schema.get("computed_fields", []),
+    ]
+    return {**schema, "fields": fields, "computed_fields": computed_fields}
+
+
+def _own_schema(cls: type[BaseModel], schema: Any) -> Any:
+    # The schema of a class, from which pydantic builds its validator and serializer.
+    definitions = None
+    if schema["type"] == "definitions":
+        definitions, schema = schema["definitions"], schema["schema"]
+    ref = _model_ref(schema)
+    if ref is not None:
+        _REFS[ref] = _ser_schema(cls)
+    if schema["type"] == "definition-ref":
+        definitions = [
+            _with_type_field(d) if d["ref"] == ref else d for d in definitions or []
+        ]
+    else:
+        schema = _with_type_field(schema)
+    if definitions is not None:
+        schema = core_schema.definitions_schema(schema, definitions)
+    return _nest_polymorphic(schema, ref)
 
 
 _T = TypeVar("_T", bound="DiscriminatedBaseModel")
+_object_setattr = object.__setattr__
+
+
+def _resolve(cls: type[_T], data: Mapping[str, Any]) -> type[_T]:
+    m = metrics.active
+    start = perf_counter() if m is not None else 0.0
+    type_ = data.get(
+        Naming.TYPE_FIELD_ALIAS, data.get(Naming.TYPE_FIELD_NAME, cls.discriminator())
+    )
+    other_cls = cls if cls.discriminator() == type_ else cls.get_subclass(type_)
+    if other_cls is None:
+        if m is not None:
+            m.count("unknown", type_)
+        raise ValueError(f"Unknown discriminator {type_} for {cls}")
+    if m is not None:
+        m.observe("dispatch", type_, perf_counter() - start)
+    return other_cls  # type: ignore
+
+
+def _deferred(cls: type[_T], data: Mapping[str, Any]) -> _T:
+    # Only the subclass is resolved, the data is validated when first needed.
+    other_cls = _resolve(cls, data)
+    if not getattr(other_cls, Naming.DEFERRED_VALIDATION):
+        return other_cls.model_validate(data)
+    values: dict[str, Any] = {Naming.RAW_DATA: data}
+    if not getattr(other_cls, Naming.CLASS_DISCRIMINATOR):
+        values[Naming.TYPE_FIELD_NAME] = other_cls.discriminator()
+    instance = object.__new__(other_cls)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__pydantic_fields_set__", set())
+    _object_setattr(instance, "__pydantic_extra__", None)
+    _object_setattr(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _validate_deferred(cls: type[_T], value: Any, handler: Callable[[Any], Any]) -> Any:
+    if isinstance(value, Mapping):
+        return _deferred(cls, value)
+    return handler(value)
+
+
+def _validate_cached(
+    cls: type[_T],
+    value: Any,
+    handler: Callable[[Any], Any],
+    info: core_schema.ValidationInfo,
+) -> Any:
+    #! Cached instances were validated without a context. The strict flag of a nested
+    #! validation is not visible here, so data that is only valid in lax mode is
+    #! validated again on every hit.
+    if info.context is not None or (info.config or {}).get("strict"):
+        return handler(value)
+    return getattr(cls, Naming.VALIDATION_CACHE).validate(
+        cls, value, handler, partial(_valid_strict, cls)
+    )
+
+
+def _valid_strict(cls: type[_T], value: Any) -> bool:
+    try:
+        _validate_python(cls, value, strict=True)
+    except ValidationError:
+        return False
+    return True
+
+
+def _validate_python(
+    cls: type[_T],
+    obj: Any,
+    strict: bool | None = None,
+    from_attributes: bool | None = None,
+    context: dict[str, Any] | None = None,
+) -> _T:
+    if getattr(cls, Naming.DEFERRED_VALIDATION) and isinstance(obj, Mapping):
+        return _deferred(cls, obj)
+    if getattr(cls, Naming.TAGGED_UNION):
+        return _tagged_union(cls)[2].validate_python(
+            obj, strict=strict, from_attributes=from_attributes, context=context
+        )
+    # type_ is accepted by the validation alias of the field itself.
+    return super(DiscriminatedBaseModel, cls).model_validate(  # type: ignore
+        obj, strict=strict, from_attributes=from_attributes, context=context
+    )
+
+
+def _dump_deferred(value: Any, handler: Callable[[Any], Any]) -> Any:
+    if isinstance(value, DiscriminatedBase):
+        value.materialize()
+    return handler(value)
+
+
+def _discriminator(cls: type[DiscriminatedBaseModel]) -> Callable[[Any], Any]:
+    own = cls.discriminator()
+    alias, name = Naming.TYPE_FIELD_ALIAS, Naming.TYPE_FIELD_NAME
+
+    def discriminate(value: Any) -> Any:
+        # Records without a type are validated as the class itself, as in default mode.
+        if type(value) is dict or isinstance(value, Mapping):
+            tag = value[alias] if alias in value else value.get(name, own)
+        else:
+            tag = getattr(value, name, own)
+        return tag if isinstance(tag, str) else None
+
+    # Named after the field in the errors of records without a valid type.
+    discriminate.__name__ = Naming.TYPE_FIELD_ALIAS
+    return discriminate
+
+
+def _validate_current(
+    cls: type[DiscriminatedBaseModel],
+    index: Mapping[str, Any],
+    strict: bool | None,
+    value: Any,
+    handler: Callable[[Any], Any],
+    info: core_schema.ValidationInfo,
+) -> Any:
+    if getattr(cls, Naming.INDEX) is index and not getattr(cls, Naming.LAZY_INDEX):
+        return handler(value)
+    return _tagged_union(cls)[2].validate_python(
+        value, strict=strict, context=info.context
+    )
+
+
+def _handing_over(
+    cls: type[DiscriminatedBaseModel], index: Mapping[str, Any], schema: Any, ref: str
+) -> Any:
+    #! Validators built before the registry changed, e.g. those of containers, hand
+    #! over to the current union. Validators only see the strict mode of a call
+    #! through the branch it picks, so both branches refer to the same union.
+    union = core_schema.definition_reference_schema(ref)
+    return core_schema.definitions_schema(
+        core_schema.lax_or_strict_schema(
+            lax_schema=_wrap_validator_function(
+                partial(_validate_current, cls, index, None), union
+            ),
+            strict_schema=_wrap_validator_function(
+                partial(_validate_current, cls, index, True), union
+            ),
+        ),
+        [{**schema, "ref": ref}],
+    )
+
+
+# The classes whose union is being described in the JSON schema of a field, by thread,
+# since their subclasses may have fields annotated with them.
+_json_unions = threading.local()
+
+
+def _own_json_ref(ref: str) -> str:
+    # Still ends with ":<id>", and named apart from the union taking the model's ref.
+    name, _, id_ = ref.rpartition(":")
+    return f"{name}Base:{id_}"
+
+
+def _json_choice(cls: type[DiscriminatedBaseModel]) -> Any:
+    # The schema of a class on its own, for the JSON schema of a union. Unions of the
+    # subclasses of a class take its ref, so then the class is described under another.
+    schema = cls.__pydantic_core_schema__
+    if not cls.get_registry_recur():
+        return schema
+    definitions = []
+    if schema["type"] == "definitions":
+        definitions, schema = schema["definitions"], schema["schema"]
+        if schema["type"] == "definition-ref":
+            ref = schema["schema_ref"]
+            schema = next(d for d in definitions if d["ref"] == ref)
+    schema = {**schema, "ref": _own_json_ref(schema["ref"])}
+    return (
+        core_schema.definitions_schema(schema, definitions) if definitions else schema
+    )
 
 
-old_to_python = SchemaSerializer.to_python
+def _field_json_schema(
+    cls: type[DiscriminatedBaseModel], schema: Any, handler: Any
+) -> Any:
+    #! Fields annotated with a class with subclasses accept any of them, so like the
+    #! class itself they are described as one of the schemas of all of them, picked by
+    #! the OpenAPI discriminator.
+    in_progress = vars(_json_unions).setdefault("classes", set())
+    if cls in in_progress and "ref" in schema:
+        # A placeholder for the definition of the ref, until the union replaces it.
+        return {}
+    cls.load_lazy()
+    if cls in in_progress or not cls.get_registry_recur():
+        return handler(schema)
+    in_progress.add(cls)
+    try:
+        classes = (cls, *cls.get_registry_recur().values())
+        # Generated as a whole, so that each schema gets a definition of its own.
+        generate = handler.generate_json_schema.generate_inner
+        refs = [generate(_json_choice(sub))["$ref"] for sub in classes]
+    finally:
+        in_progress.discard(cls)
+    alias, name = Naming.TYPE_FIELD_ALIAS, Naming.TYPE_FIELD_NAME
+    properties = handler.resolve_ref_schema({"$ref": refs[0]}).get("properties", {})
+    type_key = name if name in properties and alias not in properties else alias
+    mapping = {}
+    for sub, ref in zip(classes, refs):
+        definition = handler.resolve_ref_schema({"$ref": ref})
+        definition.update(const_type(definition, type_key, sub.discriminator()))
+        mapping[sub.discriminator()] = ref
+    return {
+        "oneOf": [{"$ref": ref} for ref in refs],
+        "discriminator": {"propertyName": type_key, "mapping": mapping},
+    }
 
 
-def _new_to_python(ss_self, v_self, *args, **kwargs):
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        res = old_to_python(ss_self, v_self, *args, **kwargs)
+def _with_field_json_schema(cls: type[DiscriminatedBaseModel], schema: Any) -> Any:
+    metadata = schema.get("metadata") or {}
+    functions = [
+        *metadata.get("pydantic_js_functions", ()),
+        partial(_field_json_schema, cls),
+    ]
+    return {**schema, "metadata": {**metadata, "pydantic_js_functions": functions}}
 
-    if isinstance(v_self, BaseModel):
-        for k in v_self.model_fields.keys():
-            fval = getattr(v_self, k)
-            res[k] = _new_to_python(ss_self, fval, *args, **kwargs)
-    if isinstance(res, dict):
-        if Naming.TYPE_FIELD_NAME in res:
-            res[Naming.TYPE_FIELD_ALIAS] = res.pop(Naming.TYPE_FIELD_NAME)
-        for k, v in res.items():
-            res[k] = _new_to_python(ss_self, v, *args, **kwargs)
-    elif isinstance(res, list):
-        for i, v in enumerate(res):
-            res[i] = _new_to_python(ss_self, v, *args, **kwargs)
-    elif isinstance(res, tuple):
-        res = tuple(_new_to_python(ss_self, v, *args, **kwargs) for v in res)
 
-    return res
+def _model_ref(schema: Any) -> str | None:
+    # The ref pydantic gives the schema of a model, and then reuses for the model.
+    if schema["type"] == "definitions":
+        schema = schema["schema"]
+    return schema.get("ref", schema.get("schema_ref"))
 
 
-if SchemaSerializer.to_python is not _new_to_python:  # pragma: no branch
-    setattr(SchemaSerializer, "to_python", _new_to_python)
+def _references(schema: Any, ref: str) -> bool:
+    if isinstance(schema, list):
+        return any(_references(x, ref) for x in schema)
+    if not isinstance(schema, dict):
+        return False
+    if schema.get("type") == "definition-ref" and schema.get("schema_ref") == ref:
+        return True
+    return any(
+        _references(v, ref) for k, v in schema.items() if k not in _NON_SCHEMA_KEYS
+    )
+
+
+def _discriminated_ref(ref: str) -> str:
+    # Still ends with ":<id>", which pydantic strips when naming JSON schema defs.
+    name, _, id_ = ref.rpartition(":")
+    return f"{name}:discriminated-{id_}"
+
+
+def _union_ref(ref: str) -> str:
+    name, _, id_ = ref.rpartition(":")
+    return f"{name}:union-{id_}"
+
+
+def _inline(schema: Any) -> tuple[Any, list[Any]]:
+    #! pydantic 2.0 reuses any schema carrying the ref of a model for later fields
+    #! annotated with the model, so unions embedding the schema of a model would be
+    #! bypassed by every field but the first one. Unless the model refers to itself,
+    #! its schema is embedded under another ref, and the union takes the model's ref.
+    definitions: list[Any] = []
+    if schema["type"] == "definitions":
+        definitions = list(schema["definitions"])
+        schema = schema["schema"]
+        if schema["type"] == "definition-ref":
+            ref = schema["schema_ref"]
+            i = next((i for i, d in enumerate(definitions) if d["ref"] == ref), None)
+            if i is not None and not _references(definitions, ref):
+                schema = {**definitions.pop(i), "ref": _discriminated_ref(ref)}
+    elif "ref" in schema and not _references(schema, schema["ref"]):
+        schema = {**schema, "ref": _discriminated_ref(schema["ref"])}
+    return schema, definitions
+
+
+def _tagged_union(
+    cls: type[DiscriminatedBaseModel],
+) -> tuple[Mapping[str, Any], Any, SchemaValidator]:
+    # Built lazily from the registry and rebuilt whenever the index changes. Validators
+    # built before, e.g. those of containers, hand over to the current one.
+    cached = vars(cls).get(Naming.TAGGED_UNION_CACHE)
+    hit = (
+        cached is not None
+        and cached[0] is getattr(cls, Naming.INDEX)
+        and not getattr(cls, Naming.LAZY_INDEX)
+    )
+    if metrics.active is not None:
+        metrics.active.count("cache_hit" if hit else "cache_miss", "tagged_union")
+    if hit:
+        return cached
+
+    # pydantic-core needs every choice upfront, so lazy subclasses are imported here.
+    cls.load_lazy()
+
+    index = getattr(cls, Naming.INDEX)
+    choices: dict[str, Any] = {}
+    definitions: dict[str, Any] = {}
+    for sub in (cls, *index.values()):
+        schema, sub_definitions = _inline(sub.__pydantic_core_schema__)
+        definitions.update((d["ref"], d) for d in sub_definitions)
+        choices[sub.discriminator()] = schema
+    expected = ", ".join(repr(tag) for tag in choices)
+    schema = core_schema.tagged_union_schema(
+        choices,
+        _discriminator(cls),
+        custom_error_type="discriminator_invalid",
+        custom_error_message="Input {discriminator} should be one of {expected_tags}",
+        custom_error_context={
+            "discriminator": f"'{Naming.TYPE_FIELD_ALIAS}'",
+            "expected_tags": expected,
+        },
+        from_attributes=True,
+        serialization=_ser_schema(cls),
+    )
+    if definitions:
+        schema = core_schema.definitions_schema(schema, list(definitions.values()))
+    cached = (index, schema, SchemaValidator(schema, {"title": cls.__name__}))
+    setattr(cls, Naming.TAGGED_UNION_CACHE, cached)
+    return cached
+
+
+class DiscriminatedMeta(ModelMetaclass):
+    def __new__(cls, name, bases, namespace, **kwargs):
+        discriminator = kwargs.pop(Naming.DISCRIMINATOR_KWARG, name.lower())
+        tagged_union = kwargs.pop(
+            Naming.TAGGED_UNION_KWARG,
+            any(getattr(b, Naming.TAGGED_UNION, False) for b in bases),
+        )
+        class_discriminator = pop_class_discriminator(bases, kwargs)
+        replace = kwargs.pop(Naming.REPLACE_KWARG, False)
+        # The namespace and its annotations may be shared with other classes, e.g. by
+        # type(), so the type field is added to copies.
+        namespace = {
+            **namespace,
+            "__annotations__": dict(namespace.get("__annotations__", {})),
+        }
+        deferred = pop_deferred(bases, kwargs)
+        # Read while pydantic generates the schema of the class.
+        namespace[Naming.DEFERRED_VALIDATION] = deferred
+        cache = pop_validation_cache(bases, kwargs)
+        check_type_field(name, bases, namespace)
+        if class_discriminator:
+            #! The discriminator is a class constant, dumped by the computed type field
+            #! of the serializer and ignored on input like any other extra key.
+            namespace["__annotations__"][Naming.TYPE_FIELD_NAME] = ClassVar[str]
+            namespace[Naming.TYPE_FIELD_NAME] = discriminator
+        else:
+            namespace["__annotations__"][Naming.TYPE_FIELD_NAME] = str
+            namespace[Naming.TYPE_FIELD_NAME] = Field(
+                discriminator,
+                alias=Naming.TYPE_FIELD_ALIAS,
+                validation_alias=AliasChoices(
+                    Naming.TYPE_FIELD_ALIAS, Naming.TYPE_FIELD_NAME
+                ),
+                description="The type of model.",
+            )
+        if tagged_union:
+            #! Tagged unions dispatch in pydantic-core, which can then build instances
+            #! without calling back into the condemned __new__ and __init__.
+            namespace.setdefault("__new__", object.__new__)
+            namespace.setdefault("__init__", BaseModel.__init__)
+        new_cls = super().__new__(cls, name, bases, namespace, **kwargs)
+        setattr(new_cls, Naming.TAGGED_UNION, tagged_union)
+        setattr(new_cls, Naming.CLASS_DISCRIMINATOR, class_discriminator)
+        setattr(new_cls, Naming.DEFERRED_VALIDATION, deferred)
+        setattr(new_cls, Naming.VALIDATION_CACHE, cache)
+        if cache is not None and not new_cls.model_config.get("frozen"):
+            raise TypeError(f"{name} shares cached instances, so it must be frozen")
+        if deferred:
+            install_deferred(new_cls, _DEFERRED_METHODS)
+        if class_discriminator and new_cls.model_config.get("extra") not in (
+            None,
+            "ignore",
+        ):
+            raise TypeError(
+                f"{name} has a class discriminator, so it must ignore extra keys"
+            )
+        # Other threads can dispatch to the class as soon as it is registered.
+        register(new_cls, bases, discriminator, replace)
+        return new_cls
+
+    def __call__(cls, *args, **kwargs):
+        if not getattr(cls, Naming.TAGGED_UNION):
+            return super().__call__(*args, **kwargs)
+        other_cls = _resolve(cls, kwargs)
+        instance = other_cls.__new__(other_cls)
+        instance.__init__(*args, **kwargs)
+        return instance
 
 
 class DiscriminatedBaseModel(
     BaseModel, DiscriminatedBase[BaseModel], metaclass=DiscriminatedMeta
 ):
-    type_: str = Field(alias=Naming.TYPE_FIELD_ALIAS, description="The type of model.")
+    type_: str
 
     def __new__(cls: type[_T], *args, **kwargs) -> _T:
-        if Naming.TYPE_FIELD_ALIAS not in kwargs:
-            kwargs[Naming.TYPE_FIELD_ALIAS] = cls.discriminator()
-        type_ = kwargs[Naming.TYPE_FIELD_ALIAS]
-        if cls.discriminator() == type_:
-            return super().__new__(cls)  # type: ignore
-        registry = cls.get_registry_recur()
-        if kwargs[Naming.TYPE_FIELD_ALIAS] not in registry:
-            raise ValueError(
-                f"Unknown discriminator {kwargs[Naming.TYPE_FIELD_ALIAS]} for {cls}"
-            )
-        other_cls = registry[kwargs[Naming.TYPE_FIELD_ALIAS]]
-        return other_cls.__new__(other_cls, *args, **kwargs)  # type: ignore
+        other_cls = _resolve(cls, kwargs)
+        # The flat index already resolved the final class, so unless it redefines
+        # __new__ there is no need to dispatch again.
+        if other_cls.__new__ is DiscriminatedBaseModel.__new__:
+            return super().__new__(other_cls)  # type: ignore
+        return other_cls.__new__(other_cls, *args, **kwargs)
 
     #! If the __new__ is called in rust, the redefined __new__ will not be called.
     #! But by simply adding a no-op constructor, the __new__ will be called as expected.
@@ -81,14 +578,6 @@ class DiscriminatedBaseModel(
     def __init__(self, **data: Any) -> None:
         super().__init__(**data)
 
-    @model_validator(mode="before")
-    def _validate_type_field(cls, v):
-        if Naming.TYPE_FIELD_NAME in v:
-            v[Naming.TYPE_FIELD_ALIAS] = v.pop(Naming.TYPE_FIELD_NAME)
-        if Naming.TYPE_FIELD_ALIAS not in v:
-            v[Naming.TYPE_FIELD_ALIAS] = cls.discriminator()
-        return v
-
     @classmethod
     def model_validate(
         cls: type[_T],
@@ -98,8 +587,370 @@ class DiscriminatedBaseModel(
         from_attributes: bool | None = None,
         context: dict[str, Any] | None = None,
     ) -> _T:
-        if isinstance(obj, MutableMapping) and Naming.TYPE_FIELD_NAME in obj:
-            obj[Naming.TYPE_FIELD_ALIAS] = obj.pop(Naming.TYPE_FIELD_NAME)
-        return super().model_validate(
-            obj, strict=strict, from_attributes=from_attributes, context=context
+        m = metrics.active
+        start = perf_counter() if m is not None else 0.0
+        cache = getattr(cls, Naming.VALIDATION_CACHE)
+        if (
+            cache is not None
+            and strict is None
+            and from_attributes is None
+            and context is None
+        ):
+            result = cache.validate(cls, obj, partial(_validate_python, cls))
+        else:
+            result = _validate_python(cls, obj, strict, from_attributes, context)
+        if m is not None:
+            m.observe("validate", result.type_, perf_counter() - start)
+        return result
+
+    @classmethod
+    def model_validate_json(
+        cls: type[_T],
+        json_data: str | bytes | bytearray,
+        *,
+        strict: bool | None = None,
+        context: dict[str, Any] | None = None,
+    ) -> _T:
+        if getattr(cls, Naming.DEFERRED_VALIDATION):
+            return cls.model_validate(from_json(json_data), context=context)
+        if getattr(cls, Naming.TAGGED_UNION):
+            return _tagged_union(cls)[2].validate_json(
+                json_data, strict=strict, context=context
+            )
+        return super().model_validate_json(json_data, strict=strict, context=context)
+
+    @classmethod
+    def validate_many(
+        cls: type[_T],
+        records: Iterable[Any],
+        *,
+        include: Discriminators = None,
+        exclude: Discriminators = None,
+    ) -> BatchResult[_T]:
+        if not getattr(cls, Naming.TAGGED_UNION):
+            return super().validate_many(records, include=include, exclude=exclude)
+        # The tagged union already groups records by discriminator in pydantic-core.
+        records = list(records)
+        result: BatchResult[_T] = BatchResult([None] * len(records))
+        positions = list(range(len(records)))
+        if include is not None or exclude:
+            positions = [
+                i
+                for i in positions
+                if selected(record_type(cls, records[i]), include, exclude)
+            ]
+        cls._validate_group(records, positions, result)
+        return result
+
+    @classmethod
+    def _validate_one(cls: type[_T], data: Any) -> _T:
+        return cls.model_validate(data)
+
+    @classmethod
+    def _validate_list(cls: type[_T], records: list[Any]) -> list[_T]:
+        adapter = vars(cls).get(Naming.LIST_VALIDATOR)
+        if metrics.active is not None:
+            hit = adapter is not None
+            metrics.active.count("cache_hit" if hit else "cache_miss", "list_validator")
+        if adapter is None:
+            if getattr(cls, Naming.TAGGED_UNION) and not (
+                getattr(cls, Naming.DEFERRED_VALIDATION)
+                or getattr(cls, Naming.VALIDATION_CACHE) is not None
+            ):
+                # Dropped whenever the registry changes, so the union is never stale.
+                adapter = SchemaValidator(
+                    core_schema.list_schema(_tagged_union(cls)[1]),
+                    {"title": f"list[{cls.__name__}]"},
+                )
+            else:
+                adapter = TypeAdapter(list[cls])  # type: ignore
+            setattr(cls, Naming.LIST_VALIDATOR, adapter)
+        return adapter.validate_python(records)
+
+    @classmethod
+    def _model_fields(cls, model: Any) -> list[tuple[str, str, Any, Any]] | None:
+        if not (isinstance(model, type) and issubclass(model, BaseModel)):
+            return None
+        return [
+            (
+                k,
+                v.alias or k,
+                v.annotation,
+                (
+                    None
+                    if v.is_required()
+                    else default_getter(
+                        partial(v.get_default, call_default_factory=True),
+                        v.default,
+                        v.default_factory,
+                    )
+                ),
+            )
+            for k, v in model.model_fields.items()
+        ]
+
+    @classmethod
+    def _model_slots(
+        cls, model: type[BaseModel]
+    ) -> tuple[str, tuple[tuple[str, Any], ...]] | None:
+        # Instances are built from their __dict__ and fields set, with no extra fields
+        # nor private attributes, unless the model may need them.
+        if (
+            model.__private_attributes__
+            or model.__pydantic_post_init__
+            or model.model_config.get("extra") == "allow"
+        ):
+            return None
+        return "__pydantic_fields_set__", (
+            ("__pydantic_extra__", None),
+            ("__pydantic_private__", None),
+        )
+
+    @classmethod
+    def _model_constructor(
+        cls, model: type[BaseModel]
+    ) -> Callable[[dict[str, Any], set[str]], Any]:
+        if model.__private_attributes__ or model.__pydantic_post_init__:
+            return lambda values, fields_set: model.model_construct(
+                fields_set, **values
+            )
+        extra_allowed = model.model_config.get("extra") == "allow"
+
+        # Same as model_construct, minus parsing aliases and computing defaults.
+        def construct(values: dict[str, Any], fields_set: set[str]) -> Any:
+            instance = object.__new__(model)
+            _object_setattr(instance, "__dict__", values)
+            _object_setattr(instance, "__pydantic_fields_set__", fields_set)
+            _object_setattr(
+                instance, "__pydantic_extra__", {} if extra_allowed else None
+            )
+            _object_setattr(instance, "__pydantic_private__", None)
+            return instance
+
+        return construct
+
+    @classmethod
+    def _column_validator(
+        cls, model: type[BaseModel]
+    ) -> Callable[[dict[str, list[Any]]], dict[str, list[Any]]] | None:
+        # Fields are validated one column at a time by a model of list fields, unless
+        # validators of the model need whole rows.
+        if Naming.COLUMN_VALIDATOR in vars(model):
+            return vars(model)[Naming.COLUMN_VALIDATOR]
+        decorators = model.__pydantic_decorators__
+        if (
+            decorators.validators
+            or decorators.field_validators
+            or decorators.root_validators
+            or decorators.model_validators
+            or model.model_config.get("extra") == "allow"
+        ):
+            validate = None
+        else:
+            config = {
+                k: v
+                for k, v in model.model_config.items()
+                if k not in ("alias_generator", "extra", "title", "json_schema_extra")
+            }
+            columns_model = create_model(  # type: ignore
+                f"{model.__name__}Columns",
+                __config__=ConfigDict(**config),  # type: ignore
+                **{
+                    k: (
+                        list[
+                            (
+                                Annotated[(v.annotation, *v.metadata)]  # type: ignore
+                                if v.metadata
+                                else v.annotation
+                            )
+                        ],
+                        None,
+                    )
+                    for k, v in model.model_fields.items()
+                    if k != Naming.TYPE_FIELD_NAME
+                },
+            )
+
+            def validate(columns: dict[str, list[Any]]) -> dict[str, list[Any]]:
+                validated = columns_model.model_validate(columns)
+                return {k: getattr(validated, k) for k in columns}
+
+        setattr(model, Naming.COLUMN_VALIDATOR, validate)
+        return validate
+
+    @classmethod
+    def _validate_into(cls, instance: Any, data: Mapping[str, Any]) -> None:
+        cls.__pydantic_validator__.validate_python(data, self_instance=instance)
+
+    @classmethod
+    def _json_schema_defs(
+        cls, models: list[Any], ref_template: str, **kwargs: Any
+    ) -> tuple[str, dict[str, Any], list[str]]:
+        mode = kwargs.pop("mode", "validation")
+        refs, schema = models_json_schema(
+            [(m, mode) for m in models], ref_template=ref_template, **kwargs
         )
+        prefix, _, suffix = ref_template.partition("{model}")
+        names = [refs[(m, mode)]["$ref"][len(prefix) :] for m in models]
+        names = [x[: len(x) - len(suffix)] for x in names]
+        return "$defs", schema["$defs"], names
+
+    @classmethod
+    def model_json_schema(
+        cls,
+        by_alias: bool = True,
+        ref_template: str = DEFAULT_REF_TEMPLATE,
+        schema_generator: type[GenerateJsonSchema] = GenerateJsonSchema,
+        mode: JsonSchemaMode = "validation",
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        if not cls.get_registry_recur() and not getattr(cls, Naming.LAZY_INDEX):
+            return super().model_json_schema(
+                by_alias, ref_template, schema_generator, mode, **kwargs
+            )
+        return polymorphic_json_schema(
+            cls,
+            ref_template,
+            by_alias=by_alias,
+            schema_generator=schema_generator,
+            mode=mode,
+            **kwargs,
+        )
+
+    @classmethod
+    def _split_list_errors(
+        cls, error: ValueError
+    ) -> dict[int, list[dict[str, Any]]] | None:
+        errors: dict[int, list[dict[str, Any]]] = {}
+        if isinstance(error, ValidationError):
+            for e in error.errors():
+                # pydantic < 2.5 may drop the position of errors raised in validators.
+                if not e["loc"] or not isinstance(e["loc"][0], int):
+                    return None
+                position, *loc = e["loc"]
+                errors.setdefault(position, []).append({**e, "loc": tuple(loc)})
+        return errors
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: type[BaseModel], handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        if not vars(cls).get("__pydantic_complete__", False):
+            return _own_schema(cls, handler(source))
+        tagged = getattr(cls, Naming.TAGGED_UNION)
+        deferred = getattr(cls, Naming.DEFERRED_VALIDATION)
+        cache = getattr(cls, Naming.VALIDATION_CACHE)
+        if not (tagged or deferred or cache is not None):
+            schema = _polymorphic(cls.__pydantic_core_schema__, _ser_schema(cls))
+            return _with_field_json_schema(cls, schema)
+        ref = _model_ref(cls.__pydantic_core_schema__)
+        if tagged:
+            index, schema, _ = _tagged_union(cls)
+            definitions = []
+            if schema["type"] == "definitions":
+                schema, definitions = schema["schema"], list(schema["definitions"])
+            schema = _handing_over(cls, index, schema, _union_ref(ref))
+            schema, definitions = schema["schema"], [
+                *definitions,
+                *schema["definitions"],
+            ]
+        else:
+            schema, definitions = _inline(cls.__pydantic_core_schema__)
+        if deferred:
+            #! Nested mappings become deferred instances of the resolved subclass,
+            #! which are validated before dumping. The inner schema still gives the
+            #! JSON schema.
+            schema = core_schema.no_info_wrap_validator_function(
+                partial(_validate_deferred, cls),
+                schema,
+                serialization=_ser_schema(cls),
+            )
+        if cache is not None:
+            # Nested mappings are looked up in the cache before being validated.
+            schema = _wrap_validator_function(partial(_validate_cached, cls), schema)
+        if ref is not None:
+            schema = {**schema, "ref": ref}
+        if definitions:
+            schema = core_schema.definitions_schema(schema, definitions)
+        return _with_field_json_schema(cls, _polymorphic(schema, _ser_schema(cls)))
+
+    @classmethod
+    def model_rebuild(
+        cls,
+        *,
+        force: bool = False,
+        raise_errors: bool = True,
+        _parent_namespace_depth: int = 2,
+        _types_namespace: Any = None,
+    ) -> bool | None:
+        rebuilt = super().model_rebuild(
+            force=force,
+            raise_errors=raise_errors,
+            _parent_namespace_depth=_parent_namespace_depth + 1,
+            _types_namespace=_types_namespace,
+        )
+        return rebuilt
+
+    def __reduce__(self) -> Any:
+        # Pickled as the class and the field values, which skips both dispatch and
+        # validation when unpickling. Anything unusual uses pydantic's own state.
+        cls, values = type(self), self.__dict__
+        fields_set = self.__pydantic_fields_set__
+        type_set = Naming.TYPE_FIELD_NAME in fields_set or (
+            Naming.TYPE_FIELD_NAME not in values
+        )
+        if (
+            self.__pydantic_extra__
+            or self.__pydantic_private__
+            or len(fields_set) + (not type_set) != len(values)
+        ):
+            return object.__new__, (cls,), self.__getstate__()
+        if type_set:
+            return _unpickle, (cls, values)
+        return _unpickle, (cls, values, False)
+
+    #! Read by the computed type field of the serializer, without calling into Python.
+    #! The key of a computed field only follows its alias with by_alias on pydantic
+    #! 2.11 and later, so the property is named after the key.
+    type = property(attrgetter(Naming.TYPE_FIELD_NAME))
+
+
+def _unpickle(
+    cls: type[DiscriminatedBaseModel], values: dict[str, Any], type_set: bool = True
+) -> DiscriminatedBaseModel:
+    fields_set = set(values)
+    if not type_set:
+        fields_set.discard(Naming.TYPE_FIELD_NAME)
+    instance = object.__new__(cls)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__pydantic_fields_set__", fields_set)
+    extra_allowed = cls.model_config.get("extra") == "allow"
+    _object_setattr(instance, "__pydantic_extra__", {} if extra_allowed else None)
+    _object_setattr(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _timed(method: str) -> Any:
+    base = getattr(BaseModel, method)
+
+    def timed(self: DiscriminatedBaseModel, **kwargs: Any) -> Any:
+        start = perf_counter()
+        result = base(self, **kwargs)
+        if metrics.active is not None:
+            metrics.active.observe("serialize", self.type_, perf_counter() - start)
+        return result
+
+    return timed
+
+
+def _instrument_serialization(enabled: bool) -> None:
+    #! Serialization is entirely native, so the timed methods are only installed while
+    #! metrics are enabled and do not cost anything otherwise.
+    for method in ("model_dump", "model_dump_json"):
+        if enabled:
+            setattr(DiscriminatedBaseModel, method, _timed(method))
+        elif method in vars(DiscriminatedBaseModel):
+            delattr(DiscriminatedBaseModel, method)
+
+
+metrics.on_toggle(_instrument_serialization)
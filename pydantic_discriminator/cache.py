@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional, Union, get_args, get_origin
+
+import pydantic
+
+from pydantic_discriminator.common import DiscriminatedBase
+
+# Bumped whenever the layout of cache files changes.
+CACHE_FORMAT = 2
+
+# Modules whose changes are covered by the pydantic version, or that never change.
+_LIBRARIES = frozenset(
+    {"pydantic", "pydantic_core", "pydantic_discriminator", "typing_extensions"}
+    | set(getattr(sys, "stdlib_module_names", ()))
+    | set(sys.builtin_module_names)
+)
+
+
+@dataclass
+class RegistryCache:
+    """The import path of every subclass of a root, keyed by discriminator, and the
+    hash of the source of every module defining them or the types of their fields."""
+
+    pydantic_version: str
+    sources: dict[str, str] = field(default_factory=dict)
+    registry: dict[str, str] = field(default_factory=dict)
+
+
+def save_registry(
+    cls: type[DiscriminatedBase[Any]], directory: Union[str, os.PathLike[str]]
+) -> RegistryCache:
+    """Saves the import paths of all the subclasses of `cls` to a file in `directory`,
+    keyed by the hash of the source of the modules defining them and the types of
+    their fields, and by the pydantic version.
+
+    Every subclass must be importable from the top level of its module.
+    """
+    cls.load_lazy()
+    cache = RegistryCache(pydantic.VERSION)
+    subclasses = cls.get_registry_recur()
+    for discriminator, sub in subclasses.items():
+        module = sys.modules[sub.__module__]
+        if getattr(module, sub.__qualname__, None) is not sub:
+            raise ValueError(f"{sub} cannot be imported from {sub.__module__}")
+        cache.registry[discriminator] = f"{sub.__module__}:{sub.__qualname__}"
+    for module in sorted(_modules(cls, [cls, *subclasses.values()])):
+        digest = _source_hash(module)
+        if digest is None:
+            raise ValueError(f"The source of {module} cannot be found")
+        cache.sources[module] = digest
+
+    path = _path(cls, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written aside and renamed, so that concurrent workers never read half a file.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as fp:
+        # Encoded at once by the native encoder, which json.dump does not use.
+        fp.write(json.dumps({"format": CACHE_FORMAT, **vars(cache)}))
+    os.replace(tmp, path)
+    return cache
+
+
+def load_registry(
+    cls: type[DiscriminatedBase[Any]], directory: Union[str, os.PathLike[str]]
+) -> Optional[RegistryCache]:
+    """Lazily registers the subclasses of `cls` saved by `save_registry`, so that their
+    modules are only imported when dispatched, and returns the cache. Returns None
+    without registering anything if there is no cache, or if it was saved with another
+    pydantic version or before the source of any of the modules changed.
+    """
+    try:
+        with open(_path(cls, directory)) as fp:
+            data = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if data.pop("format", None) != CACHE_FORMAT:
+        return None
+    cache = RegistryCache(**data)
+    if cache.pydantic_version != pydantic.VERSION or any(
+        _source_hash(module) != digest for module, digest in cache.sources.items()
+    ):
+        return None
+    for discriminator, path in cache.registry.items():
+        cls.register_lazy(discriminator, path)
+    return cache
+
+
+def _path(cls: type, directory: Union[str, os.PathLike[str]]) -> Path:
+    return Path(directory) / f"{cls.__module__}.{cls.__qualname__}.json"
+
+
+def _modules(cls: type[DiscriminatedBase[Any]], models: list[type]) -> set[str]:
+    # The modules of the models, of their bases and of the types of their fields, at
+    # any level of nesting, apart from libraries.
+    modules: set[str] = set()
+    seen: set[int] = set()
+    stack: list[Any] = list(models)
+    while stack:
+        tp = stack.pop()
+        if id(tp) in seen:
+            continue
+        seen.add(id(tp))
+        if isinstance(tp, type):
+            modules.update(base.__module__ for base in tp.__mro__)
+            fields = cls._model_fields(tp) or []
+            stack.extend(annotation for _, _, annotation, _ in fields)
+        stack.extend(get_args(tp))
+        stack.append(get_origin(tp))
+    return {x for x in modules if x.partition(".")[0] not in _LIBRARIES}
+
+
+def _source_hash(module: str) -> Optional[str]:
+    # Finding the spec of a submodule imports its parent packages, but not the module.
+    loaded = sys.modules.get(module)
+    origin = getattr(loaded, "__file__", None)
+    if origin is None:
+        try:
+            spec = importlib.util.find_spec(module)
+        except (ImportError, ValueError):
+            return None
+        origin = spec.origin if spec is not None else None
+    try:
+        with open(origin, "rb") as fp:  # type: ignore
+            return hashlib.sha256(fp.read()).hexdigest()
+    except (OSError, TypeError):
+        return None
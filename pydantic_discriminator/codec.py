@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import struct
+import threading
+import weakref
+from collections.abc import Mapping
+from typing import Any, Callable, Generic, Optional
+
+from pydantic_discriminator.common import DiscriminatedBase, Naming, T, _builder
+
+try:
+    from pydantic_core import to_jsonable_python as _jsonable
+except ImportError:  # pragma: no cover
+    from pydantic.json import pydantic_encoder as _jsonable
+
+#! Models are msgpack extension values of this type, so any msgpack reader can decode
+#! the rest of the message.
+MODEL_EXT_TYPE = 1
+
+_f32, _f64 = struct.Struct(">f"), struct.Struct(">d")
+_u16, _u32, _u64 = struct.Struct(">H"), struct.Struct(">I"), struct.Struct(">Q")
+_i8, _i16 = struct.Struct(">b"), struct.Struct(">h")
+_i32, _i64 = struct.Struct(">i"), struct.Struct(">q")
+_FIXEXT = {1: 0xD4, 2: 0xD5, 4: 0xD6, 8: 0xD7, 16: 0xD8}
+
+Layout = tuple[Optional[int], list[tuple[str, str]], frozenset[str]]
+
+
+class Codec(Generic[T]):
+    """Encodes discriminated models of a hierarchy to msgpack, with the discriminator
+    replaced by a small integer tag.
+
+    Models of the hierarchy are extension values holding their tag and a map of their
+    fields by alias, without the type field. Tags are assigned in sorted discriminator
+    order, including lazily registered subclasses, and discriminators registered later
+    get the next free tags. Export `tags` and pass them back to decode the messages of
+    another version of the hierarchy. Decoding dispatches to the subclass from the tag
+    and validates it, unless `validate=False`, which builds models of trusted data with
+    `construct_polymorphic`. Models outside of the hierarchy are encoded as maps,
+    including their type field.
+    """
+
+    def __init__(
+        self, root: type[DiscriminatedBase[T]], tags: Optional[Mapping[str, int]] = None
+    ) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._tags: dict[str, int] = dict(tags or {})
+        self._discriminators = {v: k for k, v in self._tags.items()}
+        if len(self._discriminators) != len(self._tags):
+            raise ValueError("Tags must be unique")
+        known = {root.discriminator(), *root.get_registry_recur()}
+        known.update(getattr(root, Naming.LAZY_INDEX))
+        for discriminator in sorted(known - self._tags.keys()):
+            self._assign(discriminator)
+        self._layouts: weakref.WeakKeyDictionary[type, Layout] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def tags(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._tags)
+
+    def encode(self, value: Any) -> bytes:
+        out = bytearray()
+        self._pack(value, out)
+        return bytes(out)
+
+    def decode(self, data: bytes, *, validate: bool = True) -> Any:
+        value, pos = self._unpack(memoryview(data), 0, validate)
+        if pos != len(data):
+            raise ValueError(f"{len(data) - pos} trailing bytes after the value")
+        return value
+
+    def _assign(self, discriminator: str) -> int:
+        tag = max(self._discriminators, default=-1) + 1
+        self._tags[discriminator] = tag
+        self._discriminators[tag] = discriminator
+        return tag
+
+    def _layout(self, cls: type) -> Layout:
+        # The tag of the class, or None if it is not in the hierarchy, the names and
+        # aliases of the fields to encode and the names of all fields.
+        layout = self._layouts.get(cls)
+        if layout is not None:
+            return layout
+        tag = None
+        if issubclass(cls, self.root):
+            discriminator = cls.discriminator()  # type: ignore
+            with self._lock:
+                tag = self._tags.get(discriminator)
+                if tag is None:
+                    tag = self._assign(discriminator)
+        all_fields = [
+            (name, alias) for name, alias, _, _ in self.root._model_fields(cls)
+        ]
+        fields = [
+            x for x in all_fields if tag is None or x[0] != Naming.TYPE_FIELD_NAME
+        ]
+        layout = (tag, fields, frozenset(name for name, _ in all_fields))
+        self._layouts[cls] = layout
+        return layout
+
+    def _pack(self, value: Any, out: bytearray) -> None:
+        if value is None:
+            out.append(0xC0)
+        elif value is True or value is False:
+            out.append(0xC3 if value else 0xC2)
+        elif isinstance(value, int):
+            _pack_int(int(value), out)
+        elif isinstance(value, float):
+            # Floats that are exact in single precision take 5 bytes instead of 9.
+            try:
+                data = _f32.pack(value)
+            except OverflowError:
+                data = b""
+            if data and (_f32.unpack(data)[0] == value or value != value):
+                out.append(0xCA)
+                out += data
+            else:
+                out.append(0xCB)
+                out += _f64.pack(value)
+        elif isinstance(value, str):
+            data = value.encode()
+            n = len(data)
+            if n < 32:
+                out.append(0xA0 | n)
+            else:
+                _pack_header(n, out, 0xD9, 0xDA, 0xDB)
+            out += data
+        elif isinstance(value, (bytes, bytearray)):
+            _pack_header(len(value), out, 0xC4, 0xC5, 0xC6)
+            out += value
+        elif isinstance(value, (list, tuple)):
+            _pack_collection(len(value), out, 0x90, 0xDC, 0xDD)
+            for item in value:
+                self._pack(item, out)
+        elif isinstance(value, Mapping):
+            _pack_collection(len(value), out, 0x80, 0xDE, 0xDF)
+            for k, v in value.items():
+                self._pack(k, out)
+                self._pack(v, out)
+        elif (
+            type(value) in self._layouts
+            or self.root._model_fields(type(value)) is not None
+        ):
+            self._pack_model(value, out)
+        else:
+            self._pack(_jsonable(value), out)
+
+    def _pack_model(self, model: Any, out: bytearray) -> None:
+        tag, fields, names = self._layout(type(model))
+        if isinstance(model, DiscriminatedBase):
+            model.materialize()
+        values = model.__dict__
+        extra = getattr(model, "__pydantic_extra__", None) or {}
+        items = {alias: values[name] for name, alias in fields if name in values}
+        items.update(extra)
+        items.update((k, values[k]) for k in values.keys() - names)
+        if tag is None:
+            if isinstance(model, DiscriminatedBase):
+                items.setdefault(Naming.TYPE_FIELD_ALIAS, model.discriminator())
+            self._pack(items, out)
+            return
+
+        payload = bytearray()
+        _pack_int(tag, payload)
+        self._pack(items, payload)
+        n = len(payload)
+        if n in _FIXEXT:
+            out.append(_FIXEXT[n])
+        else:
+            _pack_header(n, out, 0xC7, 0xC8, 0xC9)
+        out.append(MODEL_EXT_TYPE)
+        out += payload
+
+    def _unpack(self, data: memoryview, pos: int, validate: bool) -> tuple[Any, int]:
+        b = data[pos]
+        pos += 1
+        if b <= 0x7F:
+            return b, pos
+        if b >= 0xE0:
+            return b - 0x100, pos
+        if 0xA0 <= b <= 0xBF:
+            end = pos + (b & 0x1F)
+            return str(data[pos:end], "utf-8"), end
+        if 0x90 <= b <= 0x9F:
+            return self._unpack_array(data, pos, b & 0x0F, validate)
+        if 0x80 <= b <= 0x8F:
+            return self._unpack_map(data, pos, b & 0x0F, validate)
+        if b in _SIMPLE:
+            return _SIMPLE[b], pos
+        if b in _NUMBERS:
+            s = _NUMBERS[b]
+            return s.unpack_from(data, pos)[0], pos + s.size
+        if b in _SIZED:
+            kind, s = _SIZED[b]
+            n = data[pos] if s is None else s.unpack_from(data, pos)[0]
+            pos += 1 if s is None else s.size
+            if kind == "str":
+                return str(data[pos : pos + n], "utf-8"), pos + n
+            if kind == "bin":
+                return bytes(data[pos : pos + n]), pos + n
+            if kind == "array":
+                return self._unpack_array(data, pos, n, validate)
+            if kind == "map":
+                return self._unpack_map(data, pos, n, validate)
+            return self._unpack_ext(data, pos + 1, n, data[pos], validate)
+        if b in _FIXEXT_SIZES:
+            return self._unpack_ext(
+                data, pos + 1, _FIXEXT_SIZES[b], data[pos], validate
+            )
+        raise ValueError(f"Invalid byte 0x{b:02x} at position {pos - 1}")
+
+    def _unpack_array(
+        self, data: memoryview, pos: int, n: int, validate: bool
+    ) -> tuple[list[Any], int]:
+        items = []
+        for _ in range(n):
+            item, pos = self._unpack(data, pos, validate)
+            items.append(item)
+        return items, pos
+
+    def _unpack_map(
+        self, data: memoryview, pos: int, n: int, validate: bool
+    ) -> tuple[dict[Any, Any], int]:
+        items = {}
+        for _ in range(n):
+            k, pos = self._unpack(data, pos, validate)
+            items[k], pos = self._unpack(data, pos, validate)
+        return items, pos
+
+    def _unpack_ext(
+        self, data: memoryview, pos: int, n: int, ext_type: int, validate: bool
+    ) -> tuple[Any, int]:
+        if ext_type != MODEL_EXT_TYPE:
+            raise ValueError(f"Unknown extension type {ext_type}")
+        tag, start = self._unpack(data, pos, validate)
+        values, end = self._unpack(data, start, validate)
+        if end != pos + n:
+            raise ValueError(f"Invalid model payload at position {pos}")
+        discriminator = self._discriminators.get(tag)
+        if discriminator is None:
+            raise ValueError(f"Unknown tag {tag} for {self.root}")
+        cls = self._subclass(discriminator)
+        values[Naming.TYPE_FIELD_ALIAS] = discriminator
+        if not validate:
+            return _builder(self.root, cls)[1](values), end
+        validate_fn: Callable[[Any], Any] = getattr(cls, "model_validate", None) or (
+            cls.parse_obj  # type: ignore
+        )
+        return validate_fn(values), end
+
+    def _subclass(self, discriminator: str) -> type:
+        if discriminator == self.root.discriminator():
+            return self.root
+        cls = self.root.get_subclass(discriminator)
+        if cls is None:
+            raise ValueError(f"Unknown discriminator {discriminator} for {self.root}")
+        return cls
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value <= 0x7F:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value + 0x100)
+    elif 0 <= value <= 0xFF:
+        out += bytes((0xCC, value))
+    elif 0 <= value <= 0xFFFF:
+        out.append(0xCD)
+        out += _u16.pack(value)
+    elif 0 <= value <= 0xFFFFFFFF:
+        out.append(0xCE)
+        out += _u32.pack(value)
+    elif 0 <= value <= 0xFFFFFFFFFFFFFFFF:
+        out.append(0xCF)
+        out += _u64.pack(value)
+    elif 0 < value:
+        raise ValueError(f"Integer {value} does not fit in 64 bits")
+    elif -0x80 <= value:
+        out.append(0xD0)
+        out += _i8.pack(value)
+    elif -0x8000 <= value:
+        out.append(0xD1)
+        out += _i16.pack(value)
+    elif -0x80000000 <= value:
+        out.append(0xD2)
+        out += _i32.pack(value)
+    elif -0x8000000000000000 <= value:
+        out.append(0xD3)
+        out += _i64.pack(value)
+    else:
+        raise ValueError(f"Integer {value} does not fit in 64 bits")
+
+
+def _pack_header(n: int, out: bytearray, b8: int, b16: int, b32: int) -> None:
+    if n <= 0xFF:
+        out += bytes((b8, n))
+    elif n <= 0xFFFF:
+        out.append(b16)
+        out += _u16.pack(n)
+    else:
+        out.append(b32)
+        out += _u32.pack(n)
+
+
+def _pack_collection(n: int, out: bytearray, fix: int, b16: int, b32: int) -> None:
+    if n < 16:
+        out.append(fix | n)
+    elif n <= 0xFFFF:
+        out.append(b16)
+        out += _u16.pack(n)
+    else:
+        out.append(b32)
+        out += _u32.pack(n)
+
+
+_SIMPLE = {0xC0: None, 0xC2: False, 0xC3: True}
+_NUMBERS = {
+    0xCA: _f32,
+    0xCB: _f64,
+    0xCC: struct.Struct(">B"),
+    0xCD: _u16,
+    0xCE: _u32,
+    0xCF: _u64,
+    0xD0: _i8,
+    0xD1: _i16,
+    0xD2: _i32,
+    0xD3: _i64,
+}
+_SIZED = {
+    0xC4: ("bin", None),
+    0xC5: ("bin", _u16),
+    0xC6: ("bin", _u32),
+    0xC7: ("ext", None),
+    0xC8: ("ext", _u16),
+    0xC9: ("ext", _u32),
+    0xD9: ("str", None),
+    0xDA: ("str", _u16),
+    0xDB: ("str", _u32),
+    0xDC: ("array", _u16),
+    0xDD: ("array", _u32),
+    0xDE: ("map", _u16),
+    0xDF: ("map", _u32),
+}
+_FIXEXT_SIZES = {v: k for k, v in _FIXEXT.items()}
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from itertools import repeat
+from operator import itemgetter
+from typing import Any, Optional
+
+from pydantic_discriminator.common import DiscriminatedBase, Naming, T
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+@dataclass
+class Columns:
+    """One table per discriminator, mapping each field name to its column, and the
+    positions of the rows of every table in the original list."""
+
+    tables: dict[str, dict[str, Any]] = field(default_factory=dict)
+    index: dict[str, Any] = field(default_factory=dict)
+
+
+def to_columns(
+    models: Iterable[DiscriminatedBase[Any]], *, numpy: Optional[bool] = None
+) -> Columns:
+    """Pivots discriminated models into columns of their field values, grouped by
+    discriminator.
+
+    Columns are lists, or NumPy arrays if NumPy is installed and `numpy` is not False.
+    Values are taken as stored in the instances, without dumping them, and extra
+    fields are left out. For each discriminator, `index` holds the position in
+    `models` of every row, so that `models[index[d][i]]` is row `i` of `tables[d]`.
+    """
+    if numpy and np is None:
+        raise ImportError("numpy is required for numpy=True")
+    use_numpy = np is not None and numpy is not False
+
+    groups: dict[type, tuple[list[int], list[dict[str, Any]], bool]] = {}
+    for i, model in enumerate(models):
+        group = groups.get(type(model))
+        if group is None:
+            if not isinstance(model, DiscriminatedBase):
+                raise TypeError(f"{model!r} is not a discriminated model")
+            deferred = getattr(model, Naming.DEFERRED_VALIDATION)
+            group = groups[type(model)] = ([], [], deferred)
+        group[0].append(i)
+        group[1].append(model.materialize().__dict__ if group[2] else model.__dict__)
+
+    result = Columns()
+    for cls, (positions, dicts, _) in groups.items():
+        discriminator = cls.discriminator()  # type: ignore
+        if discriminator in result.tables:
+            raise ValueError(f"Discriminator {discriminator} is used by many classes")
+        table = result.tables[discriminator] = {}
+        for name, _, _, _ in cls._model_fields(cls) or []:  # type: ignore
+            if name == Naming.TYPE_FIELD_NAME:
+                continue
+            try:
+                column = list(map(itemgetter(name), dicts))
+            except KeyError:
+                column = [d.get(name) for d in dicts]
+            table[name] = _array(column) if use_numpy else column
+        result.index[discriminator] = (
+            np.array(positions, dtype=np.intp) if use_numpy else positions
+        )
+    return result
+
+
+def from_columns(
+    cls: type[DiscriminatedBase[T]],
+    tables: Mapping[str, Mapping[str, Any]],
+    index: Optional[Mapping[str, Any]] = None,
+    *,
+    validate: bool = True,
+) -> list[T]:
+    """Builds the instances of the subclasses of `cls` from columns of their field
+    values grouped by discriminator, the reverse of `to_columns`.
+
+    Columns can be lists or arrays, keyed by field name. Each column is validated as a
+    whole and instances are then built without validating them again, unless the
+    subclass has validators that need whole rows, which are then validated as a list.
+    With `validate=False` instances of trusted data are just built. Instances are
+    returned in the order given by `index`, or table after table without it.
+    """
+    instances: list[Any] = []
+    positions: list[Any] = []
+    for discriminator, table in tables.items():
+        other_cls = cls.get_subclass(discriminator)
+        if other_cls is None and discriminator == cls.discriminator():
+            other_cls = cls  # type: ignore
+        if other_cls is None:
+            raise ValueError(f"Unknown discriminator {discriminator} for {cls}")
+        columns = {
+            k: v.tolist() if hasattr(v, "tolist") else list(v)
+            for k, v in table.items()
+            if k not in (Naming.TYPE_FIELD_NAME, Naming.TYPE_FIELD_ALIAS)
+        }
+        instances.extend(_build(other_cls, discriminator, columns, validate))
+        if index is not None:
+            positions.extend(index[discriminator])
+    if index is None:
+        return instances
+    result: list[Any] = [None] * len(instances)
+    for i, instance in zip(positions, instances):
+        result[i] = instance
+    return result
+
+
+def _build(
+    cls: Any, discriminator: str, columns: dict[str, list[Any]], validate: bool
+) -> list[Any]:
+    lengths = {len(x) for x in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns of {discriminator} have different lengths")
+    n = lengths.pop() if lengths else 0
+    fields = cls._model_fields(cls) or []
+    names = {name for name, _, _, _ in fields}
+    column_validator = cls._column_validator(cls) if validate else None
+    if validate and (column_validator is None or columns.keys() - names):
+        # Validators of the model need whole rows.
+        keys = [Naming.TYPE_FIELD_ALIAS, *columns]
+        rows = zip(repeat(discriminator, n), *columns.values())
+        return cls._validate_list([dict(zip(keys, row)) for row in rows])
+
+    if column_validator is not None:
+        columns = column_validator(columns)
+    defaults = []
+    for name, _, _, default in fields:
+        if name in columns or name == Naming.TYPE_FIELD_NAME:
+            continue
+        if default is None:
+            raise ValueError(f"Missing column {name} of {discriminator}")
+        defaults.append((name, default))
+    keys = list(columns)
+    values = list(columns.values())
+    if Naming.TYPE_FIELD_NAME in names:
+        keys.append(Naming.TYPE_FIELD_NAME)
+        values.append(repeat(discriminator, n))
+    fields_set = set(keys)
+    construct = cls._model_constructor(cls)
+    instances = []
+    for row in zip(*values):
+        data = dict(zip(keys, row))
+        for name, default in defaults:
+            data[name] = default()
+        instances.append(construct(data, set(fields_set)))
+    return instances
+
+
+def _array(column: list[Any]) -> Any:
+    # Columns of nested values that do not form a regular array are kept as objects.
+    try:
+        return np.array(column)
+    except ValueError:
+        array = np.empty(len(column), dtype=object)
+        array[:] = column
+        return array
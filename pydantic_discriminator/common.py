@@ -1,14 +1,54 @@
 from __future__ import annotations
 
+import collections.abc
+import copy
+import importlib
+import inspect
+import itertools
+import threading
+import warnings
 from abc import ABC, abstractmethod
-from collections.abc import Mapping, MutableMapping
-from typing import Generic, TypeVar
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Iterable, Mapping, MutableMapping
+from dataclasses import dataclass, field
+from functools import reduce
+from importlib.metadata import entry_points
+from typing import (
+    Annotated,
+    Any,
+    Generic,
+    Optional,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from pydantic_discriminator import metrics
 
 
 class Naming:
     REGISTRY: str = "__pyd_discriminator_registry__"
+    INDEX: str = "__pyd_discriminator_index__"
+    LAZY_INDEX: str = "__pyd_discriminator_lazy_index__"
     DISCRIMINATOR: str = "__pyd_discriminator_field__"
     DISCRIMINATOR_KWARG: str = "discriminator"
+    TAGGED_UNION: str = "__pyd_discriminator_tagged_union__"
+    TAGGED_UNION_CACHE: str = "__pyd_discriminator_tagged_union_cache__"
+    LIST_VALIDATOR: str = "__pyd_discriminator_list_validator__"
+    BUILDERS: str = "__pyd_discriminator_builders__"
+    COLUMN_VALIDATOR: str = "__pyd_discriminator_column_validator__"
+    JSON_SCHEMA: str = "__pyd_discriminator_json_schema__"
+    TAGGED_UNION_KWARG: str = "tagged_union"
+    CLASS_DISCRIMINATOR: str = "__pyd_discriminator_class_discriminator__"
+    CLASS_DISCRIMINATOR_KWARG: str = "class_discriminator"
+    REPLACE_KWARG: str = "replace"
+    DEFERRED_VALIDATION: str = "__pyd_discriminator_deferred_validation__"
+    DEFERRED_VALIDATION_KWARG: str = "deferred"
+    DEFERRED_METHOD: str = "__pyd_discriminator_deferred_method__"
+    RAW_DATA: str = "__pyd_discriminator_raw_data__"
+    VALIDATION_CACHE: str = "__pyd_discriminator_validation_cache__"
+    CACHE_SIZE_KWARG: str = "cache_size"
     TYPE_FIELD_NAME: str = "type_"
     TYPE_FIELD_ALIAS: str = "type"
 
@@ -19,18 +59,423 @@ T = TypeVar("T")
 class Discriminated(ABC, Generic[T]):
     @classmethod
     @abstractmethod
-    def discriminator(cls) -> str:
-        ...
+    def discriminator(cls) -> str: ...
 
     @classmethod
     @abstractmethod
-    def get_registry(cls) -> MutableMapping[str, type[T]]:
-        ...
+    def get_registry(cls) -> MutableMapping[str, type[T]]: ...
 
     @classmethod
     @abstractmethod
-    def get_registry_recur(cls) -> Mapping[str, type[T]]:
-        ...
+    def get_registry_recur(cls) -> Mapping[str, type[T]]: ...
+
+    @classmethod
+    @abstractmethod
+    def get_subclass(cls, discriminator: str) -> Optional[type[T]]: ...
+
+    @classmethod
+    @abstractmethod
+    def _validate_one(cls, data: Any) -> T: ...
+
+    @classmethod
+    @abstractmethod
+    def _validate_list(cls, records: list[Any]) -> list[T]: ...
+
+    @classmethod
+    @abstractmethod
+    def _model_fields(
+        cls, model: Any
+    ) -> Optional[list[tuple[str, str, Any, Optional[Callable[[], Any]]]]]: ...
+
+    @classmethod
+    @abstractmethod
+    def _model_constructor(
+        cls, model: Any
+    ) -> Callable[[dict[str, Any], set[str]], Any]: ...
+
+    @classmethod
+    @abstractmethod
+    def _model_slots(
+        cls, model: Any
+    ) -> Optional[tuple[str, tuple[tuple[str, Any], ...]]]: ...
+
+    @classmethod
+    @abstractmethod
+    def _column_validator(
+        cls, model: Any
+    ) -> Optional[Callable[[dict[str, list[Any]]], dict[str, list[Any]]]]: ...
+
+    @classmethod
+    @abstractmethod
+    def _validate_into(cls, instance: Any, data: Mapping[str, Any]) -> None: ...
+
+    @classmethod
+    @abstractmethod
+    def _json_schema_defs(
+        cls, models: list[Any], ref_template: str, **kwargs: Any
+    ) -> tuple[str, dict[str, Any], list[str]]: ...
+
+    @classmethod
+    @abstractmethod
+    def _split_list_errors(
+        cls, error: ValueError
+    ) -> Optional[dict[int, list[dict[str, Any]]]]: ...
+
+
+@dataclass
+class BatchResult(Generic[T]):
+    instances: list[Optional[T]]
+    errors: dict[int, list[dict[str, Any]]] = field(default_factory=dict)
+
+
+class ValidationCache:
+    """Bounded LRU cache of validated instances, keyed by the validated class and a
+    canonical form of the input, with its hit, miss and eviction counts."""
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError("The size of a validation cache must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Any, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def validate(
+        self,
+        cls: type,
+        data: Any,
+        validate: Callable[[Any], T],
+        strict: Optional[Callable[[Any], bool]] = None,
+    ) -> T:
+        # strict, when the mode of the validation is unknown, tells whether the data is
+        # valid in strict mode too. Data that is not is validated again on every hit.
+        try:
+            key = (cls, _freeze(data)) if isinstance(data, Mapping) else None
+        except TypeError:
+            key = None
+        if key is None:
+            return validate(data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and strict is not None:
+            if entry[1] is None:
+                # Checked once, on the first hit of the entry.
+                entry[1] = strict(data)
+            if not entry[1]:
+                return validate(data)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if metrics.active is not None:
+            hit = entry is not None
+            metrics.active.count("cache_hit" if hit else "cache_miss", "validation")
+        if entry is not None:
+            return entry[0]
+
+        # Invalid data raises here and is never cached.
+        instance = validate(data)
+        with self._lock:
+            self._entries[key] = [instance, None]
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return instance
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# Numbers keep their type, since e.g. 1, 1.0 and True are equal but can validate to
+# different values.
+_TAGGED_SCALARS = frozenset({int, float, bool})
+
+
+def _freeze(value: Any) -> Any:
+    # A hashable copy of JSON-like data, anything else raises a TypeError.
+    t = type(value)
+    if t is str or value is None:
+        return value
+    if t in _TAGGED_SCALARS or t is bytes:
+        return t, value
+    if isinstance(value, Mapping):
+        items = []
+        for k, v in value.items():
+            if type(k) is not str:
+                raise TypeError(f"Cannot cache a mapping with key {k!r}")
+            items.append((k, _freeze(v)))
+        return frozenset(items)
+    if t is list:
+        return tuple(map(_freeze, value))
+    if t is tuple:
+        return tuple, tuple(map(_freeze, value))
+    raise TypeError(f"Cannot cache {t}")
+
+
+def pop_validation_cache(
+    bases: tuple[type, ...], kwargs: dict[str, Any]
+) -> Optional[ValidationCache]:
+    # Subclasses share the cache of their base, unless they get their own.
+    size = kwargs.pop(Naming.CACHE_SIZE_KWARG, None)
+    if size is not None:
+        return ValidationCache(size)
+    return next(
+        (
+            getattr(b, Naming.VALIDATION_CACHE)
+            for b in bases
+            if getattr(b, Naming.VALIDATION_CACHE, None) is not None
+        ),
+        None,
+    )
+
+
+Discriminators = Optional[Collection[str]]
+
+
+def record_type(cls: type[Discriminated], record: Any) -> Any:
+    # The discriminator a record dispatches to, without validating anything.
+    if isinstance(record, Mapping):
+        return record.get(
+            Naming.TYPE_FIELD_ALIAS,
+            record.get(Naming.TYPE_FIELD_NAME, cls.discriminator()),
+        )
+    return cls.discriminator()
+
+
+def selected(type_: Any, include: Discriminators, exclude: Discriminators) -> bool:
+    if not isinstance(type_, str):
+        # Left to validation to report, unless only some discriminators are included.
+        if include is None:
+            return True
+    elif (include is None or type_ in include) and not (exclude and type_ in exclude):
+        return True
+    if metrics.active is not None:
+        metrics.active.count("skipped", type_)
+    return False
+
+
+#! Registries are never mutated in place: writers copy them under this lock and swap
+#! the new dict in, so readers can use whatever snapshot they got without locking.
+_lock = threading.Lock()
+
+
+def _copy_on_write(owner: type, name: str, key: str, value: Any = None) -> None:
+    snapshot = dict(getattr(owner, name))
+    if value is None:
+        snapshot.pop(key, None)
+    else:
+        snapshot[key] = value
+    setattr(owner, name, snapshot)
+
+
+def register(
+    new_cls: type, bases: tuple[type, ...], discriminator: str, replace: bool = False
+) -> None:
+    # Every class keeps both its direct subclasses and a flat index of all of its
+    # descendants, updated incrementally so that dispatch is a single dict lookup.
+    setattr(new_cls, Naming.REGISTRY, {})
+    setattr(new_cls, Naming.INDEX, {})
+    setattr(new_cls, Naming.LAZY_INDEX, {})
+    setattr(new_cls, Naming.DISCRIMINATOR, discriminator)
+    with _lock:
+        # The base model at the end of the MRO indexes every unrelated hierarchy, so
+        # discriminators only have to be unique below it.
+        ancestors = [x for x in new_cls.__mro__[1:] if Naming.INDEX in vars(x)]
+        for ancestor in ancestors[:-1]:
+            existing = getattr(ancestor, Naming.INDEX).get(discriminator)
+            if getattr(ancestor, Naming.DISCRIMINATOR) == discriminator:
+                existing = ancestor
+            if existing is None:
+                continue
+            if existing is ancestor or not (replace or _redefines(new_cls, existing)):
+                raise TypeError(
+                    f"Discriminator {discriminator} of {new_cls} is already used by "
+                    f"{existing}"
+                )
+            if not replace:
+                warnings.warn(
+                    f"{new_cls} redefines {existing}, pass replace=True if that is "
+                    "intended",
+                    RuntimeWarning,
+                    stacklevel=3,
+                )
+            _unregister(existing)
+        for base in bases:
+            if hasattr(base, Naming.REGISTRY):
+                _copy_on_write(base, Naming.REGISTRY, discriminator, new_cls)
+        for ancestor in ancestors:
+            _copy_on_write(ancestor, Naming.INDEX, discriminator, new_cls)
+            if discriminator in getattr(ancestor, Naming.LAZY_INDEX):
+                _copy_on_write(ancestor, Naming.LAZY_INDEX, discriminator)
+            _invalidate(ancestor)
+
+
+def _unregister(removed: type) -> None:
+    # Drops the class from the registries of its ancestors, which must be called
+    # holding the lock. Its subclasses stay registered, the direct ones under the
+    # bases of the removed class.
+    for base in removed.__bases__:
+        if hasattr(base, Naming.REGISTRY):
+            registry = getattr(base, Naming.REGISTRY)
+            snapshot = {k: v for k, v in registry.items() if v is not removed}
+            snapshot.update(getattr(removed, Naming.REGISTRY))
+            setattr(base, Naming.REGISTRY, snapshot)
+    for ancestor in removed.__mro__[1:]:
+        if Naming.INDEX not in vars(ancestor):
+            continue
+        index = getattr(ancestor, Naming.INDEX)
+        setattr(
+            ancestor, Naming.INDEX, {k: v for k, v in index.items() if v is not removed}
+        )
+        _invalidate(ancestor)
+    #! The validators cached on the class refer to it, and pydantic-core 2.0 cannot
+    #! collect such cycles.
+    _invalidate(removed)
+
+
+def _invalidate(cls: type) -> None:
+    # Drops every cache of the class that depends on the set of its subclasses.
+    for name in (
+        Naming.TAGGED_UNION_CACHE,
+        Naming.LIST_VALIDATOR,
+        Naming.BUILDERS,
+        Naming.JSON_SCHEMA,
+    ):
+        if vars(cls).get(name) is not None:
+            setattr(cls, name, None)
+    # Cached instances may be of a class that was just replaced.
+    cache = vars(cls).get(Naming.VALIDATION_CACHE)
+    if cache is not None:
+        cache.clear()
+
+
+def check_type_field(
+    name: str, bases: tuple[type, ...], namespace: dict[str, Any]
+) -> None:
+    # Only the base models declare the type field, subclasses get it from them.
+    if not any(hasattr(b, Naming.INDEX) for b in bases):
+        return
+    annotations = namespace.get("__annotations__", {})
+    if Naming.TYPE_FIELD_ALIAS in annotations:
+        raise TypeError(
+            f"{name} cannot have a {Naming.TYPE_FIELD_ALIAS} field, "
+            "it holds the discriminator"
+        )
+    if Naming.TYPE_FIELD_NAME in annotations or Naming.TYPE_FIELD_NAME in namespace:
+        raise TypeError(
+            f"{name} cannot define {Naming.TYPE_FIELD_NAME}, it holds the discriminator"
+        )
+
+
+def pop_class_discriminator(bases: tuple[type, ...], kwargs: dict[str, Any]) -> bool:
+    # Inherited by subclasses, which cannot go back to storing the discriminator.
+    inherited = any(getattr(b, Naming.CLASS_DISCRIMINATOR, False) for b in bases)
+    class_discriminator = kwargs.pop(Naming.CLASS_DISCRIMINATOR_KWARG, inherited)
+    if inherited and not class_discriminator:
+        raise TypeError("Subclasses of a class discriminator model cannot opt out")
+    return bool(class_discriminator)
+
+
+def pop_deferred(bases: tuple[type, ...], kwargs: dict[str, Any]) -> bool:
+    # Whether the class defers validation, inherited from its bases.
+    inherited = any(getattr(b, Naming.DEFERRED_VALIDATION, False) for b in bases)
+    return bool(kwargs.pop(Naming.DEFERRED_VALIDATION_KWARG, inherited))
+
+
+def install_deferred(owner: type, names: Iterable[str]) -> None:
+    #! Deferred instances only hold their type and the raw data until validated, so
+    #! every method and attribute reading the fields of an instance validates it
+    #! first. Installed on every deferred class, since pydantic defines some of them,
+    #! e.g. the hash of frozen models, on each class.
+    for name in names:
+        original = inspect.getattr_static(owner, name, None)
+        if original is not None and not getattr(
+            original, Naming.DEFERRED_METHOD, False
+        ):
+            setattr(owner, name, _materializing(owner, name, original))
+    getattr_ = getattr(owner, "__getattr__", None)
+    if not getattr(getattr_, Naming.DEFERRED_METHOD, False):
+        owner.__getattr__ = _deferred_getattr(owner)  # type: ignore
+
+
+class _MaterializingDescriptor(property):
+    pass
+
+
+def _materializing(owner: type, name: str, original: Any) -> Any:
+    if not callable(original):
+        # Attributes such as the fields set, read after validating the instance.
+        def get(self: Any) -> Any:
+            if Naming.RAW_DATA in self.__dict__:
+                self.materialize()
+            return original.__get__(self, type(self))
+
+        descriptor = _MaterializingDescriptor(get, original.__set__)
+        setattr(descriptor, Naming.DEFERRED_METHOD, True)
+        return descriptor
+
+    if name == "__repr_args__":
+
+        def method(self: Any) -> Any:
+            try:
+                self.materialize()
+            except ValueError:
+                # Invalid instances are shown with their raw data.
+                return list(self.__dict__[Naming.RAW_DATA].items())
+            return original(self)
+
+    else:
+
+        def method(self: Any, *args: Any, **kwargs: Any) -> Any:
+            self.materialize()
+            for arg in args:
+                if isinstance(arg, DiscriminatedBase):
+                    arg.materialize()
+            return original(self, *args, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = f"{owner.__qualname__}.{name}"
+    setattr(method, Naming.DEFERRED_METHOD, True)
+    return method
+
+
+def _deferred_getattr(owner: type) -> Callable[[Any, str], Any]:
+    def __getattr__(self: Any, name: str) -> Any:
+        if Naming.RAW_DATA in self.__dict__:
+            return getattr(self.materialize(), name)
+        base = getattr(super(owner, self), "__getattr__", None)
+        if base is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        return base(name)
+
+    setattr(__getattr__, Naming.DEFERRED_METHOD, True)
+    return __getattr__
+
+
+def _redefines(new_cls: type, existing: type) -> bool:
+    # Re-running a class definition, e.g. when reloading a module, replaces the class.
+    return (new_cls.__module__, new_cls.__qualname__) == (
+        existing.__module__,
+        existing.__qualname__,
+    )
 
 
 class DiscriminatedBase(Discriminated[T]):
@@ -44,9 +489,399 @@ class DiscriminatedBase(Discriminated[T]):
 
     @classmethod
     def get_registry_recur(cls) -> Mapping[str, type[T]]:
-        all_registered = {}
-        for k, registered in cls.get_registry().items():
-            all_registered[k] = registered
-            if issubclass(registered, Discriminated):  # pragma: no branch
-                all_registered.update(registered.get_registry_recur())
-        return all_registered
+        return getattr(cls, Naming.INDEX)
+
+    @classmethod
+    def register_lazy(cls, discriminator: str, path: str) -> None:
+        """Registers a subclass by its "pkg.module:ClassName" import path, the module is
+        imported the first time the discriminator is dispatched."""
+        with _lock:
+            if discriminator in cls.get_registry_recur():
+                return
+            for ancestor in cls.__mro__:
+                if Naming.LAZY_INDEX in vars(ancestor):
+                    _copy_on_write(ancestor, Naming.LAZY_INDEX, discriminator, path)
+                    _invalidate(ancestor)
+
+    @classmethod
+    def register_entry_points(cls, group: str) -> None:
+        """Lazily registers every entry point of the given group, named after the
+        discriminator and pointing to the subclass."""
+        try:
+            eps = entry_points(group=group)
+        except TypeError:  # pragma: no cover
+            eps = entry_points().get(group, [])  # type: ignore
+        for ep in eps:
+            cls.register_lazy(ep.name, ep.value)
+
+    @classmethod
+    def unregister(cls, discriminator: str) -> None:
+        """Removes the subclass with the given discriminator from the registries of
+        the hierarchy, so that it can be garbage collected. Its own subclasses stay
+        registered."""
+        with _lock:
+            removed = cls.get_registry_recur().get(discriminator)
+            if removed is not None:
+                _unregister(removed)
+            elif discriminator in getattr(cls, Naming.LAZY_INDEX):
+                for ancestor in cls.__mro__:
+                    if Naming.LAZY_INDEX in vars(ancestor):
+                        _copy_on_write(ancestor, Naming.LAZY_INDEX, discriminator)
+            else:
+                raise KeyError(discriminator)
+
+    @classmethod
+    def get_subclass(cls, discriminator: str) -> Optional[type[T]]:
+        other_cls = cls.get_registry_recur().get(discriminator)
+        if metrics.active is not None:
+            hit = other_cls is not None
+            metrics.active.count("cache_hit" if hit else "cache_miss", "index")
+        if other_cls is None:
+            path = getattr(cls, Naming.LAZY_INDEX).get(discriminator)
+            if path is None:
+                return None
+            _import_lazy(cls, discriminator, path)
+            other_cls = cls.get_registry_recur()[discriminator]
+        return other_cls
+
+    @classmethod
+    def load_lazy(cls) -> None:
+        """Imports every lazily registered subclass."""
+        while lazy_index := getattr(cls, Naming.LAZY_INDEX):
+            discriminator, path = next(iter(lazy_index.items()))
+            _import_lazy(cls, discriminator, path)
+
+    @classmethod
+    def validation_cache(cls) -> Optional[ValidationCache]:
+        """The cache of validated instances shared by the class, if it has one."""
+        return getattr(cls, Naming.VALIDATION_CACHE, None)
+
+    def materialize(self: Any) -> Any:
+        """Validates a deferred instance, which otherwise happens the first time any of
+        its fields is read, and returns it. Validation errors are raised here."""
+        data = self.__dict__.get(Naming.RAW_DATA)
+        if data is not None:
+            type(self)._validate_into(self, data)
+        return self
+
+    @classmethod
+    def construct_polymorphic(cls, data: Mapping[str, Any]) -> T:
+        """Builds the subclass selected by the type field of trusted data, recursively
+        building nested models, without any validation."""
+        return _builder(cls, cls)[0](data)
+
+    @classmethod
+    def _validate_group(
+        cls, records: list[Any], positions: list[int], result: BatchResult[T]
+    ) -> None:
+        # The whole group is validated in one call, failed records are dropped and the
+        # rest of the group is validated again.
+        while positions:
+            try:
+                instances = cls._validate_list([records[i] for i in positions])
+            except ValueError as e:
+                errors = cls._split_list_errors(e)
+                if errors is None:
+                    # The position of the failed records is lost, validate them one
+                    # by one instead.
+                    cls._validate_each(records, positions, result)
+                    return
+                if not errors:  # pragma: no cover
+                    raise
+                for j, record_errors in errors.items():
+                    result.errors[positions[j]] = record_errors
+                positions = [i for j, i in enumerate(positions) if j not in errors]
+            else:
+                for i, instance in zip(positions, instances):
+                    result.instances[i] = instance
+                if getattr(cls, Naming.DEFERRED_VALIDATION):
+                    # Deferred instances are validated here, to report their errors.
+                    cls._materialize_each(positions, result)
+                positions = []
+
+    @classmethod
+    def _materialize_each(cls, positions: list[int], result: BatchResult[T]) -> None:
+        for i in positions:
+            try:
+                result.instances[i].materialize()  # type: ignore
+            except ValueError as e:
+                if not hasattr(e, "errors"):  # pragma: no cover
+                    raise
+                result.instances[i] = None
+                result.errors[i] = e.errors()
+
+    @classmethod
+    def _validate_each(
+        cls, records: list[Any], positions: list[int], result: BatchResult[T]
+    ) -> None:
+        for i in positions:
+            try:
+                instance = cls._validate_one(records[i])
+                result.instances[i] = instance.materialize()  # type: ignore
+            except ValueError as e:
+                if not hasattr(e, "errors"):  # pragma: no cover
+                    raise
+                result.errors[i] = e.errors()
+
+    @classmethod
+    def validate_filtered(
+        cls,
+        data: Any,
+        *,
+        include: Discriminators = None,
+        exclude: Discriminators = None,
+    ) -> Optional[T]:
+        """Validates data like `model_validate`/`parse_obj`, unless its discriminator is
+        not in `include` or is in `exclude`, in which case None is returned without
+        dispatching or validating anything."""
+        if not selected(record_type(cls, data), include, exclude):
+            return None
+        return cls._validate_one(data)
+
+    @classmethod
+    def validate_many(
+        cls,
+        records: Iterable[Any],
+        *,
+        include: Discriminators = None,
+        exclude: Discriminators = None,
+    ) -> BatchResult[T]:
+        """Validates records grouped by subclass, collecting the errors of each record.
+
+        Records whose discriminator is not in `include` or is in `exclude` are skipped
+        before dispatch, and are None in the result without any error.
+        """
+        records = list(records)
+        result: BatchResult[T] = BatchResult([None] * len(records))
+        index = cls.get_registry_recur()
+        groups: dict[Any, list[int]] = {}
+        for i, record in enumerate(records):
+            type_ = record_type(cls, record)
+            if not selected(type_, include, exclude):
+                continue
+            other_cls = None
+            # Unhashable types cannot be looked up, and are reported as unknown.
+            if isinstance(type_, str):
+                other_cls = index.get(type_)
+                if other_cls is None and type_ == cls.discriminator():
+                    other_cls = cls
+                elif other_cls is None:
+                    other_cls = cls.get_subclass(type_)
+            if other_cls is None:
+                if metrics.active is not None:
+                    metrics.active.count("unknown", type_)
+                result.errors[i] = [
+                    {
+                        "type": "value_error",
+                        "loc": (Naming.TYPE_FIELD_ALIAS,),
+                        "msg": f"Unknown discriminator {type_} for {cls}",
+                        "input": type_,
+                    }
+                ]
+            else:
+                groups.setdefault(other_cls, []).append(i)
+
+        for other_cls, positions in groups.items():
+            other_cls._validate_group(records, positions, result)
+        return result
+
+
+def _import_lazy(cls: type, discriminator: str, path: str) -> None:
+    # Importing the module registers the subclass, which drops the lazy entry.
+    module_name, _, name = path.partition(":")
+    loaded = reduce(getattr, name.split("."), importlib.import_module(module_name))
+    if discriminator in getattr(cls, Naming.LAZY_INDEX):
+        with _lock:
+            for ancestor in cls.__mro__:
+                if Naming.LAZY_INDEX in vars(ancestor):
+                    _copy_on_write(ancestor, Naming.LAZY_INDEX, discriminator)
+        raise ValueError(
+            f"{path} was registered as {discriminator} for {cls}, but {loaded} is not"
+        )
+
+
+def const_type(
+    schema: dict[str, Any], type_key: str, discriminator: str
+) -> dict[str, Any]:
+    # Every choice requires its own discriminator, so exactly one of them matches.
+    properties = dict(schema.get("properties", {}))
+    type_schema = properties.pop(type_key, {"type": "string"})
+    type_schema = {k: v for k, v in type_schema.items() if k != "default"}
+    required = [x for x in schema.get("required", []) if x != type_key]
+    return {
+        **schema,
+        "properties": {type_key: {**type_schema, "const": discriminator}, **properties},
+        "required": [type_key, *required],
+    }
+
+
+def polymorphic_json_schema(
+    cls: type[Discriminated], ref_template: str, **kwargs: Any
+) -> dict[str, Any]:
+    # One of the schemas of the class and of all of its subclasses, picked by the
+    # OpenAPI discriminator. Cached per set of arguments until a subclass registers.
+    cached = vars(cls).get(Naming.JSON_SCHEMA)
+    key = (ref_template, *sorted(kwargs.items()))
+    hit = cached is not None and key in cached and not getattr(cls, Naming.LAZY_INDEX)
+    if metrics.active is not None:
+        metrics.active.count("cache_hit" if hit else "cache_miss", "json_schema")
+    if hit:
+        return copy.deepcopy(cached[key])
+
+    cls.load_lazy()  # type: ignore
+    classes = [cls, *cls.get_registry_recur().values()]
+    defs_key, defs, names = cls._json_schema_defs(classes, ref_template, **kwargs)
+    type_key = (
+        Naming.TYPE_FIELD_ALIAS
+        if kwargs.get("by_alias", True)
+        else Naming.TYPE_FIELD_NAME
+    )
+    mapping = {}
+    for sub, name in zip(classes, names):
+        discriminator = sub.discriminator()
+        defs[name] = const_type(defs[name], type_key, discriminator)
+        mapping[discriminator] = ref_template.format(model=name)
+    schema = {
+        "title": defs[names[0]].get("title", cls.__name__),
+        "oneOf": [{"$ref": ref} for ref in mapping.values()],
+        "discriminator": {"propertyName": type_key, "mapping": mapping},
+        defs_key: defs,
+    }
+    setattr(cls, Naming.JSON_SCHEMA, {**(cached or {}), key: schema})
+    return copy.deepcopy(schema)
+
+
+Converter = Callable[[Any], Any]
+
+_object_new = object.__new__
+_object_setattr = object.__setattr__
+
+
+def default_getter(
+    get_default: Callable[[], Any], default: Any, default_factory: Any
+) -> Callable[[], Any]:
+    # Immutable defaults are returned as is by a native callable, anything else is
+    # copied or produced on every call.
+    if default_factory is None and get_default() is default:
+        return itertools.repeat(default).__next__
+    return get_default
+
+
+def _builder(hooks: type[Discriminated], model: Any) -> tuple[Converter, Converter]:
+    # Builders are compiled once per model and stored on it: the first one dispatches
+    # on the type field of discriminated models, the second one builds the model.
+    builders = vars(model).get(Naming.BUILDERS)
+    if builders is not None:
+        return builders
+
+    discriminated = isinstance(model, type) and issubclass(model, DiscriminatedBase)
+    fields: list[tuple[str, str, Optional[Converter]]] = []
+    defaults: list[tuple[str, Callable[[], Any]]] = []
+    for name, alias, annotation, default in hooks._model_fields(model) or []:
+        if discriminated and name == Naming.TYPE_FIELD_NAME:
+            continue
+        fields.append((name, alias, _converter(hooks, annotation)))
+        if default is not None:
+            defaults.append((name, default))
+    slots = hooks._model_slots(model)
+    fields_set_slot, other_slots = slots or ("", ())
+    construct_model = hooks._model_constructor(model)
+    discriminator = model.discriminator() if discriminated else None
+    stores_type = discriminated and not getattr(model, Naming.CLASS_DISCRIMINATOR)
+
+    def build(data: Mapping[str, Any]) -> Any:
+        values = {}
+        for name, alias, converter in fields:
+            if alias in data:
+                value = data[alias]
+            elif name in data:
+                value = data[name]
+            else:
+                continue
+            values[name] = value if converter is None else converter(value)
+        fields_set = set(values)
+        if len(values) < len(fields):
+            for name, default in defaults:
+                if name not in values:
+                    values[name] = default()
+        if stores_type:
+            values[Naming.TYPE_FIELD_NAME] = discriminator
+            fields_set.add(Naming.TYPE_FIELD_NAME)
+        if slots is None:
+            return construct_model(values, fields_set)
+        # Built in place, without calling into the constructor of the model.
+        instance = _object_new(model)
+        _object_setattr(instance, "__dict__", values)
+        _object_setattr(instance, fields_set_slot, fields_set)
+        for slot, value in other_slots:
+            _object_setattr(instance, slot, value)
+        return instance
+
+    if not discriminated:
+        builders = (build, build)
+        setattr(model, Naming.BUILDERS, builders)
+        return builders
+
+    # The builders of the subclasses by discriminator, for the current registry.
+    builds: dict[Any, Converter] = {discriminator: build}
+    index = getattr(model, Naming.INDEX)
+
+    def dispatch(data: Mapping[str, Any]) -> Any:
+        nonlocal builds, index
+        type_ = data.get(
+            Naming.TYPE_FIELD_ALIAS, data.get(Naming.TYPE_FIELD_NAME, discriminator)
+        )
+        if getattr(model, Naming.INDEX) is not index:
+            builds, index = {discriminator: build}, getattr(model, Naming.INDEX)
+        build_other = builds.get(type_)
+        if build_other is None:
+            other_cls = model.get_subclass(type_)
+            if other_cls is None:
+                raise ValueError(f"Unknown discriminator {type_} for {model}")
+            build_other = builds[type_] = _builder(hooks, other_cls)[1]
+        return build_other(data)
+
+    builders = (dispatch, build)
+    setattr(model, Naming.BUILDERS, builders)
+    return builders
+
+
+def _converter(hooks: type[Discriminated], annotation: Any) -> Optional[Converter]:
+    # Nested models are resolved when converting, so recursive models are fine.
+    if hooks._model_fields(annotation) is not None:
+        builder: Optional[Converter] = None
+
+        def convert(value: Any) -> Any:
+            nonlocal builder
+            if type(value) is not dict and not isinstance(value, Mapping):
+                return value
+            if builder is None:
+                builder = _builder(hooks, annotation)[0]
+            return builder(value)
+
+        return convert
+
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is Annotated:
+        return _converter(hooks, args[0])
+    if origin is Union:
+        converters = [_converter(hooks, x) for x in args if x is not type(None)]
+        converters = [x for x in converters if x is not None]
+        return converters[0] if converters else None
+    if origin in (dict, collections.abc.Mapping, collections.abc.MutableMapping):
+        item = _converter(hooks, args[1]) if len(args) == 2 else None
+        if item is None:
+            return None
+        return lambda v: {k: item(x) for k, x in v.items()}
+    if origin is tuple and args and args[-1] is not Ellipsis:
+        items = [_converter(hooks, x) for x in args]
+        if not any(items):
+            return None
+        return lambda v: tuple(x if c is None else c(x) for c, x in zip(items, v))
+    if origin in (list, collections.abc.Sequence):
+        item = _converter(hooks, args[0]) if args else None
+        return None if item is None else lambda v: [item(x) for x in v]
+    if origin in (tuple, set, frozenset):
+        item = _converter(hooks, args[0]) if args else None
+        return None if item is None else lambda v: origin(item(x) for x in v)
+    return None
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Optional
+
+# Upper bounds of the latency histogram buckets, in seconds.
+BUCKETS: tuple[float, ...] = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        bounds = [str(x) for x in BUCKETS] + ["+inf"]
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "buckets": dict(zip(bounds, self.buckets)),
+        }
+
+
+class Metrics:
+    """Per-discriminator counters and latency histograms.
+
+    Events recorded by the library:
+    - latency of "dispatch" (`__new__`), "validate" (`model_validate`/`parse_obj`),
+      "type_field" (pydantic 1 `_validate_type_field`) and "serialize"
+      (`model_dump`/`model_dump_json`/`dict`/`json`), keyed by discriminator.
+    - counts of "unknown" discriminators, of "skipped" records filtered out by
+      discriminator and of registry lookups, as "cache_hit" and "cache_miss" keyed by
+      cache name.
+    """
+
+    def __init__(self) -> None:
+        self.counts: dict[str, dict[str, int]] = {}
+        self.latency: dict[str, dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def count(self, event: str, key: Any, n: int = 1) -> None:
+        with self._lock:
+            counts = self.counts.setdefault(event, {})
+            counts[str(key)] = counts.get(str(key), 0) + n
+
+    def observe(self, event: str, key: Any, seconds: float) -> None:
+        with self._lock:
+            histograms = self.latency.setdefault(event, {})
+            histogram = histograms.get(str(key))
+            if histogram is None:
+                histogram = histograms[str(key)] = Histogram()
+            histogram.observe(seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "counts": {k: dict(v) for k, v in self.counts.items()},
+                "latency": {
+                    k: {key: h.snapshot() for key, h in v.items()}
+                    for k, v in self.latency.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.latency.clear()
+
+
+#! Instrumented code only checks this global, so that disabled metrics cost a single
+#! attribute lookup per call.
+active: Optional[Metrics] = None
+_toggles: list[Callable[[bool], None]] = []
+
+
+def on_toggle(callback: Callable[[bool], None]) -> None:
+    """Registers instrumentation that must be installed only while metrics are on."""
+    _toggles.append(callback)
+    callback(active is not None)
+
+
+def enable(metrics: Optional[Metrics] = None) -> Metrics:
+    global active
+    active = metrics or Metrics()
+    for callback in _toggles:
+        callback(True)
+    return active
+
+
+def disable() -> None:
+    global active
+    active = None
+    for callback in _toggles:
+        callback(False)
+
+
+def snapshot() -> dict[str, Any]:
+    return active.snapshot() if active is not None else {"counts": {}, "latency": {}}
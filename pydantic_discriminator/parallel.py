@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Optional
+
+from pydantic_discriminator.common import BatchResult, DiscriminatedBase, Naming, T
+
+# The import paths registered in this worker, by root class.
+_registered: dict[type, Mapping[str, str]] = {}
+
+
+def _register(cls: type[DiscriminatedBase[Any]], paths: Mapping[str, str]) -> None:
+    # Unpickling cls imported its module, which rebuilt the registry in this worker.
+    # Subclasses defined in other modules, or registered lazily in the parent, are
+    # imported on first dispatch. Runs once per worker and index of the parent.
+    if _registered.get(cls) == paths:
+        return
+    for discriminator, path in paths.items():
+        cls.register_lazy(discriminator, path)
+    _registered[cls] = paths
+
+
+def _validate_shard(
+    cls: type[DiscriminatedBase[Any]],
+    paths: Optional[Mapping[str, str]],
+    records: list[Any],
+    dump: bool,
+) -> BatchResult[Any]:
+    # Workers of pools created here registered the paths when they started.
+    if paths is not None:
+        _register(cls, paths)
+    result = cls.validate_many(records)
+    if dump:
+        dump_fn = "model_dump" if hasattr(cls, "model_dump") else "dict"
+        result.instances = [
+            None if x is None else getattr(x, dump_fn)() for x in result.instances
+        ]
+    return result
+
+
+def validate_parallel(
+    cls: type[DiscriminatedBase[T]],
+    records: Iterable[Any],
+    *,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 10_000,
+    dump: bool = False,
+    executor: Optional[Executor] = None,
+) -> BatchResult[Any]:
+    """Validates records with `validate_many` in shards of `chunk_size`, spread over a
+    process pool.
+
+    The model class is sent to workers by reference, so it must be importable from its
+    module, and so must its subclasses to be dispatched to in workers. Results are
+    aligned with the input order and errors are keyed by the position of the record
+    in the input, regardless of which worker finished first. With `dump=True` workers
+    return the dumped dicts instead of the instances, which are cheaper to send back
+    to the parent.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    paths = _import_paths(cls)
+    if executor is None:
+        with ProcessPoolExecutor(
+            max_workers, initializer=_register, initargs=(cls, paths)
+        ) as pool:
+            return _validate_shards(
+                cls, records, chunk_size, dump, pool, max_workers, None
+            )
+    return _validate_shards(
+        cls, records, chunk_size, dump, executor, max_workers, paths
+    )
+
+
+def _validate_shards(
+    cls: type[DiscriminatedBase[T]],
+    records: Iterable[Any],
+    chunk_size: int,
+    dump: bool,
+    executor: Executor,
+    max_workers: Optional[int],
+    paths: Optional[Mapping[str, str]],
+) -> BatchResult[Any]:
+    result: BatchResult[Any] = BatchResult([])
+    workers = max_workers or os.cpu_count() or 1
+    shards = _map_shards(cls, records, chunk_size, dump, executor, workers, paths)
+    for offset, shard in shards:
+        result.instances.extend(shard.instances)
+        for i, errors in sorted(shard.errors.items()):
+            result.errors[offset + i] = errors
+    return result
+
+
+def _import_paths(cls: type[DiscriminatedBase[Any]]) -> dict[str, str]:
+    # The whole index of the parent, as "module:qualname" import paths. Classes defined
+    # in functions cannot be imported, and are left to the registry of the worker.
+    paths = dict(getattr(cls, Naming.LAZY_INDEX))
+    for discriminator, subclass in cls.get_registry_recur().items():
+        if "<locals>" not in subclass.__qualname__:
+            paths[discriminator] = f"{subclass.__module__}:{subclass.__qualname__}"
+    return paths
+
+
+def _map_shards(
+    cls: type[DiscriminatedBase[Any]],
+    records: Iterable[Any],
+    chunk_size: int,
+    dump: bool,
+    executor: Executor,
+    workers: int,
+    paths: Optional[Mapping[str, str]],
+) -> Iterator[tuple[int, BatchResult[Any]]]:
+    # Only a bounded number of shards is in flight, so that huge inputs are not
+    # materialized all at once, and shards are yielded in input order.
+    max_in_flight = 2 * workers
+    in_flight: deque[tuple[int, Future[BatchResult[Any]]]] = deque()
+    iterator = iter(records)
+    offset = 0
+    while True:
+        while len(in_flight) < max_in_flight:
+            shard = list(islice(iterator, chunk_size))
+            if not shard:
+                break
+            future = executor.submit(_validate_shard, cls, paths, shard, dump)
+            in_flight.append((offset, future))
+            offset += len(shard)
+        if not in_flight:
+            return
+        shard_offset, future = in_flight.popleft()
+        yield shard_offset, future.result()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import codecs
+import json
+import os
+import re
+from collections.abc import Callable, Iterator
+from typing import IO, Any, Generic, Literal, Optional, Union
+
+from pydantic_discriminator.common import DiscriminatedBase, Discriminators, T
+
+Source = Union[str, "os.PathLike[str]", IO[str], IO[bytes]]
+ErrorPolicy = Literal["raise", "skip", "collect"]
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+# Strings, an unterminated string, and the characters delimiting array elements.
+_TOKENS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|"|[][{},]', re.DOTALL)
+_NO_RECORD = object()
+
+
+class StreamError(ValueError):
+    def __init__(self, index: int, errors: list[dict[str, Any]]) -> None:
+        super().__init__(f"Invalid record at index {index}: {errors}")
+        self.index = index
+        self.errors = errors
+
+
+class ModelStream(Generic[T]):
+    """Incrementally reads discriminated models from NDJSON or a top-level JSON array.
+
+    Only one chunk of the source and one batch of records are held in memory at a
+    time. Records are validated in batches with `validate_many`, invalid records are
+    handled according to `on_error`: "raise" raises a `StreamError`, "skip" drops
+    them and "collect" drops them and appends a `StreamError` to `errors`.
+
+    Records whose discriminator is not in `include` or is in `exclude` are dropped
+    before validation. With `include`, NDJSON lines that cannot hold any of the
+    included discriminators are dropped before being decoded.
+    """
+
+    def __init__(
+        self,
+        cls: type[DiscriminatedBase[T]],
+        source: Source,
+        *,
+        batch_size: int = 1024,
+        on_error: ErrorPolicy = "raise",
+        chunk_size: int = 1 << 16,
+        include: Discriminators = None,
+        exclude: Discriminators = None,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        if on_error not in ("raise", "skip", "collect"):
+            raise ValueError(f"Unknown error policy {on_error}")
+        self.cls = cls
+        self.source = source
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.chunk_size = chunk_size
+        self.include = include
+        self.exclude = exclude
+        self.errors: list[StreamError] = []
+
+    def __iter__(self) -> Iterator[T]:
+        for batch in self.batches():
+            yield from batch
+
+    def batches(self) -> Iterator[list[T]]:
+        batch: list[tuple[int, Any]] = []
+        for item in self._records():
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield self._validate(batch)
+                batch = []
+        if batch:
+            yield self._validate(batch)
+
+    def _validate(self, batch: list[tuple[int, Any]]) -> list[T]:
+        # Records that could not be decoded reach this point as `StreamError`s, so
+        # that errors are reported in stream order.
+        failed = {i: x for i, x in batch if isinstance(x, StreamError)}
+        valid = [(i, x) for i, x in batch if i not in failed]
+        result = self.cls.validate_many(
+            [x for _, x in valid], include=self.include, exclude=self.exclude
+        )
+        for j, errors in result.errors.items():
+            failed[valid[j][0]] = StreamError(valid[j][0], errors)
+        for i in sorted(failed):
+            self._fail(failed[i])
+        return [x for x in result.instances if x is not None]
+
+    def _fail(self, error: StreamError) -> None:
+        if self.on_error == "raise":
+            raise error
+        if self.on_error == "collect":
+            self.errors.append(error)
+
+    def _records(self) -> Iterator[tuple[int, Any]]:
+        keep = self._prefilter()
+        if isinstance(self.source, (str, os.PathLike)):
+            with open(self.source, "rb") as fp:
+                yield from _parse(_read_chunks(fp, self.chunk_size), keep)
+        else:
+            yield from _parse(_read_chunks(self.source, self.chunk_size), keep)
+
+    def _prefilter(self) -> Optional[Callable[[str], bool]]:
+        # An included record holds its discriminator as a JSON string, unless it has
+        # none and defaults to the root. Lines with escapes are always decoded.
+        if self.include is None or self.cls.discriminator() in self.include:
+            return None
+        needles = [json.dumps(x, ensure_ascii=False) for x in self.include]
+        return lambda line: "\\" in line or any(x in line for x in needles)
+
+
+def read_models(
+    cls: type[DiscriminatedBase[T]],
+    source: Source,
+    *,
+    batch_size: int = 1024,
+    on_error: ErrorPolicy = "raise",
+    chunk_size: int = 1 << 16,
+    include: Discriminators = None,
+    exclude: Discriminators = None,
+) -> ModelStream[T]:
+    return ModelStream(
+        cls,
+        source,
+        batch_size=batch_size,
+        on_error=on_error,
+        chunk_size=chunk_size,
+        include=include,
+        exclude=exclude,
+    )
+
+
+def _read_chunks(fp: IO[Any], chunk_size: int) -> Iterator[str]:
+    decoder = None
+    while chunk := fp.read(chunk_size):
+        if isinstance(chunk, bytes):
+            decoder = decoder or codecs.getincrementaldecoder("utf-8-sig")()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        yield decoder.decode(b"", final=True)
+
+
+def _parse(
+    chunks: Iterator[str], keep: Optional[Callable[[str], bool]] = None
+) -> Iterator[tuple[int, Any]]:
+    buffer = ""
+    for buffer in chunks:
+        buffer = buffer.lstrip()
+        if buffer:
+            break
+    if buffer.startswith("["):
+        yield from _parse_array(buffer[1:], chunks)
+    else:
+        yield from _parse_lines(buffer, chunks, keep)
+
+
+def _parse_lines(
+    buffer: str, chunks: Iterator[str], keep: Optional[Callable[[str], bool]] = None
+) -> Iterator[tuple[int, Any]]:
+    index = 0
+    eof = False
+    while not eof:
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            lines, buffer = buffer.split("\n"), ""
+        else:
+            *lines, buffer = (buffer + chunk).split("\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            if keep is not None and not keep(line):
+                index += 1
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError as e:
+                error = {"type": "json_invalid", "loc": (), "msg": str(e)}
+                yield index, StreamError(index, [{**error, "input": line}])
+            index += 1
+
+
+def _parse_array(buffer: str, chunks: Iterator[str]) -> Iterator[tuple[int, Any]]:
+    decoder = json.JSONDecoder()
+    index = 0
+    pos = 0
+    eof = False
+    while True:
+        # Each step reads one element and the comma or bracket following it.
+        pos = _WHITESPACE.match(buffer, pos).end()  # type: ignore[union-attr]
+        if index == 0 and buffer.startswith("]", pos):
+            return
+        record, end = _NO_RECORD, pos
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            pass
+        end = _WHITESPACE.match(buffer, end).end()  # type: ignore[union-attr]
+        # A number at the end of the buffer may continue in the next chunk, and an
+        # element that cannot be decoded is delimited without decoding it.
+        if record is _NO_RECORD or end == len(buffer) or buffer[end] not in ",]":
+            element_end = _element_end(buffer, pos, index)
+            if element_end is None:
+                if eof:
+                    raise ValueError(f"Truncated JSON array after {index} records")
+                chunk = next(chunks, None)
+                eof = chunk is None
+                buffer, pos = buffer[pos:] + (chunk or ""), 0
+                continue
+            end = element_end
+            try:
+                record = json.loads(buffer[pos:end])
+            except ValueError as e:
+                error = {"type": "json_invalid", "loc": (), "msg": str(e)}
+                text = buffer[pos:end].strip()
+                record = StreamError(index, [{**error, "input": text}])
+        yield index, record
+        index += 1
+        if buffer[end] == "]":
+            return
+        pos = end + 1
+
+
+def _element_end(buffer: str, pos: int, index: int) -> Optional[int]:
+    # The position of the comma or bracket ending the element starting at pos, or None
+    # if the element continues past the end of the buffer.
+    stack: list[str] = []
+    for match in _TOKENS.finditer(buffer, pos):
+        token = match.group()
+        if token == '"':
+            return None
+        if token in "[{":
+            stack.append(token)
+        elif token in "]}":
+            if not stack and token == "]":
+                return match.start()
+            if not stack or "[{"["]}".index(token)] != stack.pop():
+                raise ValueError(f"Malformed JSON array at record {index}")
+        elif token == "," and not stack:
+            return match.start()
+    return None
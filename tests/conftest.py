@@ -24,3 +24,21 @@ def dump_fn() -> Callable[[BaseModel], dict]:
     elif parse(pyd.__version__).major < 3:
         return lambda x: x.model_dump  # type: ignore
     raise NotImplementedError("pydantic version not supported")
+
+
+@fixture(scope="session")
+def parse_json_fn() -> Callable[[type[BaseModel]], BaseModel]:
+    if parse(pyd.__version__).major < 2:
+        return lambda x: x.parse_raw  # type: ignore
+    elif parse(pyd.__version__).major < 3:
+        return lambda x: x.model_validate_json  # type: ignore
+    raise NotImplementedError("pydantic version not supported")
+
+
+@fixture(scope="session")
+def dump_json_fn() -> Callable[[BaseModel], str]:
+    if parse(pyd.__version__).major < 2:
+        return lambda x: x.json  # type: ignore
+    elif parse(pyd.__version__).major < 3:
+        return lambda x: x.model_dump_json  # type: ignore
+    raise NotImplementedError("pydantic version not supported")
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import copy
+import json
+
 import pytest
 from deepdiff import DeepDiff
 
@@ -484,13 +487,22 @@ expected = Client(
         ],
     ],
 )
-def test_discriminated_base_model(parse_fn, dump_fn, code, dict_data):
+def test_discriminated_base_model(
+    parse_fn, dump_fn, parse_json_fn, dump_json_fn, code, dict_data
+):
     exec(code)
     client_cls = locals()["expected"].__class__
+    snapshot = copy.deepcopy(dict_data)
     example = parse_fn(client_cls)(dict_data)
     assert example == locals()["expected"]
+    assert dict_data == snapshot
     assert not DeepDiff(dump_fn(example)(), dict_data, ignore_order=True)
 
+    json_data = json.dumps(dict_data)
+    example = parse_json_fn(client_cls)(json_data.encode())
+    assert example == locals()["expected"]
+    assert json.loads(dump_json_fn(example)()) == json.loads(json_data)
+
 
 def test_fail_unknown_discriminator():
     with pytest.raises(ValueError):
@@ -507,11 +519,39 @@ def test_typefield_in_parse(parse_fn):
     assert isinstance(circle, Circle)
 
 
+def test_typefield_in_parse_does_not_mutate(parse_fn):
+    data = {
+        "type_": "cat",
+        "name": "Tom",
+        "age": 3,
+        "color": "grey",
+        "meow_pitch": 1.0,
+        "purrosity": 1.0,
+    }
+    snapshot = copy.deepcopy(data)
+    assert isinstance(parse_fn(Animal)(data), Cat)
+    assert data == snapshot
+
+    class Client(BaseModel):
+        animals: list[Animal]
+
+    data = {"animals": [snapshot, {**snapshot, "type_": "mammal"}]}
+    snapshot = copy.deepcopy(data)
+    parse_fn(Client)(data)
+    assert data == snapshot
+
+
 def test_typefield_in_constructor():
     circle = Circle(type_="circle", position=(0.0, 0.0), radius=1.0)
     assert isinstance(circle, Circle)
 
 
+def test_typefield_in_parse_json(parse_json_fn):
+    data = '{"type_": "circle", "position": [0.0, 0.0], "radius": 1.0}'
+    circle = parse_json_fn(Shape)(data)
+    assert isinstance(circle, Circle)
+
+
 def test_alias_in_parse(parse_fn):
     circle = parse_fn(Shape)({"type": "circle", "position": (0.0, 0.0), "radius": 1.0})
     assert isinstance(circle, Circle)
@@ -525,3 +565,28 @@ def test_alias_in_constructor():
 def test_parse_invalid_stuff(parse_fn):
     with pytest.raises((ValueError, TypeError)):
         parse_fn(Circle)(1)
+
+
+def test_type_field_reserved():
+    with pytest.raises(TypeError):
+
+        class Hexagon(Shape):
+            type_: str = "hexagon"
+
+    with pytest.raises(TypeError):
+
+        class Pentagon(Shape):
+            type_ = "pentagon"
+
+
+def test_shared_namespace():
+    namespace = {"__annotations__": {"sides": int}}
+    first = type("Pentagon", (Shape,), namespace, discriminator="pentagon_shared")
+    second = type("Hexagon", (Shape,), namespace, discriminator="hexagon_shared")
+    try:
+        assert namespace == {"__annotations__": {"sides": int}}
+        assert first(position=(0, 0), sides=5).type_ == "pentagon_shared"
+        assert second(position=(0, 0), sides=6).type_ == "hexagon_shared"
+    finally:
+        Shape.unregister("pentagon_shared")
+        Shape.unregister("hexagon_shared")
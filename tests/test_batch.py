@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from tests.test_base import Animal, Cat, Circle, Shape, Snake, Square
+
+
+def test_validate_many():
+    records = [
+        {"type": "circle", "position": (0.0, 0.0), "radius": 1.0},
+        {"type_": "square", "position": (1.0, 1.0), "side": 2.0},
+        {"position": (2.0, 2.0)},
+        {"type": "circle", "position": (3.0, 3.0), "radius": 3.0},
+    ]
+    result = Shape.validate_many(records)
+    assert result.errors == {}
+    assert result.instances == [
+        Circle(position=(0.0, 0.0), radius=1.0),
+        Square(position=(1.0, 1.0), side=2.0),
+        Shape(position=(2.0, 2.0)),
+        Circle(position=(3.0, 3.0), radius=3.0),
+    ]
+
+
+def test_validate_many_deep():
+    records = [
+        {
+            "type": "cat",
+            "name": "Tom",
+            "age": 3,
+            "color": "grey",
+            "meow_pitch": 1.0,
+            "purrosity": 1.0,
+        },
+        {"type": "snake", "name": "Kaa", "age": 9, "length": 5.0, "killcount": 2},
+    ]
+    result = Animal.validate_many(iter(records))
+    assert [type(x) for x in result.instances] == [Cat, Snake]
+
+
+def test_validate_many_collects_errors():
+    records = [
+        {"type": "circle", "position": (0.0, 0.0), "radius": 1.0},
+        {"type": "triangle", "position": (0.0, 0.0)},
+        {"type": "circle", "position": (0.0, 0.0), "radius": "big"},
+        {"type": "square", "position": (0.0, 0.0)},
+        {"type": "circle", "position": (1.0, 1.0), "radius": 2.0},
+    ]
+    result = Shape.validate_many(records)
+    assert result.instances == [
+        Circle(position=(0.0, 0.0), radius=1.0),
+        None,
+        None,
+        None,
+        Circle(position=(1.0, 1.0), radius=2.0),
+    ]
+    assert sorted(result.errors) == [1, 2, 3]
+    assert [e["loc"] for e in result.errors[1]] == [("type",)]
+    assert [e["loc"] for e in result.errors[2]] == [("radius",)]
+    assert [e["loc"] for e in result.errors[3]] == [("side",)]
+
+
+def test_validate_many_unhashable_type():
+    records = [
+        {"type": ["circle"], "position": (0.0, 0.0), "radius": 1.0},
+        {"type": {"circle": 1}, "position": (0.0, 0.0), "radius": 1.0},
+        {"type": "circle", "position": (0.0, 0.0), "radius": 1.0},
+    ]
+    result = Shape.validate_many(records)
+    assert result.instances[:2] == [None, None]
+    assert sorted(result.errors) == [0, 1]
+    assert Shape.validate_many(records, exclude={"square"}).instances[2] is not None
+    assert Shape.validate_many(records, include={"circle"}).errors == {}
+
+
+def test_validate_many_filtered():
+    records = [
+        {"type": "circle", "position": (0.0, 0.0), "radius": 1.0},
+        {"type": "square", "position": (0.0, 0.0)},
+        {"type": "triangle", "position": (0.0, 0.0)},
+        {"position": (2.0, 2.0)},
+    ]
+    result = Shape.validate_many(records, include={"circle", "shape"})
+    assert result.instances == [
+        Circle(position=(0.0, 0.0), radius=1.0),
+        None,
+        None,
+        Shape(position=(2.0, 2.0)),
+    ]
+    assert result.errors == {}
+    result = Shape.validate_many(records, exclude={"circle", "triangle"})
+    assert result.instances == [None, None, None, Shape(position=(2.0, 2.0))]
+    assert list(result.errors) == [1]
+
+    assert Shape.validate_filtered(records[1], exclude=["square"]) is None
+    assert Shape.validate_filtered(records[0], include=["circle"]) == Circle(
+        position=(0.0, 0.0), radius=1.0
+    )
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+import pydantic_discriminator.cache
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.cache import load_registry, save_registry
+
+
+class Widget(DiscriminatedBaseModel):
+    name: str
+
+
+MODULES = ("cached_button", "cached_slider")
+
+
+@pytest.fixture
+def widgets(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.syspath_prepend(str(tmp_path / "src"))
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "cached_style.py").write_text(
+        "from pydantic import BaseModel\n\n\nclass Style(BaseModel):\n"
+        "    color: str = ''\n"
+    )
+    for module in MODULES:
+        name = module.split("_")[1]
+        (tmp_path / "src" / f"{module}.py").write_text(
+            "from cached_style import Style\n"
+            "from tests.test_cache import Widget\n\n\n"
+            f"class {name.title()}(Widget, discriminator={name!r}):\n"
+            "    size: int = 0\n"
+            "    styles: list[Style] = []\n"
+        )
+        importlib.import_module(module)
+    yield tmp_path
+    for discriminator in list(Widget.get_registry_recur()):
+        Widget.unregister(discriminator)
+    for discriminator in list(Widget.__pyd_discriminator_lazy_index__):  # type: ignore
+        Widget.unregister(discriminator)
+    for module in (*MODULES, "cached_style"):
+        sys.modules.pop(module, None)
+
+
+def _restart() -> None:
+    # Drops the subclasses, as if in a new process that only imported the root.
+    for discriminator in list(Widget.get_registry_recur()):
+        Widget.unregister(discriminator)
+    for module in (*MODULES, "cached_style"):
+        sys.modules.pop(module, None)
+
+
+def test_registry_cache(widgets: Path, parse_fn):
+    saved = save_registry(Widget, widgets / "cache")
+    assert saved.registry == {
+        "button": "cached_button:Button",
+        "slider": "cached_slider:Slider",
+    }
+    assert set(saved.sources) == {"tests.test_cache", "cached_style", *MODULES}
+
+    _restart()
+    loaded = load_registry(Widget, widgets / "cache")
+    assert loaded == saved
+    assert "cached_button" not in sys.modules
+    assert type(parse_fn(Widget)({"type": "slider", "name": "s"})).__name__ == "Slider"
+    assert "cached_slider" in sys.modules and "cached_button" not in sys.modules
+
+
+def test_registry_cache_invalidation(widgets: Path, monkeypatch: pytest.MonkeyPatch):
+    assert load_registry(Widget, widgets / "cache") is None
+    save_registry(Widget, widgets / "cache")
+
+    _restart()
+    with monkeypatch.context() as m:
+        m.setattr(pydantic_discriminator.cache.pydantic, "VERSION", "0.0")
+        assert load_registry(Widget, widgets / "cache") is None
+    source = widgets / "src" / "cached_slider.py"
+    source.write_text(source.read_text() + "    color: str = ''\n")
+    assert load_registry(Widget, widgets / "cache") is None
+    assert Widget.get_subclass("button") is None
+
+    (widgets / "cache" / "tests.test_cache.Widget.json").write_text("{")
+    assert load_registry(Widget, widgets / "cache") is None
+
+
+def test_registry_cache_field_types(widgets: Path):
+    # Modules only defining the types of fields also shape the subclasses.
+    save_registry(Widget, widgets / "cache")
+    _restart()
+    source = widgets / "src" / "cached_style.py"
+    source.write_text(source.read_text() + "    width: int = 0\n")
+    assert load_registry(Widget, widgets / "cache") is None
+
+
+def test_registry_cache_not_importable(widgets: Path):
+    class Local(Widget):
+        pass
+
+    with pytest.raises(ValueError):
+        save_registry(Widget, widgets / "cache")
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pickle
+
+import pytest
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.codec import Codec
+
+
+class Event(DiscriminatedBaseModel, class_discriminator=True):
+    id: int
+
+
+class Click(Event):
+    x: float
+    y: float
+
+
+class Key(Event, discriminator="key_press"):
+    key: str
+
+
+class Log(BaseModel):
+    events: list[Event]
+
+
+def test_class_discriminator_not_stored(parse_fn):
+    click = parse_fn(Event)({"type": "click", "id": 1, "x": 0.5, "y": 1.5})
+    assert isinstance(click, Click)
+    assert click.type_ == "click"
+    assert Click.type_ == "click" and Key.type_ == "key_press"
+    assert "type_" not in click.__dict__
+    assert Click(id=1, x=0, y=0).type_ == "click"
+
+
+def test_class_discriminator_dump(parse_fn, dump_fn, parse_json_fn, dump_json_fn):
+    log = Log(events=[Click(id=1, x=0.5, y=1.5), Key(id=2, key="a")])
+    data = dump_fn(log)()
+    assert [x["type"] for x in data["events"]] == ["click", "key_press"]
+    assert parse_fn(Log)(data) == log
+    assert parse_json_fn(Log)(dump_json_fn(log)()) == log
+    assert dump_fn(log.events[0])(include={"type", "id"}) == {"type": "click", "id": 1}
+    assert "type" not in dump_fn(log.events[0])(exclude={"type"})
+
+
+def test_class_discriminator_helpers():
+    click = Click(id=1, x=0.5, y=1.5)
+    assert pickle.loads(pickle.dumps(click)) == click
+    assert Event.construct_polymorphic({"type": "click", "id": 1, "x": 0, "y": 0})
+    result = Event.validate_many([{"type": "key_press", "id": 1, "key": "a"}])
+    assert type(result.instances[0]) is Key
+    codec = Codec(Event)
+    assert codec.decode(codec.encode(click)) == click
+
+
+def test_class_discriminator_invalid():
+    with pytest.raises(TypeError):
+
+        class Tap(Click, class_discriminator=False):
+            pass
+
+    with pytest.raises(TypeError):
+
+        class Strict(DiscriminatedBaseModel, class_discriminator=True, extra="forbid"):
+            pass
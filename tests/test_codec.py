@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import math
+
+import pytest
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.codec import Codec
+from tests.test_base import Animal, Cat, Circle, Snake
+from tests.test_pickle import Zoo
+
+
+def _zoo() -> Zoo:
+    return Zoo(
+        animals=[
+            Cat(name="Tom", age=3, color="grey", meow_pitch=1.0, purrosity=0.1),
+            Animal(type="snake", name="Kaa", age=-9, length=5.0, killcount=300),
+        ],
+        shapes={"c": Circle(position=(0.0, 0.0), radius=1e300)},
+    )
+
+
+def test_codec_roundtrip(parse_fn, dump_json_fn):
+    zoo = _zoo()
+    codec = Codec(Animal)
+    data = codec.encode(zoo)
+    assert len(data) < len(dump_json_fn(zoo)())
+    assert b"snake" not in data
+
+    for validate in (True, False):
+        loaded = parse_fn(Zoo)(codec.decode(data, validate=validate))
+        assert loaded == zoo
+        assert [type(x) for x in loaded.animals] == [Cat, Snake]
+
+    assert codec.decode(codec.encode(zoo.animals[1])) == zoo.animals[1]
+
+
+def test_codec_values():
+    codec = Codec(Animal)
+    values = [
+        None,
+        True,
+        [0, 127, 128, -32, -33, 2**16, -(2**40), 2**64 - 1],
+        [0.5, 0.1, -1e300, math.inf],
+        ["", "x" * 40, "é" * 40_000, b"\x00" * 300],
+        {str(i): list(range(i)) for i in range(20)},
+    ]
+    assert codec.decode(codec.encode(values)) == values
+    with pytest.raises(ValueError):
+        codec.encode(2**64)
+    with pytest.raises(ValueError):
+        codec.decode(codec.encode(1) + b"\x00")
+
+
+def test_codec_tags():
+    codec = Codec(Animal)
+    tags = codec.tags
+    assert sorted(tags.values()) == list(range(len(tags)))
+    assert tags["animal"] == 0
+
+    class Hamster(Cat, discriminator="hamster_codec"):
+        pass
+
+    hamster = Hamster(name="Ham", age=1, color="brown", meow_pitch=0, purrosity=0)
+    data = codec.encode(hamster)
+    assert codec.tags["hamster_codec"] == len(tags)
+
+    # A codec of another version of the hierarchy decodes with the exported tags.
+    shuffled = dict(zip(codec.tags, reversed(codec.tags.values())))
+    other = Codec(Animal, tags=json.loads(json.dumps(shuffled)))
+    assert other.decode(other.encode(hamster)) == hamster
+    assert other.encode(hamster) != data
+    assert Codec(Animal, tags=codec.tags).decode(data) == hamster
+
+    with pytest.raises(ValueError):
+        Codec(Animal, tags={"cat": 1, "snake": 1})
+    with pytest.raises(ValueError, match="Unknown tag"):
+        codec.decode(b"\xc7\x03\x01\xcc\xc8\x80")
+
+
+def test_codec_other_hierarchy():
+    class Event(DiscriminatedBaseModel):
+        animal: Animal
+
+    class Meow(Event):
+        pitch: float
+
+    cat = Cat(name="Tom", age=3, color="g", meow_pitch=1, purrosity=1)
+    meow = Meow(animal=cat, pitch=2.0)
+    data = Codec(Animal).encode(meow)
+    assert b"meow" in data and b"cat" not in data
+    assert Codec(Event).decode(Codec(Event).encode(meow)) == meow
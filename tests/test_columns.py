@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import pytest
+from pydantic import BaseModel
+
+from pydantic_discriminator.columns import from_columns, to_columns
+from tests.test_base import AnotherCat, Cat, Circle, Rectangle, Shape, Square
+
+if hasattr(BaseModel, "model_validate"):
+    from pydantic import model_validator
+else:
+    from pydantic import root_validator
+
+
+def _shapes() -> list:
+    return [
+        Circle(position=(0, 1), radius=1),
+        Square(position=(2, 3), side=2),
+        Circle(position=(4, 5), radius=3),
+        Rectangle(position=(6, 7), width=1, height=2),
+    ]
+
+
+def test_to_columns_lists():
+    shapes = _shapes()
+    columns = to_columns(shapes, numpy=False)
+    assert columns.tables == {
+        "circle": {"position": [(0, 1), (4, 5)], "radius": [1, 3]},
+        "square": {"position": [(2, 3)], "side": [2]},
+        "rectangle": {"position": [(6, 7)], "width": [1], "height": [2]},
+    }
+    assert columns.index == {"circle": [0, 2], "square": [1], "rectangle": [3]}
+    for discriminator, positions in columns.index.items():
+        table = columns.tables[discriminator]
+        assert [shapes[i].position for i in positions] == table["position"]
+
+
+def test_to_columns_numpy():
+    np = pytest.importorskip("numpy")
+    columns = to_columns(_shapes())
+    circles = columns.tables["circle"]
+    assert circles["radius"].dtype == np.float64
+    assert circles["position"].shape == (2, 2)
+    assert columns.index["circle"].tolist() == [0, 2]
+
+    cats = [
+        Cat(name="Tom", age=age, color="grey", meow_pitch=1, purrosity=1)
+        for age in (3, 4)
+    ]
+    cats = to_columns(cats).tables["cat"]
+    assert cats["name"].tolist() == ["Tom", "Tom"]
+    assert cats["age"].tolist() == [3, 4]
+
+
+def test_to_columns_invalid():
+    cat = Cat(name="Tom", age=3, color="grey", meow_pitch=1, purrosity=1)
+    with pytest.raises(ValueError):
+        to_columns([cat, AnotherCat(name="Tom", owner="Jerry")])
+    with pytest.raises(TypeError):
+        to_columns([cat, {"type": "cat"}])
+
+
+def test_from_columns(parse_fn):
+    shapes = _shapes()
+    columns = to_columns(shapes, numpy=False)
+    assert from_columns(Shape, columns.tables, columns.index) == shapes
+    assert from_columns(Shape, columns.tables, validate=False) == [
+        shapes[0],
+        shapes[2],
+        shapes[1],
+        shapes[3],
+    ]
+    circles = from_columns(
+        Shape, {"circle": {"position": [["0", 1]], "radius": ["2.5"]}}
+    )
+    assert circles == [Circle(position=(0, 1), radius=2.5)]
+
+    with pytest.raises(ValueError):
+        from_columns(Shape, {"circle": {"position": [(0, 1)], "radius": ["x"]}})
+    with pytest.raises(ValueError):
+        from_columns(Shape, {"circle": {"position": [(0, 1)], "radius": []}})
+    with pytest.raises(ValueError):
+        from_columns(Shape, {"circle": {"position": [(0, 1)]}})
+    with pytest.raises(ValueError):
+        from_columns(Shape, {"hexagon": {"position": [(0, 1)]}})
+
+
+def test_from_columns_numpy():
+    np = pytest.importorskip("numpy")
+    tables = {"circle": {"position": np.zeros((3, 2)), "radius": np.arange(3.0)}}
+    circles = from_columns(Shape, tables)
+    assert [x.radius for x in circles] == [0, 1, 2]
+    assert all(type(x.radius) is float for x in circles)
+
+
+def test_from_columns_row_validators():
+    class Positive(Shape, discriminator="positive_columns"):
+        side: float
+
+        if hasattr(BaseModel, "model_validate"):
+
+            @model_validator(mode="after")
+            def _check(self):
+                assert self.side > 0
+                return self
+
+        else:
+
+            @root_validator(skip_on_failure=True)
+            def _check(cls, values):
+                assert values["side"] > 0
+                return values
+
+    tables = {"positive_columns": {"position": [(0, 0)], "side": [1]}}
+    assert from_columns(Shape, tables)[0].side == 1
+    with pytest.raises(ValueError):
+        from_columns(Shape, {"positive_columns": {"position": [(0, 0)], "side": [0]}})
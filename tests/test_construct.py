@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import copy
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from tests.test_base import Animal, Circle, Shape, Snake, Square
+
+
+class Layer(BaseModel):
+    name: str
+    shapes: dict[str, Shape]
+
+
+class Document(DiscriminatedBaseModel):
+    title: str
+
+
+class Drawing(Document, discriminator="drawing"):
+    shapes: list[Shape]
+    layers: tuple[Layer, ...] = ()
+    pet: Optional[Animal] = None
+    children: list[Document] = []
+
+
+DATA = {
+    "type": "drawing",
+    "title": "root",
+    "shapes": [
+        {"type": "circle", "position": (0.0, 0.0), "radius": 1.0},
+        {"type_": "square", "position": (1.0, 1.0), "side": 2.0},
+    ],
+    "layers": ({"name": "top", "shapes": {"a": {"position": (2.0, 2.0)}}},),
+    "pet": {"type": "snake", "name": "Kaa", "age": 9, "length": 5.0, "killcount": 2},
+    "children": [{"type": "drawing", "title": "child", "shapes": []}],
+}
+
+
+def test_construct_polymorphic(parse_fn):
+    obj = Document.construct_polymorphic(DATA)
+    assert isinstance(obj, Drawing)
+    assert [type(x) for x in obj.shapes] == [Circle, Square]
+    assert type(obj.layers[0].shapes["a"]) is Shape
+    assert isinstance(obj.pet, Snake)
+    assert isinstance(obj.children[0], Drawing)
+    assert obj.type_ == "drawing"
+    assert obj.shapes[1].type_ == "square"
+    assert obj == parse_fn(Document)(copy.deepcopy(DATA))
+
+
+def test_construct_polymorphic_does_not_validate():
+    obj = Shape.construct_polymorphic({"type": "circle", "radius": "not a float"})
+    assert isinstance(obj, Circle)
+    assert obj.radius == "not a float"
+
+
+def test_construct_polymorphic_unknown():
+    with pytest.raises(ValueError):
+        Shape.construct_polymorphic({"type": "hexagon"})
+
+
+def test_construct_polymorphic_registry_changes():
+    data = {"type": "triangle", "position": (0.0, 0.0)}
+    with pytest.raises(ValueError):
+        Shape.construct_polymorphic(data)
+
+    class Triangle(Shape):
+        pass
+
+    assert type(Shape.construct_polymorphic(data)) is Triangle
+    Shape.unregister("triangle")
+    with pytest.raises(ValueError):
+        Shape.construct_polymorphic(data)
+
+
+def test_construct_polymorphic_defaults():
+    first = Drawing.construct_polymorphic({"title": "a", "shapes": []})
+    second = Drawing.construct_polymorphic({"title": "b", "shapes": []})
+    assert first.children == [] and first.children is not second.children
+    assert first.pet is None and first.layers == ()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import copy
+import io
+import json
+import pickle
+
+import pydantic as pyd
+import pytest
+from packaging.version import parse
+from pydantic import BaseModel, ValidationError
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from pydantic_discriminator.codec import Codec
+from pydantic_discriminator.columns import to_columns
+from pydantic_discriminator.common import Naming
+from pydantic_discriminator.stream import read_models
+
+
+class Item(DiscriminatedBaseModel, deferred=True):
+    id: int
+
+
+class Book(Item):
+    pages: int
+    related: list[Item] = []
+
+
+class Pen(Item):
+    color: str
+
+
+class Shelf(BaseModel):
+    items: list[Item]
+
+
+class Tag(DiscriminatedBaseModel, deferred=True, frozen=True):
+    name: str
+
+
+class Label(Tag, frozen=True):
+    color: str = "white"
+
+
+def _is_deferred(model: Item) -> bool:
+    return Naming.RAW_DATA in model.__dict__
+
+
+def test_deferred_dispatch(parse_fn):
+    shelf = parse_fn(Shelf)(
+        {
+            "items": [
+                {"type": "book", "id": "1", "pages": "10"},
+                {"type": "pen", "id": "oops"},
+            ]
+        }
+    )
+    book, pen = shelf.items
+    assert [type(book), type(pen)] == [Book, Pen]
+    assert _is_deferred(book) and _is_deferred(pen)
+    assert book.type_ == "book" and _is_deferred(book)
+
+    assert book.pages == 10 and book.id == 1
+    assert not _is_deferred(book)
+    with pytest.raises(ValidationError):
+        pen.id
+    with pytest.raises(ValidationError):
+        pen.materialize()
+    assert _is_deferred(pen)
+
+    with pytest.raises(ValidationError):
+        parse_fn(Shelf)({"items": [{"type": "hexagon"}]})
+
+
+def test_deferred_nested(parse_fn, parse_json_fn, dump_fn, dump_json_fn):
+    data = {
+        "type": "book",
+        "id": 1,
+        "pages": 10,
+        "related": [{"type": "pen", "id": 2, "color": "red"}],
+    }
+    json_data = dump_json_fn(Book(**data))()
+    for book in (parse_fn(Item)(data), parse_json_fn(Item)(json_data)):
+        assert type(book) is Book and _is_deferred(book)
+        assert book.materialize() is book
+        assert _is_deferred(book.related[0])
+        assert dump_fn(book)() == data
+        assert not _is_deferred(book.related[0])
+
+
+def test_deferred_methods(parse_fn, dump_json_fn):
+    data = {"type": "pen", "id": 2, "color": "red"}
+    pen = Pen(id=2, color="red")
+    for fn in (
+        lambda x: x,
+        lambda x: pickle.loads(pickle.dumps(x)),
+        copy.copy,
+        copy.deepcopy,
+        lambda x: Codec(Item).decode(Codec(Item).encode(x)),
+    ):
+        assert fn(parse_fn(Item)(data)) == pen
+        assert pen == fn(parse_fn(Item)(data))
+    assert repr(parse_fn(Item)(data)) == repr(pen)
+    shelf = Shelf(items=[parse_fn(Item)(data)])
+    assert dump_json_fn(shelf)() == dump_json_fn(Shelf(items=[pen]))()
+    assert to_columns([parse_fn(Item)(data)], numpy=False).tables == {
+        "pen": {"id": [2], "color": ["red"]}
+    }
+
+    deferred = parse_fn(Item)(data)
+    deferred.color = "blue"
+    assert deferred.id == 2 and deferred.color == "blue"
+
+    label = parse_fn(Tag)({"type": "label", "name": "a"})
+    assert _is_deferred(label) and hash(label) == hash(Label(name="a"))
+    assert not _is_deferred(label)
+    assert hash(parse_fn(Tag)({"type": "tag", "name": "b"})) == hash(Tag(name="b"))
+
+
+def test_deferred_fields_set(parse_fn):
+    def fields_set(model: Item) -> set[str]:
+        if parse(pyd.__version__).major < 2:
+            return model.__fields_set__
+        return model.model_fields_set
+
+    pen = parse_fn(Item)({"type": "pen", "id": 2, "color": "red"})
+    assert {"id", "color"} <= fields_set(pen) and not _is_deferred(pen)
+    book = parse_fn(Item)({"type": "book", "id": 1, "pages": 10})
+    assert "related" not in fields_set(book)
+
+
+def test_deferred_repr_invalid(parse_fn):
+    pen = parse_fn(Item)({"type": "pen", "id": "oops"})
+    assert "oops" in repr(pen) and "oops" in str(pen)
+    assert _is_deferred(pen)
+
+
+def test_deferred_batches():
+    records = [
+        {"type": "pen", "id": "oops"},
+        {"type": "book", "id": 1, "pages": 10},
+        {"type": "pen", "id": 2},
+    ]
+    result = Item.validate_many(records)
+    assert sorted(result.errors) == [0, 2]
+    assert result.instances[0] is None and result.instances[2] is None
+    assert not _is_deferred(result.instances[1])
+
+    stream = read_models(
+        Item, io.StringIO("\n".join(map(json.dumps, records))), on_error="collect"
+    )
+    books = list(stream)
+    assert [type(x) for x in books] == [Book] and not _is_deferred(books[0])
+    assert [e.index for e in stream.errors] == [0, 2]
+
+
+def test_deferred_opt_out(parse_fn):
+    class Eraser(Item, deferred=False):
+        pass
+
+    eraser = parse_fn(Item)({"type": "eraser", "id": "3"})
+    assert not _is_deferred(eraser) and eraser.id == 3
+    with pytest.raises(ValidationError):
+        parse_fn(Item)({"type": "eraser", "id": "x"})
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from pydantic_discriminator import metrics
+from tests.test_base import Animal, Cat, Circle, Mammal, Rectangle, Shape, Square
+
+IS_V2 = hasattr(BaseModel, "model_json_schema")
+DEFS = "$defs" if IS_V2 else "definitions"
+
+v2_only = pytest.mark.skipif(
+    not IS_V2, reason="pydantic 1 has no hook for the JSON schema of fields"
+)
+
+
+def _json_schema(cls: type, **kwargs):
+    return cls.model_json_schema(**kwargs) if IS_V2 else cls.schema(**kwargs)
+
+
+def test_json_schema_one_of():
+    schema = _json_schema(Shape)
+    mapping = schema["discriminator"]["mapping"]
+    assert schema["discriminator"]["propertyName"] == "type"
+    assert {"shape", "circle", "square", "rectangle"} <= set(mapping)
+    assert schema["oneOf"] == [{"$ref": ref} for ref in mapping.values()]
+    assert mapping["circle"] == f"#/{DEFS}/Circle"
+
+    circle = schema[DEFS]["Circle"]
+    assert circle["properties"]["type"]["const"] == "circle"
+    assert circle["required"][0] == "type"
+    assert "radius" in circle["properties"]
+
+    schema = _json_schema(Shape, by_alias=False, ref_template="/schemas/{model}")
+    assert schema["discriminator"]["propertyName"] == "type_"
+    assert schema["discriminator"]["mapping"]["square"] == "/schemas/Square"
+    assert "oneOf" not in _json_schema(Circle)
+
+
+def test_json_schema_cache():
+    metrics.enable()
+    try:
+        schema = _json_schema(Shape)
+        schema["oneOf"].clear()
+        assert _json_schema(Shape)["oneOf"]
+        counts = metrics.snapshot()["counts"]
+        assert counts["cache_hit"]["json_schema"] >= 1
+
+        class Triangle(Shape, discriminator="triangle_json_schema"):
+            base: float
+
+        assert "triangle_json_schema" in _json_schema(Shape)["discriminator"]["mapping"]
+    finally:
+        metrics.disable()
+        Shape.unregister("triangle_json_schema")
+    assert "triangle_json_schema" not in _json_schema(Shape)["discriminator"]["mapping"]
+
+
+def test_json_schema_validates():
+    jsonschema = pytest.importorskip("jsonschema")
+    # pydantic 1 generates draft 7 schemas, with lists of items for tuples.
+    validator = jsonschema.Draft202012Validator if IS_V2 else jsonschema.Draft7Validator
+    schema = _json_schema(Shape)
+    for model in (
+        Circle(position=(0, 0), radius=1),
+        Square(position=(0, 0), side=1),
+        Rectangle(position=(0, 0), width=1, height=2),
+    ):
+        data = json.loads(model.model_dump_json() if IS_V2 else model.json())
+        jsonschema.validate(data, schema, cls=validator)
+    with pytest.raises(jsonschema.ValidationError):
+        jsonschema.validate(
+            {"type": "circle", "position": [0, 0]}, schema, cls=validator
+        )
+
+
+class Zoo(BaseModel):
+    main: Shape
+    shapes: list[Shape]
+    mammals: dict[str, Mammal]
+    cat: Cat
+
+
+@v2_only
+def test_json_schema_fields():
+    schema = Zoo.model_json_schema()
+    assert schema["properties"]["main"] == {"$ref": f"#/{DEFS}/Shape"}
+    union = schema[DEFS]["Shape"]
+    mapping = union["discriminator"]["mapping"]
+    assert union["discriminator"]["propertyName"] == "type"
+    assert sorted(x["$ref"] for x in union["oneOf"]) == sorted(mapping.values())
+    assert mapping["shape"] == f"#/{DEFS}/ShapeBase"
+    assert mapping["circle"] == f"#/{DEFS}/Circle"
+    assert schema[DEFS]["ShapeBase"]["properties"]["type"]["const"] == "shape"
+    assert schema[DEFS]["Circle"]["required"][0] == "type"
+
+    mapping = schema[DEFS]["Mammal"]["discriminator"]["mapping"]
+    assert {"mammal", "cat", "dog"} <= set(mapping)
+    dog = schema[DEFS][mapping["dog"].rpartition("/")[2]]
+    assert dog["properties"]["type"]["const"] == "dog"
+
+    schema = Zoo.model_json_schema(by_alias=False)
+    assert schema[DEFS]["Shape"]["discriminator"]["propertyName"] == "type_"
+
+
+@v2_only
+def test_json_schema_fields_recursive():
+    class Group(Shape, discriminator="group_json_schema"):
+        children: list[Shape]
+
+    class Canvas(BaseModel):
+        root: Shape
+
+    try:
+        schema = Canvas.model_json_schema()
+        children = schema[DEFS]["Group"]["properties"]["children"]
+        assert children["items"] == {"$ref": f"#/{DEFS}/Shape"}
+        assert "group_json_schema" in schema[DEFS]["Shape"]["discriminator"]["mapping"]
+    finally:
+        Shape.unregister("group_json_schema")
+
+
+@v2_only
+def test_json_schema_fields_validate():
+    jsonschema = pytest.importorskip("jsonschema")
+    zoo = Zoo(
+        main=Circle(position=(0, 0), radius=1),
+        shapes=[Square(position=(0, 0), side=1), Shape(position=(1, 1))],
+        mammals={
+            "tom": Cat(name="tom", age=1, color="grey", meow_pitch=1, purrosity=2)
+        },
+        cat=Cat(name="felix", age=2, color="black", meow_pitch=1, purrosity=2),
+    )
+    schema = Zoo.model_json_schema()
+    jsonschema.validate(zoo.model_dump(mode="json"), schema)
+    with pytest.raises(jsonschema.ValidationError):
+        jsonschema.validate(
+            {
+                **zoo.model_dump(mode="json"),
+                "main": {"type": "circle", "position": [0, 0]},
+            },
+            schema,
+        )
+    assert Animal.model_json_schema()["discriminator"]["mapping"]["cat"]
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sys
+from importlib.metadata import EntryPoint
+from pathlib import Path
+
+import pytest
+
+import pydantic_discriminator.common
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Plugin(DiscriminatedBaseModel):
+    name: str
+
+
+def _write_plugin(tmp_path: Path, module: str, name: str, discriminator: str) -> str:
+    (tmp_path / f"{module}.py").write_text(
+        "from tests.test_lazy import Plugin\n\n\n"
+        f"class {name}(Plugin, discriminator={discriminator!r}):\n"
+        "    value: int = 0\n"
+    )
+    return f"{module}:{name}"
+
+
+@pytest.fixture
+def plugins(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for discriminator in list(Plugin.get_registry_recur()):
+        Plugin.unregister(discriminator)
+    for discriminator in list(Plugin.__pyd_discriminator_lazy_index__):  # type: ignore
+        Plugin.unregister(discriminator)
+    for module in ("lazy_used", "lazy_unused", "lazy_wrong", "lazy_ep"):
+        sys.modules.pop(module, None)
+
+
+def test_lazy_dispatch(plugins: Path, parse_fn):
+    Plugin.register_lazy("used", _write_plugin(plugins, "lazy_used", "Used", "used"))
+    Plugin.register_lazy(
+        "unused", _write_plugin(plugins, "lazy_unused", "Unused", "unused")
+    )
+    assert "lazy_used" not in sys.modules
+
+    obj = parse_fn(Plugin)({"type": "used", "name": "a", "value": 3})
+    assert type(obj).__name__ == "Used"
+    assert obj.value == 3
+    assert Plugin.get_subclass("used") is type(obj)
+    assert Plugin(type="used", name="b").name == "b"
+    assert "lazy_unused" not in sys.modules
+    assert Plugin.get_subclass("missing") is None
+
+    Plugin.load_lazy()
+    assert "lazy_unused" in sys.modules
+    assert set(Plugin.get_registry_recur()) == {"used", "unused"}
+
+
+def test_lazy_wrong_discriminator(plugins: Path):
+    Plugin.register_lazy("right", _write_plugin(plugins, "lazy_wrong", "W", "wrong"))
+    with pytest.raises(ValueError):
+        Plugin.get_subclass("right")
+    assert Plugin.get_subclass("right") is None
+
+
+def test_lazy_entry_points(plugins: Path, monkeypatch: pytest.MonkeyPatch):
+    path = _write_plugin(plugins, "lazy_ep", "FromEntryPoint", "ep")
+    eps = [EntryPoint("ep", path, "pydantic_discriminator.plugins")]
+    monkeypatch.setattr(
+        pydantic_discriminator.common, "entry_points", lambda group: eps
+    )
+    Plugin.register_entry_points("pydantic_discriminator.plugins")
+    assert "lazy_ep" not in sys.modules
+    assert type(Plugin(type="ep", name="c")).__name__ == "FromEntryPoint"
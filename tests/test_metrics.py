@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pytest
+
+from pydantic_discriminator import metrics
+from tests.test_base import Circle, Shape
+
+
+@pytest.fixture
+def active():
+    yield metrics.enable()
+    metrics.disable()
+
+
+def test_metrics_disabled():
+    assert metrics.active is None
+    Shape(type="circle", position=(0.0, 0.0), radius=1.0)
+    assert metrics.snapshot() == {"counts": {}, "latency": {}}
+
+
+def test_metrics(active: metrics.Metrics, parse_fn, dump_fn):
+    obj = parse_fn(Shape)({"type": "circle", "position": (0.0, 0.0), "radius": 1.0})
+    Shape(type="square", position=(0.0, 0.0), side=1.0)
+    Circle(position=(0.0, 0.0), radius=1.0)
+    dump_fn(obj)()
+    with pytest.raises(ValueError):
+        Shape(type="hexagon", position=(0.0, 0.0))
+
+    snapshot = metrics.snapshot()
+    latency = snapshot["latency"]
+    assert latency["dispatch"]["circle"]["count"] == 2
+    assert latency["dispatch"]["square"]["count"] == 1
+    assert latency["validate"]["circle"]["count"] == 1
+    assert latency["serialize"]["circle"]["count"] == 1
+    assert sum(latency["dispatch"]["circle"]["buckets"].values()) == 2
+    assert snapshot["counts"]["unknown"] == {"hexagon": 1}
+    assert snapshot["counts"]["cache_hit"]["index"] >= 2
+    assert snapshot["counts"]["cache_miss"]["index"] == 1
+
+    active.reset()
+    assert metrics.snapshot() == {"counts": {}, "latency": {}}
+
+
+def test_metrics_validate_many(active: metrics.Metrics):
+    Shape.validate_many([{"type": "hexagon"}, {"type": "square", "side": 1.0}])
+    assert metrics.snapshot()["counts"]["unknown"] == {"hexagon": 1}
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import pydantic_discriminator.parallel
+from pydantic_discriminator.parallel import validate_parallel
+from tests.test_base import Shape
+from tests.test_lazy import Plugin, _write_plugin, plugins  # noqa: F401
+
+RECORDS = [
+    (
+        {"type": "circle", "position": (i, i), "radius": 1.0}
+        if i % 3 == 0
+        else (
+            {"type": "square", "position": (i, i), "side": "x" if i % 7 == 0 else 2.0}
+            if i % 3 == 1
+            else {"type": "hexagon" if i % 11 == 0 else "rectangle", "position": (i, i)}
+        )
+    )
+    for i in range(60)
+]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ProcessPoolExecutor(2) as pool:
+        yield pool
+
+
+def test_validate_parallel(pool: ProcessPoolExecutor):
+    expected = Shape.validate_many(RECORDS)
+    result = validate_parallel(Shape, iter(RECORDS), chunk_size=7, executor=pool)
+    assert result.instances == expected.instances
+    assert list(result.errors) == sorted(expected.errors)
+    assert {k: [e["loc"] for e in v] for k, v in result.errors.items()} == {
+        k: [e["loc"] for e in v] for k, v in expected.errors.items()
+    }
+
+
+def test_validate_parallel_dump(pool: ProcessPoolExecutor, dump_fn):
+    expected = Shape.validate_many(RECORDS)
+    result = validate_parallel(Shape, RECORDS, chunk_size=16, dump=True, executor=pool)
+    assert result.instances == [
+        None if x is None else dump_fn(x)() for x in expected.instances
+    ]
+    assert result.errors.keys() == expected.errors.keys()
+
+
+def test_validate_parallel_own_pool():
+    result = validate_parallel(Shape, RECORDS[:10], max_workers=1, chunk_size=4)
+    assert result.instances == Shape.validate_many(RECORDS[:10]).instances
+
+
+def test_validate_parallel_registers_once(monkeypatch: pytest.MonkeyPatch):
+    # The index of the parent is registered by the first shard of each worker only.
+    calls: list[str] = []
+    monkeypatch.setattr(pydantic_discriminator.parallel, "_registered", {})
+    monkeypatch.setattr(
+        Shape, "register_lazy", classmethod(lambda cls, d, path: calls.append(d))
+    )
+    with ThreadPoolExecutor(1) as pool:
+        result = validate_parallel(Shape, RECORDS, chunk_size=7, executor=pool)
+    assert result.instances == Shape.validate_many(RECORDS).instances
+    assert calls and len(calls) == len(set(calls))
+
+
+def test_validate_parallel_imports_subclasses(plugins: Path):  # noqa: F811
+    # Spawned workers only import the module of the root class.
+    _write_plugin(plugins, "lazy_used", "Used", "used")
+    __import__("lazy_used")
+    Plugin.register_lazy("ep", _write_plugin(plugins, "lazy_ep", "Ep", "ep"))
+    records = [{"type": "used", "name": "a", "value": 1}, {"type": "ep", "name": "b"}]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, mp_context=context) as pool:
+        result = validate_parallel(
+            Plugin, records, max_workers=1, dump=True, executor=pool
+        )
+    assert result.errors == {}
+    assert result.instances == [
+        {"type": "used", "name": "a", "value": 1},
+        {"type": "ep", "name": "b", "value": 0},
+    ]
+    assert "lazy_ep" not in sys.modules
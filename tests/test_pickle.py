@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pickle
+
+from pydantic import BaseModel, PrivateAttr
+
+from pydantic_discriminator import DiscriminatedBaseModel, metrics
+from tests.test_base import Animal, Cat, Circle, Shape, Snake
+
+
+class Zoo(BaseModel):
+    animals: list[Animal]
+    shapes: dict[str, Shape] = {}
+
+
+class Tagged(DiscriminatedBaseModel):
+    value: int
+    _secret: int = PrivateAttr(default=0)
+
+
+class Open(DiscriminatedBaseModel, extra="allow"):
+    value: int
+
+
+def _fields_set(obj: BaseModel) -> set[str]:
+    return getattr(obj, "model_fields_set", None) or obj.__fields_set__
+
+
+def test_pickle_roundtrip():
+    zoo = Zoo(
+        animals=[
+            Cat(name="Tom", age=3, color="grey", meow_pitch=1.0, purrosity=1.0),
+            Animal(type="snake", name="Kaa", age=9, length=5.0, killcount=2),
+        ],
+        shapes={"c": Circle(position=(0.0, 0.0), radius=1.0)},
+    )
+    data = pickle.dumps(zoo)
+
+    metrics.enable()
+    try:
+        loaded = pickle.loads(data)
+        assert metrics.snapshot()["latency"] == {}
+    finally:
+        metrics.disable()
+
+    assert loaded == zoo
+    assert [type(x) for x in loaded.animals] == [Cat, Snake]
+    assert loaded.animals[1].type_ == "snake"
+    for before, after in zip(zoo.animals, loaded.animals):
+        assert _fields_set(after) == _fields_set(before)
+    assert _fields_set(loaded.shapes["c"]) == _fields_set(zoo.shapes["c"])
+
+
+def test_pickle_is_compact():
+    cats = [
+        Cat(name="Tom", age=i, color="grey", meow_pitch=1.0, purrosity=1.0)
+        for i in range(100)
+    ]
+    # Only the field values are pickled, not pydantic's fields set and extra state.
+    states = [x.__getstate__() for x in cats]
+    assert len(pickle.dumps(cats)) < len(pickle.dumps(states)) / 1.3
+
+
+def test_pickle_private_attributes():
+    obj = Tagged(value=1)
+    obj._secret = 42
+    loaded = pickle.loads(pickle.dumps(obj))
+    assert loaded == obj
+    assert loaded._secret == 42
+
+
+def test_pickle_extra_allowed():
+    loaded = pickle.loads(pickle.dumps(Open(value=1)))
+    assert loaded == Open(value=1)
+    loaded.other = 2
+    assert loaded == Open(value=1, other=2)
+
+    loaded = pickle.loads(pickle.dumps(Open(value=1, other=2)))
+    assert loaded == Open(value=1, other=2)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import gc
+import types
+import warnings
+import weakref
+from typing import Any
+
+import pytest
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+def _build_tree(name: str, width: int, **kwargs: Any) -> type[DiscriminatedBaseModel]:
+    root = types.new_class(name, (DiscriminatedBaseModel,), kwargs)
+    for i in range(width):
+        types.new_class(f"{name}Leaf{i}", (root,), {"discriminator": f"leaf{i}"})
+    return root
+
+
+def test_registry_recur_is_flat():
+    root = types.new_class("FlatRoot", (DiscriminatedBaseModel,))
+    mid = types.new_class("FlatMid", (root,), {"discriminator": "mid"})
+    leaf = types.new_class("FlatLeaf", (mid,), {"discriminator": "leaf"})
+
+    assert root.get_registry() == {"mid": mid}
+    assert root.get_registry_recur() == {"mid": mid, "leaf": leaf}
+    assert mid.get_registry_recur() == {"leaf": leaf}
+    assert leaf.get_registry_recur() == {}
+
+
+def test_registry_recur_is_cached():
+    root = _build_tree("CachedRoot", 5)
+    assert root.get_registry_recur() is root.get_registry_recur()
+
+
+def test_registry_recur_late_subclass():
+    root = types.new_class("LateRoot", (DiscriminatedBaseModel,))
+    mid = types.new_class("LateMid", (root,), {"discriminator": "mid"})
+    index = root.get_registry_recur()
+    leaf = types.new_class("LateLeaf", (mid,), {"discriminator": "leaf"})
+
+    assert index == {"mid": mid}
+    assert root.get_registry_recur()["leaf"] is leaf
+    assert mid.get_registry_recur()["leaf"] is leaf
+    assert isinstance(root(type="leaf"), leaf)
+
+
+def test_dispatch_does_not_walk_the_tree(monkeypatch, parse_fn):
+    root = base = _build_tree("DeepRoot", 3)
+    classes = [root, *root.get_registry().values()]
+    for level in range(20):
+        base = types.new_class(f"Deep{level}", (base,), {"discriminator": f"d{level}"})
+        classes.append(base)
+    assert dict(root.get_registry_recur()) == {
+        cls.discriminator(): cls for cls in classes[1:]
+    }
+
+    def fail(*args: Any) -> Any:
+        raise AssertionError("dispatch walked the hierarchy")
+
+    monkeypatch.setattr(DiscriminatedBaseModel, "get_registry", classmethod(fail))
+    for cls in classes:
+        monkeypatch.setattr(cls, "__subclasses__", fail, raising=False)
+    assert type(parse_fn(root)({"type": "d19"})) is base
+    assert type(root(type="d19")) is base
+    assert root.get_subclass("d19") is base
+
+
+def test_duplicate_discriminators_are_rejected():
+    root = _build_tree("DupRoot", 2)
+    mid = types.new_class("DupMid", (root,), {"discriminator": "mid"})
+    with pytest.raises(TypeError):
+        types.new_class("DupSibling", (mid,), {"discriminator": "leaf0"})
+    with pytest.raises(TypeError):
+        types.new_class("DupAncestor", (mid,), {"discriminator": "mid"})
+    assert set(root.get_registry_recur()) == {"leaf0", "leaf1", "mid"}
+    assert set(mid.get_registry_recur()) == set()
+
+    # Unrelated hierarchies can reuse discriminators.
+    other = _build_tree("DupOther", 2)
+    assert other.get_subclass("leaf0") is not root.get_subclass("leaf0")
+
+
+def test_redefinition_replaces_subclass():
+    root = _build_tree("RedefRoot", 0)
+    first = types.new_class("Redef", (root,), {"discriminator": "redef"})
+    with pytest.warns(RuntimeWarning, match="redefines"):
+        second = types.new_class("Redef", (root,), {"discriminator": "redef"})
+    assert first is not second
+    assert root.get_subclass("redef") is second
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        third = types.new_class(
+            "Redef", (root,), {"discriminator": "redef", "replace": True}
+        )
+    assert root.get_subclass("redef") is third
+
+
+def test_redefinition_keeps_subclasses(parse_fn):
+    root = _build_tree("RedefMidRoot", 0)
+    mid = types.new_class("RedefMid", (root,), {"discriminator": "mid"})
+    leaf = types.new_class("RedefLeaf", (mid,), {"discriminator": "leaf"})
+    with pytest.warns(RuntimeWarning):
+        new_mid = types.new_class("RedefMid", (root,), {"discriminator": "mid"})
+    assert root.get_registry() == {"mid": new_mid, "leaf": leaf}
+    assert root.get_registry_recur() == {"mid": new_mid, "leaf": leaf}
+    assert type(parse_fn(root)({"type": "leaf"})) is leaf
+
+
+def _tenant(root: type, i: int, **kwargs: Any) -> type[DiscriminatedBaseModel]:
+    ns = {"__annotations__": {"value": int}}
+    return types.new_class(
+        f"Tenant{i}",
+        (root,),
+        {"discriminator": f"tenant{i}", **kwargs},
+        lambda x: x.update(ns),
+    )
+
+
+def test_unregister(parse_fn):
+    root = _build_tree("UnregRoot", 2)
+    tenant = _tenant(root, 0)
+    child = types.new_class("UnregChild", (tenant,), {"discriminator": "child"})
+    assert type(parse_fn(root)({"type": "child", "value": 1})) is child
+
+    root.unregister("tenant0")
+    # Subclasses of the removed class are moved under its base.
+    assert set(root.get_registry_recur()) == {"leaf0", "leaf1", "child"}
+    assert root.get_registry()["child"] is child
+    assert type(parse_fn(root)({"type": "child", "value": 1})) is child
+    with pytest.raises(ValueError):
+        parse_fn(root)({"type": "tenant0", "value": 1})
+    with pytest.raises(KeyError):
+        root.unregister("tenant0")
+
+    root.register_lazy("lazy", "missing.module:Lazy")
+    root.unregister("lazy")
+    assert root.get_subclass("lazy") is None
+
+
+def test_replace(parse_fn):
+    root = _build_tree("ReplaceRoot", 0, tagged_union=True)
+    _tenant(root, 0)
+    assert parse_fn(root)({"type": "tenant0", "value": 1})
+    with pytest.raises(TypeError):
+        types.new_class("Other", (root,), {"discriminator": "tenant0"})
+
+    other = types.new_class(
+        "Other", (root,), {"discriminator": "tenant0", "replace": True}
+    )
+    assert type(parse_fn(root)({"type": "tenant0"})) is other
+    assert root.get_registry_recur() == {"tenant0": other}
+
+
+def test_unregistered_subclasses_are_collected(parse_fn):
+    root = _build_tree("CollectRoot", 0)
+    refs = []
+    for i in range(5):
+        tenant = _tenant(root, i)
+        record = {"type": f"tenant{i}", "value": i}
+        parse_fn(root)(record)
+        root.validate_many([record])
+        root.construct_polymorphic(record)
+        refs.append(weakref.ref(tenant))
+        del tenant
+        root.unregister(f"tenant{i}")
+        # Replacing a subclass drops the previous one as well.
+        refs.append(weakref.ref(_tenant(root, i)))
+        refs.append(weakref.ref(_tenant(root, i, replace=True)))
+        root.unregister(f"tenant{i}")
+    gc.collect()
+    assert [r() for r in refs] == [None] * len(refs)
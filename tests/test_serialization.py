@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+from typing import Optional
+
+import pydantic as pyd
+import pytest
+from packaging.version import parse
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+from tests.test_base import Animal, Cat, Circle, Shape, Square
+
+v2_only = pytest.mark.skipif(
+    parse(pyd.__version__).major < 2, reason="pydantic v2 serialization"
+)
+
+
+class Drawing(BaseModel):
+    main: Shape
+    shapes: list[Shape]
+    by_name: dict[str, Animal]
+
+
+def _drawing() -> Drawing:
+    return Drawing(
+        main=Circle(position=(0.0, 0.0), radius=1.0),
+        shapes=[Square(position=(1.0, 1.0), side=2.0)],
+        by_name={
+            "tom": Cat(name="Tom", age=3, color="grey", meow_pitch=1, purrosity=1)
+        },
+    )
+
+
+_DRAWING_DATA = {
+    "main": {"type": "circle", "position": (0.0, 0.0), "radius": 1.0},
+    "shapes": [{"type": "square", "position": (1.0, 1.0), "side": 2.0}],
+    "by_name": {
+        "tom": {
+            "type": "cat",
+            "name": "Tom",
+            "age": 3,
+            "color": "grey",
+            "meow_pitch": 1.0,
+            "purrosity": 1.0,
+        }
+    },
+}
+
+
+def test_plain_model_type_field_untouched(dump_fn):
+    class Plain(BaseModel):
+        type_: str
+
+    assert dump_fn(Plain(type_="plain"))() == {"type_": "plain"}
+
+
+def test_dump_nested_subclasses(dump_fn):
+    assert dump_fn(_drawing())() == _DRAWING_DATA
+
+
+@v2_only
+def test_dump_by_alias():
+    assert _drawing().model_dump(by_alias=True) == _DRAWING_DATA
+
+
+@v2_only
+def test_dump_json():
+    dumped = json.loads(_drawing().model_dump_json())
+    assert dumped == json.loads(json.dumps(_DRAWING_DATA))
+
+
+def test_dump_filters_type(dump_fn):
+    circle = Circle(position=(0.0, 0.0), radius=1.0)
+    assert dump_fn(circle)(exclude={"type"}) == {"position": (0.0, 0.0), "radius": 1.0}
+    assert dump_fn(circle)(include={"radius"}) == {"radius": 1.0}
+    assert dump_fn(circle)(include={"type", "radius"}) == {
+        "type": "circle",
+        "radius": 1.0,
+    }
+    assert dump_fn(_drawing())(include={"main": {"type", "radius"}}) == {
+        "main": {"type": "circle", "radius": 1.0}
+    }
+
+
+@v2_only
+def test_dump_type_without_alias():
+    circle = Circle(position=(0.0, 0.0), radius=1.0)
+    assert circle.model_dump(by_alias=False) == _DRAWING_DATA["main"]
+    assert json.loads(circle.model_dump_json(by_alias=False)) == {
+        "type": "circle",
+        "position": [0.0, 0.0],
+        "radius": 1.0,
+    }
+
+
+def test_type_attribute():
+    circle = Circle(position=(0.0, 0.0), radius=1.0)
+    assert circle.type == circle.type_ == "circle"
+    with pytest.raises((AttributeError, ValueError)):
+        circle.type = "square"
+
+
+def test_type_field_rejected():
+    with pytest.raises(TypeError):
+
+        class Tagged(Shape):
+            type: str = "tagged"
+
+
+@v2_only
+def test_dump_after_rebuild():
+    class Node(DiscriminatedBaseModel):
+        child: Optional[Later] = None
+
+    class Later(Node, discriminator="later"):
+        value: int
+
+    assert not Node.__pydantic_complete__
+    Node.model_rebuild()
+    node = Node(child=Later(value=1))
+    assert node.model_dump() == {
+        "type": "node",
+        "child": {"type": "later", "child": None, "value": 1},
+    }
+
+
+@v2_only
+def test_dump_recursive():
+    class Tree(DiscriminatedBaseModel):
+        children: list[Tree] = []
+
+    class Fruit(Tree, discriminator="fruit"):
+        sweet: bool
+
+    Tree.model_rebuild()
+    tree = Tree(children=[Fruit(sweet=True, children=[Fruit(sweet=False)])])
+    assert tree.model_dump() == {
+        "type": "tree",
+        "children": [
+            {
+                "type": "fruit",
+                "sweet": True,
+                "children": [{"type": "fruit", "sweet": False, "children": []}],
+            }
+        ],
+    }
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import io
+import json
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from pydantic_discriminator.stream import ModelStream, StreamError, read_models
+from tests.test_base import Circle, Shape, Square
+
+RECORDS = [
+    {"type": "circle", "position": [0.0, 0.0], "radius": 1.0},
+    {"type": "square", "position": [1.0, 1.0], "side": 2.0},
+    {"position": [2.0, 2.0]},
+]
+MODELS = [
+    Circle(position=(0.0, 0.0), radius=1.0),
+    Square(position=(1.0, 1.0), side=2.0),
+    Shape(position=(2.0, 2.0)),
+]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+@pytest.mark.parametrize("array", [False, True])
+def test_read_models(array: bool, binary: bool):
+    text = (
+        json.dumps(RECORDS, indent=2) if array else "\n".join(map(json.dumps, RECORDS))
+    )
+    source = io.BytesIO(text.encode()) if binary else io.StringIO(text)
+    stream = ModelStream(Shape, source, chunk_size=5)
+    assert list(stream) == MODELS
+
+
+def test_read_models_path(tmp_path: Path):
+    path = tmp_path / "shapes.json"
+    path.write_text(json.dumps(RECORDS))
+    assert list(read_models(Shape, path)) == MODELS
+    assert list(read_models(Shape, str(path))) == MODELS
+
+
+def test_read_models_batches():
+    source = io.StringIO(json.dumps(RECORDS * 3))
+    batches = list(read_models(Shape, source, batch_size=4).batches())
+    assert [len(x) for x in batches] == [4, 4, 1]
+    assert sum(batches, []) == MODELS * 3
+
+
+def test_read_models_errors():
+    lines = [
+        json.dumps(RECORDS[0]),
+        '{"type": "circle", "position": [0.0, 0.0], "radius": "big"}',
+        "{not json",
+        '{"type": "hexagon", "position": [0.0, 0.0]}',
+        json.dumps(RECORDS[1]),
+    ]
+    text = "\n".join(lines)
+
+    with pytest.raises(StreamError) as exc_info:
+        list(read_models(Shape, io.StringIO(text)))
+    assert exc_info.value.index == 1
+
+    stream = read_models(Shape, io.StringIO(text), on_error="skip")
+    assert list(stream) == MODELS[:2]
+    assert stream.errors == []
+
+    stream = read_models(Shape, io.StringIO(text), on_error="collect", batch_size=2)
+    assert list(stream) == MODELS[:2]
+    assert [e.index for e in stream.errors] == [1, 2, 3]
+    assert stream.errors[1].errors[0]["type"] == "json_invalid"
+
+
+def test_read_models_array_errors():
+    elements = [json.dumps(RECORDS[0]), '{"type": "circle", "x": bad}', "nul"]
+    text = "[" + ", ".join(elements + [json.dumps(RECORDS[1])]) + "]"
+    stream = read_models(Shape, io.StringIO(text), on_error="collect", chunk_size=7)
+    assert list(stream) == MODELS[:2]
+    assert [e.index for e in stream.errors] == [1, 2]
+    assert all(e.errors[0]["type"] == "json_invalid" for e in stream.errors)
+    assert stream.errors[0].errors[0]["input"] == elements[1]
+
+
+def test_read_models_truncated_array():
+    with pytest.raises(ValueError):
+        list(read_models(Shape, io.StringIO(json.dumps(RECORDS)[:-10])))
+
+
+def _peak_memory(path: Path, array: bool, n: int) -> int:
+    with open(path, "w") as fp:
+        fp.write("[" if array else "")
+        for i in range(n):
+            record = {"type": "circle", "position": [i, i], "radius": i}
+            fp.write(("," if array and i else "") + json.dumps(record) + "\n")
+        fp.write("]" if array else "")
+
+    tracemalloc.start()
+    try:
+        assert (
+            sum(1 for _ in ModelStream(Shape, path, batch_size=64, chunk_size=4096))
+            == n
+        )
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("array", [False, True])
+def test_read_models_constant_memory(tmp_path: Path, array: bool):
+    small = _peak_memory(tmp_path / "small.json", array, 2_000)
+    large = _peak_memory(tmp_path / "large.json", array, 16_000)
+    assert large < small * 1.5
+    assert large < (tmp_path / "large.json").stat().st_size / 2
+
+
+def test_read_models_filtered(monkeypatch: pytest.MonkeyPatch):
+    lines = [
+        json.dumps(RECORDS[0]),
+        '{"type": "hexagon", "position": "not a position"}',
+        "{not json",
+        '{"type": "s\\u0071uare", "position": [1.0, 1.0], "side": 2.0}',
+    ]
+    text = "\n".join(lines)
+    stream = read_models(Shape, io.StringIO(text), include={"square"})
+    assert list(stream) == [MODELS[1]]
+
+    decoded = []
+    loads = json.loads
+    monkeypatch.setattr(json, "loads", lambda x: decoded.append(x) or loads(x))
+    stream = read_models(
+        Shape, io.StringIO(text), include=["circle"], on_error="collect"
+    )
+    assert list(stream) == [MODELS[0]]
+    assert stream.errors == []
+    assert decoded == [lines[0], lines[3]]
+
+    stream = read_models(Shape, io.StringIO(json.dumps(RECORDS)), exclude=["shape"])
+    assert list(stream) == MODELS[:2]
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import sys
+import types
+
+import pydantic as pyd
+import pytest
+from packaging.version import parse
+from pydantic import BaseModel
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+pytestmark = pytest.mark.skipif(
+    parse(pyd.__version__).major < 2, reason="tagged unions require pydantic-core"
+)
+
+
+class Shape(DiscriminatedBaseModel, tagged_union=True):
+    position: tuple[float, float]
+
+
+class Circle(Shape, discriminator="circle"):
+    radius: float
+
+
+class Polygon(Shape, discriminator="polygon"):
+    sides: int
+
+
+class Square(Polygon, discriminator="square"):
+    side: float
+
+
+class Drawing(BaseModel):
+    main: Shape
+    shapes: list[Shape]
+    by_name: dict[str, Shape]
+
+
+_DATA = {
+    "main": {"type": "circle", "position": (0.0, 0.0), "radius": 1.0},
+    "shapes": [
+        {"type": "square", "position": (1.0, 1.0), "sides": 4, "side": 2.0},
+        {"type_": "polygon", "position": (2.0, 2.0), "sides": 5},
+        {"type": "shape", "position": (3.0, 3.0)},
+    ],
+    "by_name": {"c": {"type": "circle", "position": (0.0, 0.0), "radius": 2.0}},
+}
+
+_EXPECTED = Drawing(
+    main=Circle(position=(0.0, 0.0), radius=1.0),
+    shapes=[
+        Square(position=(1.0, 1.0), sides=4, side=2.0),
+        Polygon(position=(2.0, 2.0), sides=5),
+        Shape(position=(3.0, 3.0)),
+    ],
+    by_name={"c": Circle(position=(0.0, 0.0), radius=2.0)},
+)
+
+
+def test_tagged_union_validate(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("dispatch went through __new__")
+
+    monkeypatch.setattr(DiscriminatedBaseModel, "__new__", fail)
+    assert Drawing.model_validate(_DATA) == _EXPECTED
+    assert isinstance(Shape.model_validate(_DATA["main"]), Circle)
+    assert isinstance(Polygon.model_validate(_DATA["shapes"][0]), Square)
+
+
+def test_tagged_union_does_not_mutate_input():
+    data = {"type_": "circle", "position": (0.0, 0.0), "radius": 1.0}
+    assert isinstance(Shape.model_validate(data), Circle)
+    assert data == {"type_": "circle", "position": (0.0, 0.0), "radius": 1.0}
+
+
+def test_tagged_union_instances():
+    drawing = Drawing(
+        main=_EXPECTED.main, shapes=_EXPECTED.shapes, by_name=_EXPECTED.by_name
+    )
+    assert drawing == _EXPECTED
+    assert drawing.main is _EXPECTED.main
+
+
+def test_tagged_union_roundtrip():
+    assert Drawing.model_validate(_EXPECTED.model_dump()) == _EXPECTED
+    assert Drawing.model_validate_json(_EXPECTED.model_dump_json()) == _EXPECTED
+
+
+def test_tagged_union_constructor():
+    assert isinstance(Shape(type="circle", position=(0.0, 0.0), radius=1.0), Circle)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"type": "triangle", "position": (0.0, 0.0)},
+        {"type": ["circle"], "position": (0.0, 0.0), "radius": 1.0},
+        {"type": "circle", "position": (0.0, 0.0)},
+        {"type": "square", "position": (0.0, 0.0), "side": 1.0},
+    ],
+)
+def test_tagged_union_errors(data):
+    with pytest.raises(pyd.ValidationError):
+        Shape.model_validate(data)
+
+
+def test_tagged_union_error_content():
+    with pytest.raises(pyd.ValidationError) as info:
+        Shape.model_validate({"type": "triangle", "position": (0.0, 0.0)})
+    assert info.value.title == "Shape"
+    (error,) = info.value.errors()
+    assert error["type"] == "discriminator_invalid"
+    assert error["loc"] == ()
+    assert error["msg"] == (
+        "Input 'type' should be one of 'shape', 'circle', 'polygon', 'square'"
+    )
+
+    with pytest.raises(pyd.ValidationError) as info:
+        Drawing.model_validate({**_DATA, "shapes": [{"type": "circle"}]})
+    assert [e["loc"] for e in info.value.errors()] == [
+        ("shapes", 0, "circle", "position"),
+        ("shapes", 0, "circle", "radius"),
+    ]
+
+
+def test_tagged_union_missing_type():
+    assert type(Shape.model_validate({"position": (0.0, 0.0)})) is Shape
+    circle = Circle.model_validate({"position": (0.0, 0.0), "radius": 1.0})
+    assert circle == Circle(position=(0.0, 0.0), radius=1.0)
+    drawing = Drawing.model_validate_json(
+        '{"main": {"position": [0, 0]}, "shapes": [], "by_name": {}}'
+    )
+    assert type(drawing.main) is Shape
+
+
+def test_tagged_union_repeated_fields():
+    # pydantic 2.0 reuses the schema of the first field annotated with a model.
+    class Board(BaseModel):
+        first: Polygon
+        second: Polygon
+        others: list[Polygon]
+
+    square = {"type": "square", "position": (0.0, 0.0), "sides": 4, "side": 1.0}
+    board = Board.model_validate(
+        {"first": square, "second": square, "others": [square]}
+    )
+    assert [type(x) for x in (board.first, board.second, *board.others)] == [Square] * 3
+
+
+def test_tagged_union_late_subclass():
+    class Board(BaseModel):
+        shape: Shape
+
+    Shape.model_validate(_DATA["main"])
+    hexagon = types.new_class("Hexagon", (Polygon,), {"discriminator": "hexagon"})
+    data = {"type": "hexagon", "position": (0.0, 0.0), "sides": 6}
+
+    assert isinstance(Board.model_validate({"shape": data}).shape, hexagon)
+    assert isinstance(Shape.model_validate(data), hexagon)
+    assert isinstance(Polygon.model_validate(data), hexagon)
+    with pytest.raises(pyd.ValidationError) as info:
+        Board.model_validate({"shape": {**data, "sides": "six"}})
+    assert [e["loc"] for e in info.value.errors()] == [("shape", "hexagon", "sides")]
+    Shape.unregister("hexagon")
+    with pytest.raises(pyd.ValidationError) as info:
+        Board.model_validate({"shape": data})
+    (error,) = info.value.errors()
+    assert error["type"] == "discriminator_invalid"
+    assert "hexagon" not in error["msg"]
+
+
+def test_tagged_union_validate_json(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("dispatch went through __new__")
+
+    monkeypatch.setattr(DiscriminatedBaseModel, "__new__", fail)
+    data = b'{"type": "square", "position": [0, 0], "sides": 4, "side": 1}'
+    assert Shape.model_validate_json(data) == Square(
+        position=(0.0, 0.0), sides=4, side=1.0
+    )
+    assert Drawing.model_validate_json(_EXPECTED.model_dump_json()) == _EXPECTED
+
+
+def test_tagged_union_validate_many():
+    result = Shape.validate_many([*_DATA["shapes"], {"type": "circle"}])
+    assert result.instances == [*_EXPECTED.shapes, None]
+    assert list(result.errors) == [3]
+
+    result = Shape.validate_many(
+        [*_DATA["shapes"], {"type": "circle"}], exclude={"circle", "shape"}
+    )
+    assert result.instances == [*_EXPECTED.shapes[:2], None, None]
+    assert result.errors == {}
+
+
+def test_tagged_union_late_subclass_strict_context():
+    class Board(BaseModel):
+        shape: Shape
+
+    Shape.model_validate(_DATA["main"])
+    contexts = []
+
+    class Octagon(Polygon, discriminator="octagon"):
+        @pyd.field_validator("sides")
+        @classmethod
+        def record(cls, value, info):
+            contexts.append(info.context)
+            return value
+
+    data = {"type": "octagon", "position": (0.0, 0.0), "sides": "8"}
+    try:
+        board = Board.model_validate({"shape": data}, context={"source": "test"})
+        assert isinstance(board.shape, Octagon) and board.shape.sides == 8
+        assert contexts == [{"source": "test"}]
+        with pytest.raises(pyd.ValidationError):
+            Board.model_validate({"shape": data}, strict=True)
+    finally:
+        Shape.unregister("octagon")
+
+
+def test_tagged_union_validate_many_lazy(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "lazy_star.py").write_text(
+        "from tests.test_tagged_union import Shape\n\n\n"
+        "class Star(Shape, discriminator='star'):\n"
+        "    points: int\n"
+    )
+    assert Shape.validate_many(_DATA["shapes"]).instances == _EXPECTED.shapes
+    Shape.register_lazy("star", "lazy_star:Star")
+    try:
+        data = {"type": "star", "position": (0.0, 0.0), "points": 5}
+        (star,) = Shape.validate_many([data]).instances
+        assert type(star).__name__ == "Star"
+    finally:
+        Shape.unregister("star")
+        sys.modules.pop("lazy_star", None)
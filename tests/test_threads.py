@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Node(DiscriminatedBaseModel):
+    value: int
+
+
+def test_concurrent_registration_and_dispatch(parse_fn, dump_fn):
+    n_threads, n_classes = 8, 25
+    start = threading.Barrier(n_threads)
+
+    def work(t: int) -> int:
+        start.wait()
+        count = 0
+        for i in range(n_classes):
+            discriminator = f"t{t}_{i}"
+            types.new_class(f"Node{t}_{i}", (Node,), {"discriminator": discriminator})
+            for other, other_cls in list(Node.get_registry_recur().items()):
+                obj = parse_fn(Node)({"type": other, "value": i})
+                assert type(obj) is other_cls
+                assert dump_fn(obj)()["type"] == other
+                count += 1
+        return count
+
+    with ThreadPoolExecutor(n_threads) as pool:
+        counts = list(pool.map(work, range(n_threads)))
+
+    assert len(Node.get_registry_recur()) == n_threads * n_classes
+    assert len(Node.get_registry()) == n_threads * n_classes
+    assert all(x > 0 for x in counts)
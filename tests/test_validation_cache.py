@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import pydantic as pyd
+import pytest
+from packaging.version import parse
+from pydantic import BaseModel, ValidationError
+
+from pydantic_discriminator import DiscriminatedBaseModel
+
+
+class Sprite(DiscriminatedBaseModel, cache_size=2, frozen=True):
+    name: str
+
+
+class Ghost(Sprite):
+    speed: float = 1.0
+
+
+class Coin(Sprite):
+    value: int
+
+
+class Level(BaseModel):
+    sprites: list[Sprite]
+
+
+class Card(DiscriminatedBaseModel, tagged_union=True, cache_size=4, frozen=True):
+    pass
+
+
+class Number(Card):
+    value: int
+
+
+class Hand(BaseModel):
+    card: Card
+
+
+v2_only = pytest.mark.skipif(
+    parse(pyd.__version__).major < 2, reason="strict mode requires pydantic 2"
+)
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    cache = Sprite.validation_cache()
+    assert cache is not None
+    cache.clear()
+    cache.hits = cache.misses = cache.evictions = 0
+    return cache
+
+
+def test_validation_cache_shared(parse_fn, cache):
+    data = {"type": "ghost", "name": "Blinky"}
+    ghost = parse_fn(Sprite)(data)
+    assert type(ghost) is Ghost
+    assert parse_fn(Sprite)(dict(data)) is ghost
+    assert Coin.validation_cache() is cache
+
+    level = parse_fn(Level)({"sprites": [data, data, {**data, "speed": 2}]})
+    assert level.sprites[0] is ghost and level.sprites[1] is ghost
+    assert level.sprites[2] is not ghost and level.sprites[2].speed == 2
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 2,
+        "evictions": 0,
+        "size": 2,
+        "maxsize": 2,
+    }
+    with pytest.raises((TypeError, ValueError)):
+        ghost.name = "Pinky"
+
+
+def test_validation_cache_keys(parse_fn, cache):
+    # Equal numbers of different types can validate to different values.
+    parse_fn(Sprite)({"type": "coin", "name": "c", "value": 1})
+    parse_fn(Sprite)({"type": "coin", "name": "c", "value": 1.0})
+    parse_fn(Sprite)({"type": "coin", "name": "c", "value": True})
+    assert cache.misses == 3 and cache.evictions == 1
+    assert parse_fn(Coin)({"type": "coin", "name": "c", "value": 1}) is not None
+    assert cache.misses == 4
+
+    with pytest.raises(ValidationError):
+        parse_fn(Sprite)({"type": "coin", "name": "c", "value": "x"})
+    with pytest.raises(ValidationError):
+        parse_fn(Sprite)({"type": "coin", "name": "c", "value": "x"})
+    assert cache.stats()["size"] == 2 and cache.misses == 6
+
+    parse_fn(Sprite)({"type": "ghost", "name": "g", "tags": {"a"}})
+    assert cache.misses == 6
+
+
+def test_validation_cache_invalidation(parse_fn, cache):
+    parse_fn(Sprite)({"type": "ghost", "name": "Blinky"})
+
+    class Star(Sprite):
+        pass
+
+    assert cache.stats()["size"] == 0
+    Sprite.unregister("star")
+
+
+def test_validation_cache_frozen():
+    with pytest.raises(TypeError):
+
+        class Mutable(DiscriminatedBaseModel, cache_size=8):
+            pass
+
+    with pytest.raises(ValueError):
+
+        class Empty(DiscriminatedBaseModel, cache_size=0, frozen=True):
+            pass
+
+
+@v2_only
+def test_validation_cache_strict():
+    cache = Card.validation_cache()
+    assert cache is not None
+    data = {"card": {"type": "number", "value": "1"}}
+    assert Hand.model_validate(data).card.value == 1
+    assert Hand.model_validate(data).card.value == 1
+    with pytest.raises(ValidationError):
+        Hand.model_validate(data, strict=True)
+
+    # Data valid in both modes is served from the cache in both.
+    clean = {"card": {"type": "number", "value": 2}}
+    card = Hand.model_validate(clean).card
+    assert Hand.model_validate(clean, strict=True).card is card
+    hits = cache.hits
+    assert Hand.model_validate(clean, context={"a": 1}).card is not card
+    assert cache.hits == hits